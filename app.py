@@ -3,15 +3,44 @@
 from flask import Flask, render_template, request, jsonify, send_file
 from calculator import HouseholdGoodsCostCalculator
 from calculator.distance_service import DistanceService
+from calculator.distance_cache import DistanceCache
+from calculator.road_estimator import RoadDistanceEstimator
+from calculator.rate_limiter import ProviderRateLimiter
+from calculator.lane_table import LaneTable
+from calculator.warmup import WarmupManager
+from calculator.shared_cache import open_shared_store
+from calculator.quote_cache import QuoteCache, MEMOIZED_DISTANCE_SOURCES
+from calculator.location_canonicalizer import canonicalize_location
+from calculator.async_distance_service import AsyncDistanceService, SyncDistanceFacade
 from calculator.bulk_processor import BulkProcessor
+from calculator.upload_cache import UploadCache
+from calculator.uncertainty import validate_spec
 import traceback
 import io
 
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 calculator = HouseholdGoodsCostCalculator()
-distance_service = DistanceService()
-bulk_processor = BulkProcessor()
+# Geocodes, lane distances and finished quotes are shared by all workers (and,
+# with SHARED_CACHE_URL pointing at Redis, all hosts) through one store
+shared_store = open_shared_store()
+distance_cache = DistanceCache(store=shared_store)
+# Token buckets live in the cache database so all workers share the provider quotas
+distance_service = DistanceService(
+    cache=distance_cache,
+    road_estimator=RoadDistanceEstimator(),
+    rate_limiter=ProviderRateLimiter(path=distance_cache.path),
+    lane_table=LaneTable.open_default()
+)
+# Restores the cache snapshot (or calibrates the road estimator) and pre-resolves hot lanes in the background
+warmup = WarmupManager(distance_service)
+warmup.start()
+quote_cache = QuoteCache(calculator, store=shared_store)
+# Bulk jobs resolve distances through the async service so many lookups run concurrently
+bulk_processor = BulkProcessor(
+    distance_service=SyncDistanceFacade(AsyncDistanceService(distance_service)),
+    upload_cache=UploadCache()
+)
 
 
 @app.route('/')
@@ -26,8 +55,9 @@ def calculate():
     try:
         data = request.get_json()
         
-        origin = data.get('origin', '').strip()
-        destination = data.get('destination', '').strip()
+        # One canonical spelling per location, so every cache sees the same key
+        origin = canonicalize_location(data.get('origin', '').strip())
+        destination = canonicalize_location(data.get('destination', '').strip())
         weight = float(data.get('weight', 0))
         packing = data.get('packing_service', 'self_pack')
         storage = data.get('storage_option', 'no_storage')
@@ -49,11 +79,38 @@ def calculate():
         # Check if user provided manual distance
         manual_distance = data.get('distance_miles')
         
+        # Get custom rates if provided
+        custom_rates = data.get('custom_rates', {})
+        
+        # Optional Monte Carlo spec for estimated weight/distance (P10/P50/P90 bands)
+        uncertainty = validate_spec(data.get('uncertainty'))
+        
+        # Identical requests under the same rate card get the memoized quote
+        calculator.reload_if_changed()
+        quote_inputs = {
+            'origin': origin,
+            'destination': destination,
+            'weight': weight,
+            'packing_service': packing,
+            'storage_option': storage,
+            'include_insurance': include_insurance,
+            'distance_miles': float(manual_distance) if manual_distance else None,
+            'custom_rates': custom_rates,
+        }
+        if uncertainty:
+            quote_inputs['uncertainty'] = uncertainty
+        cached = quote_cache.get(quote_inputs)
+        if cached is not None:
+            return _quote_response(*cached)
+        
         if manual_distance:
             distance = float(manual_distance)
+            distance_source = 'manual'
         else:
-            # Calculate distance automatically
-            distance = distance_service.calculate_distance(origin, destination)
+            # Calculate distance automatically, within the interactive latency budget
+            resolution = distance_service.resolve_distance(origin, destination)
+            distance = resolution['distance_miles']
+            distance_source = resolution['source']
             
             if distance is None:
                 return jsonify({
@@ -61,9 +118,6 @@ def calculate():
                     'error': 'Could not calculate distance between locations. Please provide distance manually.'
                 }), 400
         
-        # Get custom rates if provided
-        custom_rates = data.get('custom_rates', {})
-        
         # Calculate should cost
         result = calculator.calculate_should_cost(
             origin=origin,
@@ -73,13 +127,18 @@ def calculate():
             packing_service=packing,
             storage_option=storage,
             include_insurance=include_insurance,
-            custom_rates=custom_rates
+            custom_rates=custom_rates,
+            uncertainty={**uncertainty, 'distance_source': distance_source} if uncertainty else None
         )
         
-        return jsonify({
+        payload = {
             'success': True,
-            'result': result
-        })
+            'result': result,
+            'distance_source': distance_source
+        }
+        if distance_source not in MEMOIZED_DISTANCE_SOURCES:
+            return jsonify(payload)
+        return _quote_response(quote_cache.put(quote_inputs, payload), payload)
         
     except ValueError as e:
         return jsonify({
@@ -94,6 +153,16 @@ def calculate():
         }), 500
 
 
+def _quote_response(etag, payload):
+    """Quote response carrying its ETag, or 304 if the client already has this quote."""
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = jsonify(payload)
+    response.set_etag(etag)
+    return response
+
+
 @app.route('/bulk')
 def bulk_upload():
     """Render the bulk upload page."""
@@ -144,15 +213,18 @@ def validate_bulk_file():
 def process_bulk_file():
     """Process bulk calculations from uploaded Excel file."""
     try:
-        if 'file' not in request.files:
+        # A file_hash from /bulk/validate lets the already parsed upload be reused
+        file_hash = request.form.get('file_hash') or None
+        
+        if 'file' not in request.files and not file_hash:
             return jsonify({
                 'success': False,
                 'error': 'No file uploaded'
             }), 400
         
-        file = request.files['file']
+        file = request.files.get('file')
         
-        if file.filename == '':
+        if (file is None or file.filename == '') and not file_hash:
             return jsonify({
                 'success': False,
                 'error': 'No file selected'
@@ -164,11 +236,40 @@ def process_bulk_file():
             import json
             custom_rates = json.loads(request.form.get('custom_rates'))
         
+        # Re-uploads under the same job_id (issued by /bulk/validate) only reprice changed rows
+        job_id = request.form.get('job_id') or None
+        
+        # Optional Monte Carlo spec for estimated weight/distance (P10/P50/P90 bands)
+        uncertainty = None
+        if request.form.get('uncertainty'):
+            import json
+            uncertainty = validate_spec(json.loads(request.form.get('uncertainty')))
+        
+        # format=columnar returns one header and one array per field, with
+        # the remaining rows fetched page by page from /bulk/results
+        columnar = request.form.get('format') == 'columnar'
+        
         # Process bulk calculations
-        result = bulk_processor.process_bulk_calculations(file.stream, custom_rates)
+        process = bulk_processor.process_batch if columnar else bulk_processor.process_bulk_calculations
+        result = process(
+            file.stream if file is not None and file.filename else None,
+            custom_rates,
+            file_hash=file_hash,
+            job_id=job_id,
+            uncertainty=uncertainty
+        )
+        
+        if columnar:
+            page_size = int(request.form.get('page_size') or bulk_processor.PAGE_SIZE)
+            result = bulk_processor.to_columnar(result, page_size)
         
         return jsonify(result)
         
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': f'Invalid input: {str(e)}'
+        }), 400
     except Exception as e:
         print(f"Error processing bulk file: {traceback.format_exc()}")
         return jsonify({
@@ -177,6 +278,91 @@ def process_bulk_file():
         }), 500
 
 
+@app.route('/bulk/results/<result_id>')
+def bulk_results_page(result_id):
+    """Fetch a page of columnar bulk results (offset and limit query parameters)."""
+    try:
+        offset = request.args.get('offset', 0, type=int)
+        limit = request.args.get('limit', bulk_processor.PAGE_SIZE, type=int)
+        
+        page = bulk_processor.results_page(result_id, offset, limit)
+        if page is None:
+            return jsonify({
+                'success': False,
+                'error': f"No stored results for '{result_id}'"
+            }), 404
+        
+        return jsonify({'success': True, 'results': page})
+        
+    except Exception as e:
+        print(f"Error fetching bulk results: {traceback.format_exc()}")
+        return jsonify({
+            'success': False,
+            'error': f'Results error: {str(e)}'
+        }), 500
+
+
+@app.route('/bulk/reprice', methods=['POST'])
+def reprice_bulk_job():
+    """Reprice a stored bulk job under the current rate card and report the impact."""
+    try:
+        data = request.get_json(silent=True) or request.form
+        job_id = data.get('job_id')
+        
+        if not job_id:
+            return jsonify({
+                'success': False,
+                'error': 'Missing required field: job_id'
+            }), 400
+        
+        result = bulk_processor.reprice_job(job_id)
+        return jsonify(result), 200 if result['success'] else 404
+        
+    except Exception as e:
+        print(f"Error repricing bulk job: {traceback.format_exc()}")
+        return jsonify({
+            'success': False,
+            'error': f'Repricing error: {str(e)}'
+        }), 500
+
+
+@app.route('/bulk/compare', methods=['POST'])
+def compare_bulk_rate_cards():
+    """Price an uploaded workbook or stored job under two rate cards side by side."""
+    try:
+        import json
+        file = request.files.get('file')
+        file_hash = request.form.get('file_hash') or None
+        job_id = request.form.get('job_id') or None
+        
+        if (file is None or file.filename == '') and not file_hash and not job_id:
+            return jsonify({
+                'success': False,
+                'error': 'Upload a file or give the job_id of a processed batch'
+            }), 400
+        
+        # Each side: {"rate_card": version} or {"matrix": {...}}, plus optional custom_rates
+        baseline = json.loads(request.form.get('baseline') or '{}')
+        candidate = json.loads(request.form.get('candidate') or '{}')
+        
+        result = bulk_processor.compare_rate_cards(
+            baseline,
+            candidate,
+            file.stream if file is not None and file.filename else None,
+            file_hash=file_hash,
+            job_id=job_id
+        )
+        
+        return jsonify(result)
+        
+    except Exception as e:
+        print(f"Error comparing rate cards: {traceback.format_exc()}")
+        return jsonify({
+            'success': False,
+            'error': f'Comparison error: {str(e)}'
+        }), 500
+
+
 @app.route('/bulk/download/<format>')
 def download_results(format):
     """Download calculation results in specified format."""
@@ -184,13 +370,19 @@ def download_results(format):
         # Get results from session or request (in production, use proper storage)
         # For now, we'll accept results via query params (not ideal for production)
         import json
+        # Columnar responses are downloaded by result_id instead of posting every row back
+        result_id = request.args.get('result_id')
         results_json = request.args.get('results')
         
-        if not results_json:
+        if result_id:
+            results = bulk_processor.stored_batch(result_id)
+            if results is None:
+                return "Results expired, please process the file again", 404
+        elif results_json:
+            results = json.loads(results_json)
+        else:
             return "No results to download", 400
         
-        results = json.loads(results_json)
-        
         if format == 'excel':
             excel_data = bulk_processor.generate_results_excel(results)
             return send_file(
@@ -225,8 +417,19 @@ def download_template():
 
 @app.route('/health')
 def health():
-    """Health check endpoint."""
-    return jsonify({'status': 'healthy'})
+    """Health check endpoint; returns 503 until cache warm-up has finished."""
+    if not warmup.ready:
+        return jsonify({'status': 'warming', 'warmup': warmup.status()}), 503
+    return jsonify({'status': 'healthy', 'warmup': warmup.status()})
+
+
+@app.route('/metrics')
+def metrics():
+    """Distance service and quote cache metrics (latency, cache and lookup counters)."""
+    metrics = distance_service.metrics()
+    metrics['quote_cache'] = quote_cache.stats()
+    metrics['upload_cache'] = bulk_processor.upload_cache.stats()
+    return jsonify(metrics)
 
 
 if __name__ == '__main__':
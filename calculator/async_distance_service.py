@@ -0,0 +1,434 @@
+"""Asyncio distance service with bounded concurrency, plus a blocking facade.
+
+AsyncDistanceService performs geocoding and Google Distance Matrix calls
+over pooled aiohttp sessions so bulk jobs can keep many lookups in flight
+at once. It wraps a regular DistanceService and shares its configuration,
+cache, gazetteer and road estimator. SyncDistanceFacade runs the async
+service on a background event loop and exposes the familiar blocking
+DistanceService API.
+"""
+
+import asyncio
+import functools
+import math
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+from geopy.adapters import AioHTTPAdapter
+from geopy.distance import geodesic
+from geopy.geocoders import Nominatim
+
+from .distance_cache import CACHE_MISS
+from .distance_service import DistanceService, PROVIDER_GEODESIC, geocode_key
+from .geo_vector import coordinate_pair_distances
+from .rate_limiter import PRIORITY_BULK, RateLimitExceeded
+
+
+DEFAULT_MAX_CONCURRENCY = 16
+
+
+class AsyncDistanceService:
+    """Async counterpart of DistanceService with a configurable concurrency limit."""
+
+    def __init__(
+        self,
+        service: Optional[DistanceService] = None,
+        max_concurrency: Optional[int] = None,
+        timeout: float = 10,
+        priority: str = PRIORITY_BULK
+    ):
+        """Initialize the async service.
+
+        Args:
+            service: DistanceService providing configuration, cache,
+                     gazetteer and estimator. A default one is created if omitted.
+            max_concurrency: Maximum simultaneous network lookups. Defaults
+                     to the DISTANCE_MAX_CONCURRENCY env var, then 16.
+            timeout: Per-request timeout in seconds
+            priority: Rate-limiter priority of this service's lookups
+        """
+        self.service = service or DistanceService()
+        self.max_concurrency = max_concurrency or int(
+            os.environ.get('DISTANCE_MAX_CONCURRENCY', DEFAULT_MAX_CONCURRENCY)
+        )
+        self.timeout = timeout
+        self.priority = priority
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._geolocator: Optional[Nominatim] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def start(self):
+        """Open the pooled HTTP session and geocoder (idempotent)."""
+        if self._session is not None:
+            return
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=30),
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+        self._geolocator = Nominatim(
+            user_agent="household-goods-calculator",
+            domain=self.service.nominatim_domain,
+            scheme=self.service.nominatim_scheme,
+            timeout=self.timeout,
+            adapter_factory=AioHTTPAdapter
+        )
+        await self._geolocator.__aenter__()
+
+    async def close(self):
+        """Close the HTTP session and geocoder."""
+        if self._session is None:
+            return
+        await self._geolocator.__aexit__(None, None, None)
+        await self._session.close()
+        self._session = None
+        self._geolocator = None
+
+    async def _geocode_location(self, location: str) -> Optional[Tuple[float, float]]:
+        """Convert location string to coordinates.
+
+        Args:
+            location: Location string (address, city, state, ZIP)
+
+        Returns:
+            Tuple of (latitude, longitude) or None if not found
+        """
+        service = self.service
+        if service.gazetteer is not None:
+            coords = service.gazetteer.lookup(location)
+            if coords is not None:
+                return coords
+
+        if service.cache is not None:
+            cached = service.cache.get_geocode(location)
+            if cached is not CACHE_MISS:
+                return cached
+
+        # Share lookups already in flight on this loop or in DistanceService threads
+        key = geocode_key(location)
+        led, joined = service._inflight.acquire([key])
+        if key in joined:
+            return await self._wait_in_flight(joined[key])
+
+        coords = None
+        try:
+            if not await self._throttle('nominatim'):
+                return None
+            await self.start()
+            try:
+                async with self._semaphore:
+                    result = await self._geolocator.geocode(location)
+            except Exception as e:
+                print(f"Geocoding error for '{location}': {e}")
+                return None
+
+            coords = (result.latitude, result.longitude) if result else None
+            if service.cache is not None:
+                service.cache.set_geocode(location, coords)
+            return coords
+        finally:
+            service._inflight.release(key, coords)
+
+    async def _throttle(self, provider: str) -> bool:
+        """Wait for a rate-limiter token without blocking the event loop.
+
+        Returns:
+            True if the request may be sent, False if the wait budget ran out
+        """
+        limiter = self.service.rate_limiter
+        if limiter is None:
+            return True
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(limiter.acquire, provider, self.priority)
+            )
+            return True
+        except RateLimitExceeded as e:
+            print(f"Skipping lookup: {e}")
+            return False
+
+    async def _wait_in_flight(self, call) -> Any:
+        """Wait for a lookup led by another caller without blocking the event loop."""
+        return await asyncio.get_running_loop().run_in_executor(None, call.wait)
+
+    async def _request_distance_matrix(
+        self,
+        origins: List[str],
+        destinations: List[str]
+    ) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Send one Distance Matrix request and parse the full response grid."""
+        breaker = self.service.google_breaker
+        if not breaker.allow_request():
+            return self.service._parse_distance_matrix(origins, destinations, {'status': 'CIRCUIT_OPEN'})
+        if not await self._throttle('google'):
+            breaker.cancel_request()
+            return self.service._parse_distance_matrix(origins, destinations, {'status': 'RATE_LIMITED'})
+
+        await self.start()
+        params = self.service._matrix_params(origins, destinations)
+        try:
+            async with self._semaphore:
+                async with self._session.get(self.service.google_api_url, params=params) as response:
+                    response.raise_for_status()
+                    data = await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Google Maps API request failed: {e}")
+            data = {'status': 'REQUEST_FAILED'}
+        except ValueError as e:
+            print(f"Google Maps API returned invalid JSON: {e}")
+            data = {'status': 'INVALID_RESPONSE'}
+
+        self.service._record_google_outcome(data)
+        return self.service._parse_distance_matrix(origins, destinations, data)
+
+    async def calculate_distances_batch(self, pairs: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """Calculate driving distances for many pairs with concurrent Distance Matrix calls.
+
+        Args:
+            pairs: List of (origin, destination) location string tuples
+
+        Returns:
+            List of dicts in the same order as ``pairs`` with 'origin',
+            'destination', 'distance_miles' and 'status'
+        """
+        service = self.service
+        if not service.google_api_key:
+            return [
+                {'origin': o, 'destination': d, 'distance_miles': None, 'status': 'NO_API_KEY'}
+                for o, d in pairs
+            ]
+
+        unique_pairs = list(dict.fromkeys(pairs))
+        resolved = service._cached_google_distances(unique_pairs)
+        missing = [pair for pair in unique_pairs if pair not in resolved]
+        led, joined = service._acquire_lanes(missing)
+        try:
+            grids = await asyncio.gather(*(
+                self._request_distance_matrix(origins, destinations)
+                for origins, destinations in service._pack_matrix_requests(list(led.values()))
+            ))
+            for grid in grids:
+                service._store_google_grid(grid)
+                resolved.update(grid)
+        finally:
+            service._release_lanes(led, resolved)
+
+        waited = await asyncio.gather(*(self._wait_in_flight(call) for call in joined.values()))
+        resolved.update(zip(joined, waited))
+
+        return [{'origin': o, 'destination': d, **resolved[(o, d)]} for o, d in pairs]
+
+    async def _calculate_google_maps_distance(self, origin: str, destination: str) -> Optional[float]:
+        """Calculate driving distance using Google Maps Distance Matrix API."""
+        if not self.service.google_api_key:
+            return None
+        result = (await self.calculate_distances_batch([(origin, destination)]))[0]
+        if result['status'] != 'OK':
+            print(f"Google Maps route error: {result['status']}")
+        return result['distance_miles']
+
+    async def _calculate_geodesic_distance(self, origin: str, destination: str) -> Optional[float]:
+        """Calculate straight-line distance, geocoding both ends concurrently."""
+        cache = self.service.cache
+        if cache is not None:
+            cached = cache.get_distance(origin, destination, PROVIDER_GEODESIC)
+            if cached is not CACHE_MISS and cached is not None:
+                return cached
+
+        origin_coords, destination_coords = await asyncio.gather(
+            self._geocode_location(origin),
+            self._geocode_location(destination)
+        )
+        if origin_coords is None or destination_coords is None:
+            return None
+
+        distance_miles = round(geodesic(origin_coords, destination_coords).kilometers * 0.621371, 2)
+        if cache is not None:
+            cache.set_distance(origin, destination, PROVIDER_GEODESIC, distance_miles)
+        return distance_miles
+
+    async def estimate_road_distance(self, origin: str, destination: str) -> Optional[Dict[str, Any]]:
+        """Estimate driving distance from geodesic distance and learned circuity."""
+        if self.service.road_estimator is None:
+            return None
+        origin_coords, destination_coords = await asyncio.gather(
+            self._geocode_location(origin),
+            self._geocode_location(destination)
+        )
+        if origin_coords is None or destination_coords is None:
+            return None
+        return self.service.road_estimator.estimate(origin_coords, destination_coords)
+
+    async def calculate_distance(self, origin: str, destination: str) -> Optional[float]:
+        """Calculate distance in miles between two locations.
+
+        Same provider order as DistanceService.calculate_distance.
+
+        Args:
+            origin: Origin location string
+            destination: Destination location string
+
+        Returns:
+            Distance in miles, or None if calculation fails
+        """
+        service = self.service
+        if service.lane_table is not None:
+            distance = service.lane_table.lookup(origin, destination)
+            if distance is not None:
+                return distance
+
+        if service.use_google_maps and service.estimator_confidence_threshold is not None:
+            estimate = service.estimate_road_distance(origin, destination, offline_only=True)
+            if estimate and estimate['confidence'] >= service.estimator_confidence_threshold:
+                return estimate['distance_miles']
+
+        if service.use_google_maps:
+            distance = await self._calculate_google_maps_distance(origin, destination)
+            if distance is not None:
+                return distance
+
+        if service.road_estimator is not None and service.road_estimator.is_calibrated:
+            estimate = await self.estimate_road_distance(origin, destination)
+            if estimate is not None:
+                return estimate['distance_miles']
+
+        return await self._calculate_geodesic_distance(origin, destination)
+
+    async def calculate_distances(self, pairs: List[Tuple[str, str]]) -> List[Optional[float]]:
+        """Calculate distances in miles for many pairs with lookups in flight concurrently.
+
+        Args:
+            pairs: List of (origin, destination) location string tuples
+
+        Returns:
+            Distances in miles in the same order as ``pairs``
+        """
+        return [resolution['distance_miles'] for resolution in await self.resolve_distances(pairs)]
+
+    async def resolve_distances(self, pairs: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """Like calculate_distances, but also report where each distance came from.
+
+        Returns:
+            Dicts with 'distance_miles' and 'source' (see DistanceService.resolve_distances)
+        """
+        service = self.service
+        distances = service._lane_table_distances(pairs)
+        sources = ['lane_table' if distance is not None else None for distance in distances]
+
+        if service.use_google_maps:
+            remaining = [i for i, distance in enumerate(distances) if distance is None]
+            results = await self.calculate_distances_batch([pairs[i] for i in remaining])
+            for i, result in zip(remaining, results):
+                distances[i], sources[i] = result['distance_miles'], 'google'
+
+        fallback = [i for i, distance in enumerate(distances) if distance is None]
+        if not fallback:
+            return self._resolutions(distances, sources)
+
+        locations = list(dict.fromkeys(location for i in fallback for location in pairs[i]))
+        resolved = await asyncio.gather(*(self._geocode_location(location) for location in locations))
+        coords = dict(zip(locations, resolved))
+
+        straight = coordinate_pair_distances(
+            [coords[pairs[i][0]] for i in fallback],
+            [coords[pairs[i][1]] for i in fallback]
+        )
+        use_estimator = service.road_estimator is not None and service.road_estimator.is_calibrated
+        for i, miles in zip(fallback, straight):
+            if math.isnan(miles):
+                continue
+            if use_estimator:
+                origin, destination = pairs[i]
+                estimate = service.road_estimator.estimate(coords[origin], coords[destination], float(miles))
+                distances[i], sources[i] = estimate['distance_miles'], 'estimate'
+            else:
+                distances[i], sources[i] = round(float(miles), 2), 'geodesic'
+
+        return self._resolutions(distances, sources)
+
+    @staticmethod
+    def _resolutions(distances: List[Optional[float]], sources: List[Optional[str]]) -> List[Dict[str, Any]]:
+        return [
+            {'distance_miles': distance, 'source': source if distance is not None else None}
+            for distance, source in zip(distances, sources)
+        ]
+
+    async def calculate_distances_from(self, origin: str, destinations: List[str]) -> List[Optional[float]]:
+        """Calculate distances from one origin to many destinations."""
+        return await self.calculate_distances([(origin, destination) for destination in destinations])
+
+
+class SyncDistanceFacade:
+    """Blocking DistanceService-compatible API backed by an AsyncDistanceService.
+
+    The async service runs on a private event loop in a daemon thread that
+    is started on first use, so the facade can be shared by WSGI threads.
+    Attributes not implemented here are delegated to the wrapped
+    DistanceService.
+    """
+
+    def __init__(self, async_service: Optional[AsyncDistanceService] = None):
+        """Initialize the facade.
+
+        Args:
+            async_service: Async service to run. A default one is created if omitted.
+        """
+        self.async_service = async_service or AsyncDistanceService()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.async_service.service, name)
+
+    def _run(self, coroutine):
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name='distance-event-loop',
+                    daemon=True
+                )
+                self._thread.start()
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def calculate_distance(self, origin: str, destination: str) -> Optional[float]:
+        """Blocking wrapper for AsyncDistanceService.calculate_distance."""
+        return self._run(self.async_service.calculate_distance(origin, destination))
+
+    def calculate_distances(self, pairs: List[Tuple[str, str]]) -> List[Optional[float]]:
+        """Blocking wrapper for AsyncDistanceService.calculate_distances."""
+        return self._run(self.async_service.calculate_distances(pairs))
+
+    def resolve_distances(self, pairs: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """Blocking wrapper for AsyncDistanceService.resolve_distances."""
+        return self._run(self.async_service.resolve_distances(pairs))
+
+    def calculate_distances_batch(self, pairs: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """Blocking wrapper for AsyncDistanceService.calculate_distances_batch."""
+        return self._run(self.async_service.calculate_distances_batch(pairs))
+
+    def calculate_distances_from(self, origin: str, destinations: List[str]) -> List[Optional[float]]:
+        """Blocking wrapper for AsyncDistanceService.calculate_distances_from."""
+        return self._run(self.async_service.calculate_distances_from(origin, destinations))
+
+    def close(self):
+        """Close the async service and stop the background loop."""
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.async_service.close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join()
+        loop.close()
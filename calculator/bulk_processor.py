@@ -1,10 +1,25 @@
 """Bulk processing module for handling Excel file uploads and batch calculations."""
 
+import hashlib
+import re
+import time
+import uuid
+import numpy as np
 import pandas as pd
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple, Union
 import io
-from .cost_engine import HouseholdGoodsCostCalculator
+from .columnar import encode_batch
+from .cost_engine import HouseholdGoodsCostCalculator, changed_rate_paths, format_rate_path, rate_card_hash
+from .distance_cache import DistanceCache
 from .distance_service import DistanceService
+from .location_canonicalizer import LocationCanonicalizer, get_default_canonicalizer
+from .move_batch import MISSING_DISTANCE_ERROR, MoveBatch
+from .rate_index import RateDependencyIndex
+from .rate_limiter import PRIORITY_BULK, lookup_priority
+from .shared_cache import MISS
+from .upload_cache import UploadCache
+from .uncertainty import simulate_moves
+from .vector_pricing import move_frame, price_moves
 
 
 class BulkProcessor:
@@ -18,10 +33,89 @@ class BulkProcessor:
         'include_insurance'
     ]
     
-    def __init__(self):
-        """Initialize bulk processor with calculator and distance service."""
+    # Reused rows with a resolved (not manual) distance are repriced once the
+    # cached lane distance they were priced with would have expired
+    STALE_DISTANCE_SECONDS = DistanceCache.DEFAULT_TTL_SECONDS
+    
+    # Rows per page of columnar results
+    PAGE_SIZE = 1000
+    
+    # Content hashes (UploadCache.content_hash) accepted from clients
+    FILE_HASH_PATTERN = re.compile(r'[0-9a-f]{64}')
+    
+    # Job ids issued by new_job_id
+    JOB_ID_PATTERN = re.compile(r'[0-9a-f]{32}')
+    
+    def __init__(
+        self,
+        distance_service: Optional[DistanceService] = None,
+        canonicalizer: Optional[LocationCanonicalizer] = None,
+        upload_cache: Optional[UploadCache] = None
+    ):
+        """Initialize bulk processor with calculator and distance service.
+        
+        Args:
+            distance_service: Optional shared distance service. A private
+                            uncached instance is created if not provided.
+            canonicalizer: Location canonicalizer applied to uploaded
+                            origins and destinations. Defaults to the shared one.
+            upload_cache: Optional cache of parsed uploads and priced results
+                            keyed by upload content hash
+        """
         self.calculator = HouseholdGoodsCostCalculator()
-        self.distance_service = DistanceService()
+        self.distance_service = distance_service or DistanceService()
+        self.canonicalizer = canonicalizer or get_default_canonicalizer()
+        self.upload_cache = upload_cache
+    
+    def _load_upload(self, file_stream=None, file_hash: Optional[str] = None) -> Tuple[pd.DataFrame, Dict[str, Any], str]:
+        """Parse and canonicalize an uploaded workbook, reusing earlier parses.
+        
+        An uploaded file is always identified by the hash of its own bytes;
+        ``file_hash`` is only used when no file is sent.
+        
+        Args:
+            file_stream: File-like object containing Excel data (may be None
+                         if ``file_hash`` names a cached upload)
+            file_hash: Content hash returned by an earlier validation
+            
+        Returns:
+            Tuple of (canonicalized rows, canonicalization stats, content hash).
+            The frame may be shared with other requests and must not be modified.
+            
+        Raises:
+            ValueError: If the hash is malformed or neither a cached upload
+                        nor a file is available
+        """
+        if file_hash is not None and not self.FILE_HASH_PATTERN.fullmatch(file_hash):
+            raise ValueError("Invalid file hash")
+        
+        if file_stream is None:
+            cached = self.upload_cache.get(f'{file_hash}.frame') if file_hash and self.upload_cache is not None else MISS
+            if cached is MISS:
+                raise ValueError("Uploaded file is no longer available; please upload it again")
+            return cached + (file_hash,)
+        
+        data = file_stream.read()
+        digest = UploadCache.content_hash(data)
+        if self.upload_cache is not None:
+            cached = self.upload_cache.get(f'{digest}.frame')
+            if cached is not MISS:
+                return cached + (digest,)
+        
+        df = pd.read_excel(io.BytesIO(data))
+        
+        # Canonicalize locations once so equivalent spellings share lookups
+        canonicalization = self._canonicalize_locations(df)
+        if self.upload_cache is not None:
+            self.upload_cache.put(f'{digest}.frame', (df, canonicalization))
+        return df, canonicalization, digest
+    
+    def _rate_variant(self, custom_rates: Optional[Dict], uncertainty: Optional[Dict] = None) -> str:
+        """Key of the rates (and uncertainty spec) a result set was priced with."""
+        variant = {'rate_card': self.calculator.rate_card_version, 'custom_rates': custom_rates or {}}
+        if uncertainty:
+            variant['uncertainty'] = uncertainty
+        return rate_card_hash(variant)
     
     def validate_excel_file(self, file_stream) -> Dict[str, Any]:
         """Validate Excel file format and return validation results.
@@ -35,9 +129,12 @@ class BulkProcessor:
             - errors (List[str]): List of validation errors
             - warnings (List[str]): List of warnings
             - row_count (int): Number of data rows
+            - file_hash (str): Content hash that /bulk/process can reuse
+            - job_id (str): New job id to send back with this workbook and
+              its later re-uploads (see new_job_id)
         """
         try:
-            df = pd.read_excel(file_stream)
+            df, _, file_hash = self._load_upload(file_stream)
             errors = []
             warnings = []
             
@@ -76,7 +173,9 @@ class BulkProcessor:
                 'valid': len(errors) == 0,
                 'errors': errors,
                 'warnings': warnings,
-                'row_count': len(df) if not df.empty else 0
+                'row_count': len(df) if not df.empty else 0,
+                'file_hash': file_hash,
+                'job_id': self.new_job_id()
             }
             
         except Exception as e:
@@ -87,182 +186,799 @@ class BulkProcessor:
                 'row_count': 0
             }
     
-    def process_bulk_calculations(self, file_stream, custom_rates: Optional[Dict] = None) -> Dict[str, Any]:
+    def _canonicalize_locations(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """Rewrite origin and destination columns to canonical locations in place.
+        
+        Args:
+            df: Uploaded rows
+            
+        Returns:
+            Collapse statistics from LocationCanonicalizer.collapse_stats
+        """
+        if 'origin' not in df.columns or 'destination' not in df.columns:
+            return {}
+        
+        def canonical(value):
+            return value if pd.isna(value) else self.canonicalizer.canonicalize(str(value).strip())
+        
+        raw_lanes = [
+            (str(origin).strip(), str(destination).strip())
+            for origin, destination in zip(df['origin'], df['destination'])
+            if not pd.isna(origin) and not pd.isna(destination)
+        ]
+        stats = self.canonicalizer.collapse_stats(raw_lanes)
+        df['origin'] = df['origin'].map(canonical)
+        df['destination'] = df['destination'].map(canonical)
+        return stats
+    
+    def _resolve_lanes(self, lanes: List[Tuple[str, str]]) -> Dict[tuple, Dict[str, Any]]:
+        """Calculate distances for lanes of rows without a manual distance.
+        
+        Lanes are deduplicated and resolved with the batch distance API
+        (batched Google requests and/or the vectorized geodesic engine)
+        instead of one blocking lookup per row.
+        
+        Args:
+            lanes: (origin, destination) pairs, possibly repeated
+            
+        Returns:
+            Dict mapping (origin, destination) to a dict with 'distance_miles'
+            (None if unresolved) and 'source' (see DistanceService.resolve_distances)
+        """
+        lanes = list(dict.fromkeys(lane for lane in lanes if lane[0] and lane[1]))
+        if not lanes:
+            return {}
+        
+        # Bulk lookups queue behind interactive ones for rate-limited providers
+        with lookup_priority(PRIORITY_BULK):
+            return dict(zip(lanes, self.distance_service.resolve_distances(lanes)))
+    
+    @staticmethod
+    def _fingerprint(inputs: Tuple) -> str:
+        """Stable fingerprint of a row's normalized inputs."""
+        return hashlib.blake2b(repr(inputs).encode('utf-8'), digest_size=12).hexdigest()
+    
+    def _load_job(
+        self,
+        job_id: Optional[str],
+        custom_rates: Optional[Dict],
+        uncertainty: Optional[Dict] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Return the stored state of a job's previous run, if any.
+        
+        Results that the current rates would price differently are dropped
+        from the returned state, so only those rows are repriced: all of them
+        if the custom rates or uncertainty spec changed, and only the ones
+        depending on a changed rate card element if the rate matrix changed.
+        
+        Args:
+            job_id: Job id issued by new_job_id
+            custom_rates: Custom rate overrides of the current run
+            uncertainty: Monte Carlo spec of the current run
+            
+        Returns:
+            Dict with 'rate_card', 'custom_rates', 'rows' (row number ->
+            fingerprint) and 'results' (fingerprint -> dict with 'result',
+            'priced_at', 'distance', 'arguments' and 'elements'), or None
+            without a job id, upload cache or previous run
+        """
+        if not job_id or self.upload_cache is None:
+            return None
+        state = self.upload_cache.get(f'job.{self._job_key(job_id)}')
+        if state is MISS:
+            return None
+        if state.get('custom_rates') != (custom_rates or {}) or state.get('uncertainty') != uncertainty:
+            # Rates changed: every row is repriced, but the diff is still reported
+            return {**state, 'results': {}}
+        if state['rate_card'] != self.calculator.rate_card_version:
+            affected = self._affected_results(state)
+            return {**state, 'results': {
+                fingerprint: entry for fingerprint, entry in state['results'].items()
+                if fingerprint not in affected
+            }}
+        return state
+    
+    def _remember_rate_card(self):
+        """Keep the current rate matrix so later rate card changes can be diffed."""
+        key = f'ratecard.{self.calculator.rate_card_version}'
+        if self.upload_cache.get(key) is MISS:
+            self.upload_cache.put(key, self.calculator.matrix)
+    
+    def _rate_card_changes(self, version: str) -> Optional[set]:
+        """Paths of the rate card elements changed since ``version``, or None if unknown."""
+        if version == self.calculator.rate_card_version:
+            return set()
+        previous = self.upload_cache.get(f'ratecard.{version}')
+        if previous is MISS:
+            return None
+        return changed_rate_paths(previous, self.calculator.matrix)
+    
+    def _affected_results(self, state: Dict[str, Any]) -> set:
+        """Fingerprints of a job's results that the current rate card prices differently."""
+        changed = self._rate_card_changes(state['rate_card'])
+        if changed is None:
+            return set(state['results'])
+        index = RateDependencyIndex()
+        for fingerprint, entry in state['results'].items():
+            index.add(fingerprint, entry['elements'])
+        return index.affected(changed)
+    
+    @staticmethod
+    def new_job_id() -> str:
+        """Issue the id a client echoes back to re-upload a workbook incrementally.
+        
+        Jobs are identified by server-issued ids rather than anything the
+        client chooses (such as the file name), so unrelated uploads never
+        share a job's stored rows.
+        """
+        return uuid.uuid4().hex
+    
+    @classmethod
+    def _job_key(cls, job_id: str) -> str:
+        """Return the cache key of a job.
+        
+        Raises:
+            ValueError: If ``job_id`` was not issued by new_job_id
+        """
+        if not cls.JOB_ID_PATTERN.fullmatch(job_id or ''):
+            raise ValueError("Invalid job id; use the job_id issued by /bulk/validate")
+        return hashlib.blake2b(job_id.encode('utf-8'), digest_size=12).hexdigest()
+    
+    def process_bulk_calculations(
+        self,
+        file_stream,
+        custom_rates: Optional[Dict] = None,
+        file_hash: Optional[str] = None,
+        job_id: Optional[str] = None,
+        uncertainty: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        """Process bulk calculations from Excel file, with results as row dicts.
+        
+        Same as process_batch, but the priced batch is returned in the row
+        format: 'results' holds one dict per row (see MoveBatch.result_rows).
+        
+        Returns:
+            Dict containing:
+            - success (bool): Overall success status
+            - results (List[Dict]): List of calculation results
+            - errors (List[str]): List of processing errors
+            - summary (Dict): Summary statistics
+            - diff (Dict): Changes since the job's previous run (with job_id)
+            - job_id (str): The job id (with job_id)
+        """
+        response = self.process_batch(file_stream, custom_rates, file_hash, job_id, uncertainty)
+        rows = {key: value for key, value in response.items() if key != 'batch'}
+        rows['results'] = response['batch'].result_rows() if response['batch'] is not None else []
+        return rows
+    
+    def process_batch(
+        self,
+        file_stream,
+        custom_rates: Optional[Dict] = None,
+        file_hash: Optional[str] = None,
+        job_id: Optional[str] = None,
+        uncertainty: Optional[Dict] = None
+    ) -> Dict[str, Any]:
         """Process bulk calculations from Excel file.
         
+        A workbook already priced with the same rate card and custom rates
+        is answered from the upload cache without recomputation. With a
+        ``job_id``, only rows whose inputs differ from the job's previous run
+        (or whose resolved lane distance is older than STALE_DISTANCE_SECONDS,
+        or that depend on a rate card element changed since) are repriced,
+        and a diff against that run is returned.
+        
         Args:
-            file_stream: File-like object containing Excel data
+            file_stream: File-like object containing Excel data (may be None
+                         if ``file_hash`` names a cached upload)
             custom_rates: Optional custom rate overrides
+            file_hash: Content hash from validate_excel_file
+            job_id: Optional job id (see new_job_id) of a repeatedly
+                    re-uploaded workbook
+            uncertainty: Optional Monte Carlo spec (see calculator.uncertainty);
+                         every priced row gets P10/P50/P90 totals and
+                         bracket-crossing probabilities as 'uncertainty'
             
         Returns:
             Dict containing:
             - success (bool): Overall success status
-            - results (List[Dict]): List of calculation results
+            - batch (MoveBatch): The rows with their results in quote_index,
+              quotes and errors (None if the file could not be processed).
+              It may be shared with other requests and must not be modified.
             - errors (List[str]): List of processing errors
             - summary (Dict): Summary statistics
+            - diff (Dict): Changes since the job's previous run (with job_id)
+            - job_id (str): The job id (with job_id)
         """
         try:
-            # Read Excel file
-            df = pd.read_excel(file_stream)
+            self.calculator.reload_if_changed()
+            if job_id:
+                self._job_key(job_id)
             
-            results = []
-            errors = []
-            successful = 0
-            failed = 0
+            # Read Excel file (or reuse the parse from validation)
+            df, canonicalization, file_hash = self._load_upload(file_stream, file_hash)
             
-            # Process each row
-            for idx, row in df.iterrows():
-                row_num = idx + 2  # Excel row number (accounting for header)
-                
+            variant = self._rate_variant(custom_rates, uncertainty)
+            results_key = f'{file_hash}.batch.{variant}'
+            if self.upload_cache is not None and not job_id:
+                cached = self.upload_cache.get(results_key)
+                if cached is not MISS:
+                    return {**cached, 'summary': {**cached['summary'], 'from_cache': True}}
+            
+            previous = self._load_job(job_id, custom_rates, uncertainty)
+            reusable = previous['results'] if previous else {}
+            now = time.time()
+            
+            # Normalize every row column by column; rows unchanged since the
+            # previous run keep their result
+            batch = MoveBatch.from_frame(df)
+            rows = []
+            for inputs in batch.inputs():
+                if inputs is None:
+                    rows.append((None, None, None))
+                    continue
+                fingerprint = self._fingerprint(inputs)
+                entry = reusable.get(fingerprint)
+                if entry is not None and entry['distance'] is not None and now - entry['priced_at'] > self.STALE_DISTANCE_SECONDS:
+                    entry = None
+                rows.append((inputs, fingerprint, entry))
+            
+            # Resolve missing distances of the rows being repriced up front in one batch
+            resolved_distances = self._resolve_lanes([
+                (inputs[0], inputs[1]) for inputs, _, entry in rows
+                if inputs is not None and entry is None and inputs[2] is None
+            ])
+            
+            reused = 0
+            job_results: Dict[str, Dict[str, Any]] = {}
+            
+            # Identical normalized inputs (e.g. standard relocation packages)
+            # are priced once; every matching row points at the same quote
+            priced: Dict[Tuple, Dict[str, Any]] = {}
+            quote_numbers: Dict[int, int] = {}
+            # Where each priced distance came from, for its uncertainty band
+            distance_sources: Dict[Tuple, Optional[str]] = {}
+            
+            # Process each row, writing its quote (or error) into the batch columns
+            for position, (inputs, fingerprint, entry) in enumerate(rows):
+                if inputs is None:
+                    continue
                 try:
-                    # Extract required fields
-                    origin = str(row.get('origin', '')).strip()
-                    destination = str(row.get('destination', '')).strip()
-                    weight = float(row.get('weight', 0))
-                    
-                    # Extract optional fields with defaults
-                    distance_miles = row.get('distance_miles')
-                    packing_service = str(row.get('packing_service', 'self_pack')).strip().lower()
-                    storage_option = str(row.get('storage_option', 'no_storage')).strip().lower()
-                    include_insurance = row.get('include_insurance', True)
-                    
-                    # Convert insurance to boolean if it's a string
-                    if isinstance(include_insurance, str):
-                        include_insurance = include_insurance.lower() in ['true', 'yes', '1', 'y']
-                    
-                    # Validate required fields
-                    if not origin or not destination:
-                        raise ValueError("Origin and destination are required")
-                    
-                    if weight <= 0:
-                        raise ValueError(f"Weight must be greater than 0, got {weight}")
-                    
-                    # Calculate distance if not provided
-                    if pd.isna(distance_miles) or distance_miles == '':
-                        distance = self.distance_service.calculate_distance(origin, destination)
-                        if distance is None:
-                            raise ValueError("Could not calculate distance. Please provide distance manually.")
+                    if entry is not None:
+                        result = entry['result']
+                        reused += 1
                     else:
-                        distance = float(distance_miles)
-                    
-                    # Perform calculation
-                    result = self.calculator.calculate_should_cost(
-                        origin=origin,
-                        destination=destination,
-                        distance_miles=distance,
-                        weight_pounds=weight,
-                        packing_service=packing_service,
-                        storage_option=storage_option,
-                        include_insurance=include_insurance,
-                        custom_rates=custom_rates
-                    )
+                        distance, source = None, 'manual'
+                        if inputs[2] is None:
+                            resolution = resolved_distances.get((inputs[0], inputs[1]), {})
+                            distance, source = resolution.get('distance_miles'), resolution.get('source')
+                            if distance is None:
+                                raise ValueError(MISSING_DISTANCE_ERROR)
+                        arguments = inputs if distance is None else inputs[:2] + (distance,) + inputs[3:]
+                        
+                        result = priced.get(arguments)
+                        if result is None:
+                            result = self.calculator.calculate_should_cost(*arguments, custom_rates=custom_rates)
+                            priced[arguments] = result
+                        # A distance typed into the sheet is exact, whoever else resolved it
+                        if source == 'manual' or arguments not in distance_sources:
+                            distance_sources[arguments] = source
+                        if job_id:
+                            entry = {
+                                'result': result,
+                                'priced_at': now,
+                                'distance': distance,
+                                'distance_source': source,
+                                'arguments': arguments,
+                                'elements': self.calculator.rate_elements(*arguments, custom_rates=custom_rates),
+                            }
+                    job_results[fingerprint] = entry
                     
-                    # Add row metadata
-                    result['row_number'] = row_num
-                    result['status'] = 'success'
-                    results.append(result)
-                    successful += 1
+                    quote = quote_numbers.get(id(result))
+                    if quote is None:
+                        quote = quote_numbers[id(result)] = len(batch.quotes)
+                        batch.quotes.append(result)
+                    batch.quote_index[position] = quote
                     
                 except Exception as e:
-                    error_msg = f"Row {row_num}: {str(e)}"
-                    errors.append(error_msg)
-                    
-                    # Add failed row to results with error
-                    results.append({
-                        'row_number': row_num,
-                        'status': 'failed',
-                        'error': str(e),
-                        'origin': origin if 'origin' in locals() else 'N/A',
-                        'destination': destination if 'destination' in locals() else 'N/A',
-                        'total_should_cost': 0
-                    })
-                    failed += 1
+                    batch.errors[position] = str(e)
+            
+            if uncertainty and priced:
+                # All new quotes are simulated together in vectorized chunks;
+                # rows share their quote, so each band is attached once
+                moves = list(priced)
+                bands = simulate_moves(
+                    self.calculator,
+                    moves,
+                    uncertainty,
+                    custom_rates,
+                    [distance_sources.get(arguments) for arguments in moves]
+                )
+                for arguments, band in zip(moves, bands):
+                    priced[arguments]['uncertainty'] = band
             
             # Generate summary
+            failed_rows = np.flatnonzero(~batch.priced)
+            successful = len(batch) - len(failed_rows)
+            failed = len(failed_rows)
+            errors = [f"Row {batch.row_number[position]}: {batch.errors[position]}" for position in failed_rows]
             summary = {
                 'total_rows': len(df),
                 'successful': successful,
                 'failed': failed,
-                'success_rate': f"{(successful / len(df) * 100):.1f}%" if len(df) > 0 else "0%"
+                'success_rate': f"{(successful / len(df) * 100):.1f}%" if len(df) > 0 else "0%",
+                'unique_inputs': len(priced),
+                'unique_to_total_ratio': round(len(priced) / successful, 3) if successful else 0.0,
+                'canonicalization': canonicalization,
+                'file_hash': file_hash,
+                'from_cache': False
             }
             
-            return {
+            response = {
                 'success': True,
-                'results': results,
+                'batch': batch,
                 'errors': errors,
                 'summary': summary
             }
             
+            # Lanes no provider could resolve may succeed next time, so only
+            # fully resolved result sets are reused
+            if self.upload_cache is not None and all(
+                resolution['distance_miles'] is not None for resolution in resolved_distances.values()
+            ):
+                self.upload_cache.put(results_key, response)
+            
+            if job_id and self.upload_cache is not None:
+                row_fingerprints = {
+                    row_num: fingerprint for row_num, (_, fingerprint, _) in zip(batch.row_number.tolist(), rows)
+                }
+                response = {**response, 'job_id': job_id}
+                response['diff'] = self._diff_report(previous, row_fingerprints, len(rows) - failed - reused, reused)
+                self._remember_rate_card()
+                self.upload_cache.put(f'job.{self._job_key(job_id)}', {
+                    'rate_card': self.calculator.rate_card_version,
+                    'custom_rates': custom_rates or {},
+                    'uncertainty': uncertainty,
+                    'rows': row_fingerprints,
+                    'results': job_results,
+                })
+            return response
+            
         except Exception as e:
             return {
                 'success': False,
-                'results': [],
+                'batch': None,
                 'errors': [f"Error processing file: {str(e)}"],
                 'summary': {'total_rows': 0, 'successful': 0, 'failed': 0, 'success_rate': '0%'}
             }
     
-    def generate_results_excel(self, results: List[Dict]) -> bytes:
+    @staticmethod
+    def _diff_report(
+        previous: Optional[Dict[str, Any]],
+        rows: Dict[int, Optional[str]],
+        recomputed: int,
+        reused: int
+    ) -> Dict[str, Any]:
+        """Compare this run's row fingerprints with the job's previous run.
+        
+        Args:
+            previous: Previous job state from _load_job (None for a first run)
+            rows: Row number -> input fingerprint (None for invalid rows)
+            recomputed: Rows priced in this run
+            reused: Rows whose previous result was reused
+            
+        Returns:
+            Dict with row numbers that are new, changed or removed and
+            counts of unchanged, recomputed and reused rows
+        """
+        before = previous['rows'] if previous else {}
+        new = [row for row in rows if row not in before]
+        changed = [row for row in rows if row in before and before[row] != rows[row]]
+        removed = [row for row in before if row not in rows]
+        return {
+            'has_previous_run': previous is not None,
+            'new_rows': new,
+            'changed_rows': changed,
+            'removed_rows': removed,
+            'unchanged': len(rows) - len(new) - len(changed),
+            'recomputed': recomputed,
+            'reused': reused,
+        }
+    
+    def reprice_job(self, job_id: str, top: int = 10) -> Dict[str, Any]:
+        """Reprice a stored job under the current rate card and report the impact.
+        
+        Only the job's quotes depending on a rate card element that changed
+        since they were priced are recalculated (all of them if the previous
+        rate matrix is no longer known); the job keeps the new results, so a
+        later re-upload reuses them.
+        
+        Args:
+            job_id: Job id used when the job was processed
+            top: Number of largest moves to list
+            
+        Returns:
+            Dict containing:
+            - success (bool): Whether the job was found
+            - from_rate_card / to_rate_card (str): Rate card versions
+            - changed_elements (List[str]): Changed rate card elements
+              (None if the previous rate matrix is unknown)
+            - quotes (int): Rows with a stored result
+            - repriced (int): Unique inputs recalculated
+            - quotes_moved (int): Rows whose total changed
+            - total_delta, mean_delta, max_increase, max_decrease (float):
+              Change of total_should_cost over the moved rows
+            - largest_moves (List[Dict]): Largest changes by amount
+        """
+        self.calculator.reload_if_changed()
+        if not self.JOB_ID_PATTERN.fullmatch(job_id or ''):
+            return {'success': False, 'error': f"No stored results for job '{job_id}'"}
+        state = self.upload_cache.get(f'job.{self._job_key(job_id)}') if self.upload_cache is not None else MISS
+        if state is MISS or 'rate_card' not in state:
+            return {'success': False, 'error': f"No stored results for job '{job_id}'"}
+        
+        changed = self._rate_card_changes(state['rate_card'])
+        affected = self._affected_results(state)
+        
+        rows_by_fingerprint: Dict[str, List[int]] = {}
+        for row_num, fingerprint in state['rows'].items():
+            rows_by_fingerprint.setdefault(fingerprint, []).append(row_num)
+        
+        results = dict(state['results'])
+        moves = []
+        for fingerprint in affected:
+            entry = results[fingerprint]
+            arguments = tuple(entry['arguments'])
+            uncertainty = state.get('uncertainty')
+            if uncertainty:
+                # Entries stored before sources were recorded only know manual distances
+                source = entry.get('distance_source', 'manual' if entry['distance'] is None else None)
+                uncertainty = {**uncertainty, 'distance_source': source}
+            result = self.calculator.calculate_should_cost(
+                *arguments,
+                custom_rates=state['custom_rates'],
+                uncertainty=uncertainty
+            )
+            results[fingerprint] = {
+                **entry,
+                'result': result,
+                'elements': self.calculator.rate_elements(*arguments, custom_rates=state['custom_rates']),
+            }
+            delta = round(result['total_should_cost'] - entry['result']['total_should_cost'], 2)
+            if delta:
+                moves.append({
+                    'rows': sorted(rows_by_fingerprint.get(fingerprint, [])),
+                    'origin': arguments[0],
+                    'destination': arguments[1],
+                    'weight_pounds': arguments[3],
+                    'before': entry['result']['total_should_cost'],
+                    'after': result['total_should_cost'],
+                    'delta': delta,
+                })
+        
+        self._remember_rate_card()
+        self.upload_cache.put(f'job.{self._job_key(job_id)}', {
+            **state,
+            'rate_card': self.calculator.rate_card_version,
+            'results': results,
+        })
+        
+        moved_rows = sum(len(move['rows']) for move in moves)
+        total_delta = round(sum((move['delta'] * len(move['rows']) for move in moves), 0.0), 2)
+        return {
+            'success': True,
+            'job_id': job_id,
+            'from_rate_card': state['rate_card'],
+            'to_rate_card': self.calculator.rate_card_version,
+            'changed_elements': None if changed is None else sorted(format_rate_path(path) for path in changed),
+            'quotes': sum(len(rows_by_fingerprint.get(fingerprint, [])) for fingerprint in results),
+            'repriced': len(affected),
+            'quotes_moved': moved_rows,
+            'total_delta': total_delta,
+            'mean_delta': round(total_delta / moved_rows, 2) if moved_rows else 0.0,
+            'max_increase': max([move['delta'] for move in moves if move['delta'] > 0], default=0.0),
+            'max_decrease': min([move['delta'] for move in moves if move['delta'] < 0], default=0.0),
+            'largest_moves': sorted(moves, key=lambda move: abs(move['delta']), reverse=True)[:top],
+        }
+    
+    def _rate_profile(self, spec: Optional[Dict[str, Any]]) -> Tuple[Dict, Dict, str]:
+        """Resolve one side of a rate card comparison.
+        
+        Args:
+            spec: Dict with an optional 'matrix' (a full rate matrix, e.g. an
+                  unpublished one) or 'rate_card' (version of a matrix a
+                  stored job was priced with; default the current one), and
+                  optional 'custom_rates'
+                  
+        Returns:
+            Tuple of (matrix, custom rates, rate card version)
+            
+        Raises:
+            ValueError: If the requested rate card version is unknown
+        """
+        spec = spec or {}
+        custom_rates = spec.get('custom_rates') or {}
+        if spec.get('matrix'):
+            return spec['matrix'], custom_rates, rate_card_hash(spec['matrix'])
+        
+        version = spec.get('rate_card') or self.calculator.rate_card_version
+        if version == self.calculator.rate_card_version:
+            return self.calculator.matrix, custom_rates, version
+        known = self.upload_cache is not None and re.fullmatch(r'[0-9a-f]{16}', str(version))
+        matrix = self.upload_cache.get(f'ratecard.{version}') if known else MISS
+        if matrix is MISS:
+            raise ValueError(f"Unknown rate card version '{version}'")
+        return matrix, custom_rates, version
+    
+    def _batch_moves(self, file_stream=None, file_hash: Optional[str] = None, job_id: Optional[str] = None) -> Tuple[MoveBatch, List[str]]:
+        """Collect the moves of a stored job or an uploaded workbook.
+        
+        Returns:
+            Tuple of (MoveBatch of the rows that can be priced, with
+            distances resolved, and errors of the rows that cannot)
+        """
+        if file_stream is None and not file_hash and job_id:
+            state = self.upload_cache.get(f'job.{self._job_key(job_id)}') if self.upload_cache is not None else MISS
+            if state is MISS or 'rate_card' not in state:
+                raise ValueError(f"No stored results for job '{job_id}'")
+            moves, row_numbers, errors = [], [], []
+            for row_num, fingerprint in sorted(state['rows'].items()):
+                entry = state['results'].get(fingerprint)
+                if entry is None:
+                    errors.append(f"Row {row_num}: not priced in the stored job")
+                else:
+                    moves.append(tuple(entry['arguments']))
+                    row_numbers.append(row_num)
+            return MoveBatch.from_moves(moves, row_numbers), errors
+        
+        df, _, _ = self._load_upload(file_stream, file_hash)
+        batch = MoveBatch.from_frame(df)
+        # One distance resolution serves both rate cards
+        resolved = self._resolve_lanes(batch.lanes_to_resolve())
+        batch = batch.with_distances({lane: resolution['distance_miles'] for lane, resolution in resolved.items()})
+        invalid = ~batch.valid
+        errors = [f"Row {row_num}: {error}" for row_num, error in zip(batch.row_number[invalid], batch.errors[invalid])]
+        return batch.take(batch.valid), errors
+    
+    def compare_rate_cards(
+        self,
+        baseline: Optional[Dict[str, Any]],
+        candidate: Optional[Dict[str, Any]],
+        file_stream=None,
+        file_hash: Optional[str] = None,
+        job_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Price one batch under two rate cards side by side.
+        
+        The batch is parsed and its distances resolved once, then priced
+        under both rate cards in one vectorized pass (see vector_pricing).
+        
+        Args:
+            baseline: Rate profile of the current prices (see _rate_profile)
+            candidate: Rate profile of the proposed prices
+            file_stream: File-like object containing Excel data
+            file_hash: Content hash from validate_excel_file
+            job_id: Stored job to reprice instead of an upload
+            
+        Returns:
+            Dict containing:
+            - success (bool): Overall success status
+            - baseline / candidate (Dict): Rate card versions and custom rates
+            - rows (List[Dict]): Per-row totals under both rate cards and delta
+            - by_lane, by_bracket, by_region (List[Dict]): Aggregate impact,
+              largest absolute change first
+            - errors (List[str]): Rows that could not be priced
+            - summary (Dict): Batch totals and counts of rows up/down/unchanged
+        """
+        try:
+            self.calculator.reload_if_changed()
+            profiles = [self._rate_profile(spec) for spec in (baseline, candidate)]
+            batch, errors = self._batch_moves(file_stream, file_hash, job_id)
+            
+            frame = move_frame(self.calculator, batch)
+            before = price_moves(frame, profiles[0][0], profiles[0][1])
+            after = price_moves(frame, profiles[1][0], profiles[1][1])
+            
+            frame['weight_bracket'] = before['weight_bracket']
+            frame['distance_bracket'] = before['distance_bracket']
+            frame['lane'] = frame['origin'].astype(str) + ' → ' + frame['destination'].astype(str)
+            frame['region'] = frame['origin_region'].astype(str) + ' → ' + frame['destination_region'].astype(str)
+            frame['baseline'] = before['total_should_cost']
+            frame['candidate'] = after['total_should_cost']
+            frame['delta'] = (frame['candidate'] - frame['baseline']).round(2)
+            frame['delta_pct'] = (frame['delta'] / frame['baseline'] * 100).round(2)
+            
+            columns = [
+                'row_number', 'origin', 'destination', 'distance_miles', 'weight_pounds',
+                'weight_bracket', 'distance_bracket', 'origin_region', 'destination_region',
+                'baseline', 'candidate', 'delta', 'delta_pct'
+            ]
+            baseline_total = round(float(frame['baseline'].sum()), 2)
+            candidate_total = round(float(frame['candidate'].sum()), 2)
+            return {
+                'success': True,
+                'baseline': {'rate_card': profiles[0][2], 'custom_rates': profiles[0][1]},
+                'candidate': {'rate_card': profiles[1][2], 'custom_rates': profiles[1][1]},
+                'rows': frame[columns].to_dict('records'),
+                'by_lane': self._impact_by(frame, ['lane']),
+                'by_bracket': self._impact_by(frame, ['weight_bracket', 'distance_bracket']),
+                'by_region': self._impact_by(frame, ['region']),
+                'errors': errors,
+                'summary': {
+                    'rows': len(frame),
+                    'failed': len(errors),
+                    'baseline_total': baseline_total,
+                    'candidate_total': candidate_total,
+                    'delta': round(candidate_total - baseline_total, 2),
+                    'delta_pct': round((candidate_total - baseline_total) / baseline_total * 100, 2) if baseline_total else 0.0,
+                    'rows_up': int((frame['delta'] > 0).sum()),
+                    'rows_down': int((frame['delta'] < 0).sum()),
+                    'rows_unchanged': int((frame['delta'] == 0).sum()),
+                }
+            }
+            
+        except Exception as e:
+            return {
+                'success': False,
+                'rows': [],
+                'errors': [f"Error comparing rate cards: {str(e)}"],
+                'summary': {'rows': 0, 'failed': 0}
+            }
+    
+    @staticmethod
+    def _impact_by(frame: pd.DataFrame, keys: List[str]) -> List[Dict[str, Any]]:
+        """Aggregate comparison totals by ``keys``, largest absolute change first."""
+        if frame.empty:
+            return []
+        groups = frame.groupby(keys, sort=False).agg(
+            moves=('row_number', 'size'),
+            baseline=('baseline', 'sum'),
+            candidate=('candidate', 'sum'),
+            delta=('delta', 'sum'),
+        ).reset_index()
+        groups[['baseline', 'candidate', 'delta']] = groups[['baseline', 'candidate', 'delta']].round(2)
+        groups['delta_pct'] = (groups['delta'] / groups['baseline'] * 100).round(2)
+        order = groups['delta'].abs().sort_values(ascending=False, kind='stable').index
+        return groups.loc[order].to_dict('records')
+    
+    def to_columnar(self, response: Dict[str, Any], page_size: int = PAGE_SIZE) -> Dict[str, Any]:
+        """Switch a process_batch response to columnar results.
+        
+        The batch is stored under a result_id and the response carries its
+        first page (see calculator.columnar); later pages are fetched with
+        results_page. Without an upload cache all rows are returned in one
+        page.
+        
+        Args:
+            response: Output of process_batch
+            page_size: Rows in the first page
+            
+        Returns:
+            Response with columnar 'results' and 'result_id' instead of 'batch'
+        """
+        batch = response['batch']
+        result_id = None
+        if self.upload_cache is not None and batch is not None and len(batch):
+            result_id = uuid.uuid4().hex
+            self.upload_cache.put(f'rows.{result_id}', batch)
+        columnar = {key: value for key, value in response.items() if key != 'batch'}
+        columnar['results'] = encode_batch(
+            batch if batch is not None else MoveBatch.from_results([]), 0, page_size if result_id else None
+        )
+        columnar['result_id'] = result_id
+        return columnar
+    
+    def stored_batch(self, result_id: str) -> Optional[MoveBatch]:
+        """Return the batch stored by to_columnar, or None if unknown or expired."""
+        if self.upload_cache is None or not re.fullmatch(r'[0-9a-f]{32}', result_id or ''):
+            return None
+        batch = self.upload_cache.get(f'rows.{result_id}')
+        return None if batch is MISS else batch
+    
+    def results_page(self, result_id: str, offset: int = 0, limit: int = PAGE_SIZE) -> Optional[Dict[str, Any]]:
+        """Return one columnar page of a stored batch, or None if unknown or expired.
+        
+        Args:
+            result_id: Id returned by to_columnar
+            offset: Index of the first row
+            limit: Rows per page
+        """
+        batch = self.stored_batch(result_id)
+        return None if batch is None else encode_batch(batch, offset, limit)
+    
+    @staticmethod
+    def _export_quote(quote: Dict[str, Any]) -> Dict[str, Any]:
+        """Export columns of a successful row, computed once per distinct quote."""
+        breakdown = quote.get('breakdown', {})
+        
+        # Calculate additional costs (packing + storage + fuel + insurance)
+        packing_cost = breakdown.get('packing_cost', 0)
+        storage_cost = breakdown.get('storage_cost', 0)
+        fuel_charge = breakdown.get('fuel_charge', 0)
+        insurance_cost = breakdown.get('insurance_cost', 0)
+        additional_costs = packing_cost + storage_cost + fuel_charge + insurance_cost
+        
+        # Calculate cost per pound
+        total_cost = quote.get('total_should_cost', 0)
+        weight = quote.get('weight_pounds', 1)  # Avoid division by zero
+        cost_per_lb = total_cost / weight if weight > 0 else 0
+        
+        row = {
+            'Status': 'SUCCESS',
+            'Origin': quote.get('origin'),
+            'Destination': quote.get('destination'),
+            'Distance (miles)': quote.get('distance_miles'),
+            'Weight (lbs)': quote.get('weight_pounds'),
+            'Total Should Cost': total_cost,
+            'Cost per Lb': round(cost_per_lb, 2),
+            'Material Cost': breakdown.get('material_adjusted_cost', 0),
+            'Transportation Cost': breakdown.get('transportation_adjusted_cost', 0),
+            'Tariffs & Taxes': breakdown.get('total_tariffs_and_taxes', 0),
+            'Additional Costs': round(additional_costs, 2),
+            'Packing Cost': packing_cost,
+            'Storage Cost': storage_cost,
+            'Fuel Charge': fuel_charge,
+            'Insurance Cost': insurance_cost,
+            'Origin Region': breakdown.get('origin_region', ''),
+            'Destination Region': breakdown.get('destination_region', ''),
+            'Packing Service': breakdown.get('packing_service', ''),
+            'Storage Option': breakdown.get('storage_option', '')
+        }
+        
+        # Monte Carlo bands, when the batch was priced with an uncertainty spec
+        uncertainty = quote.get('uncertainty')
+        if uncertainty:
+            row['P10 Cost'] = uncertainty['p10']
+            row['P50 Cost'] = uncertainty['p50']
+            row['P90 Cost'] = uncertainty['p90']
+            row['Bracket Crossing Probability'] = uncertainty['bracket_crossing']['any']
+        return row
+    
+    def generate_results_excel(self, results: Union[MoveBatch, List[Dict]]) -> bytes:
         """Generate Excel file with calculation results.
         
         Args:
-            results: List of calculation result dictionaries
+            results: Priced batch (see process_batch), or a list of result
+                     dictionaries in the row format
             
         Returns:
             bytes: Excel file content
         """
-        # Prepare data for Excel export
-        export_data = []
-        
-        for result in results:
-            if result.get('status') == 'failed':
-                export_data.append({
-                    'Row Number': result.get('row_number'),
-                    'Status': 'FAILED',
-                    'Error': result.get('error', 'Unknown error'),
-                    'Origin': result.get('origin', 'N/A'),
-                    'Destination': result.get('destination', 'N/A'),
-                    'Total Should Cost': 0
-                })
-            else:
-                breakdown = result.get('breakdown', {})
-                
-                # Calculate additional costs (packing + storage + fuel + insurance)
-                packing_cost = breakdown.get('packing_cost', 0)
-                storage_cost = breakdown.get('storage_cost', 0)
-                fuel_charge = breakdown.get('fuel_charge', 0)
-                insurance_cost = breakdown.get('insurance_cost', 0)
-                additional_costs = packing_cost + storage_cost + fuel_charge + insurance_cost
-                
-                # Calculate cost per pound
-                total_cost = result.get('total_should_cost', 0)
-                weight = result.get('weight_pounds', 1)  # Avoid division by zero
-                cost_per_lb = total_cost / weight if weight > 0 else 0
-                
-                export_data.append({
-                    'Row Number': result.get('row_number'),
-                    'Status': 'SUCCESS',
-                    'Origin': result.get('origin'),
-                    'Destination': result.get('destination'),
-                    'Distance (miles)': result.get('distance_miles'),
-                    'Weight (lbs)': result.get('weight_pounds'),
-                    'Total Should Cost': total_cost,
-                    'Cost per Lb': round(cost_per_lb, 2),
-                    'Material Cost': breakdown.get('material_adjusted_cost', 0),
-                    'Transportation Cost': breakdown.get('transportation_adjusted_cost', 0),
-                    'Tariffs & Taxes': breakdown.get('total_tariffs_and_taxes', 0),
-                    'Additional Costs': round(additional_costs, 2),
-                    'Packing Cost': packing_cost,
-                    'Storage Cost': storage_cost,
-                    'Fuel Charge': fuel_charge,
-                    'Insurance Cost': insurance_cost,
-                    'Origin Region': breakdown.get('origin_region', ''),
-                    'Destination Region': breakdown.get('destination_region', ''),
-                    'Packing Service': breakdown.get('packing_service', ''),
-                    'Storage Option': breakdown.get('storage_option', '')
-                })
+        batch = results if isinstance(results, MoveBatch) else MoveBatch.from_results(results)
+        quote_index = batch.quote_index.tolist()
+        
+        first_rows: Dict[int, int] = {}
+        for position, quote in enumerate(quote_index):
+            first_rows.setdefault(quote, position)
+        
+        # Export columns are computed once per quote and expanded per row
+        exported = {quote: self._export_quote(batch.quotes[quote]) for quote in first_rows if quote >= 0}
+        failed = {
+            position: {
+                'Status': 'FAILED',
+                'Error': batch.errors[position] or 'Unknown error',
+                'Origin': origin,
+                'Destination': destination,
+                'Total Should Cost': 0
+            }
+            for position, (quote, origin, destination) in enumerate(zip(quote_index, *batch.labels()))
+            if quote < 0
+        }
+        
+        # Columns in order of first appearance, as for a frame built row by row
+        names = {'Row Number': None}
+        for quote, position in first_rows.items():
+            names.update(dict.fromkeys(exported[quote] if quote >= 0 else failed[position]))
+        
+        data = {'Row Number': batch.row_number.tolist()}
+        for name in list(names)[1:]:
+            data[name] = [
+                exported[quote].get(name) if quote >= 0 else failed[position].get(name)
+                for position, quote in enumerate(quote_index)
+            ]
         
         # Create DataFrame
-        df = pd.DataFrame(export_data)
+        df = pd.DataFrame(data)
         
         # Write to Excel in memory
         output = io.BytesIO()
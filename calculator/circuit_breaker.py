@@ -0,0 +1,137 @@
+"""Circuit breaker for external distance providers.
+
+After repeated failures, or a single status that means every following
+call will fail too (e.g. OVER_QUERY_LIMIT), the breaker opens and callers
+skip the provider and go straight to their fallback. Once the cool-down has
+passed, one probe request is let through: success closes the breaker, and
+failure opens it for another cool-down.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, Optional
+
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+# Google statuses that will not clear up by retrying the next request
+DEFAULT_TRIP_STATUSES = ('OVER_QUERY_LIMIT', 'OVER_DAILY_LIMIT', 'REQUEST_DENIED')
+
+# Number of recent trip events kept for metrics
+TRIP_HISTORY_SIZE = 20
+
+
+class CircuitBreaker:
+    """Thread-safe closed/open/half-open circuit breaker."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        cooldown_seconds: float = 60.0,
+        trip_statuses: Iterable[str] = DEFAULT_TRIP_STATUSES
+    ):
+        """Initialize a closed breaker.
+
+        Args:
+            name: Provider name used in log messages
+            failure_threshold: Consecutive failures that open the breaker
+            cooldown_seconds: Time the breaker stays open before a probe
+            trip_statuses: Failure statuses that open the breaker immediately
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.trip_statuses = frozenset(trip_statuses)
+
+        self._lock = threading.Lock()
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.trips = 0
+        self.short_circuited = 0
+        self.recoveries = 0
+        self._events = deque(maxlen=TRIP_HISTORY_SIZE)
+
+    def allow_request(self) -> bool:
+        """Decide whether a request may be sent to the provider.
+
+        Returns:
+            True while closed, and for the single recovery probe after the
+            cool-down; False while open
+        """
+        with self._lock:
+            if self.state == STATE_CLOSED:
+                return True
+            if self.state == STATE_OPEN and time.monotonic() - self._opened_at >= self.cooldown_seconds:
+                self.state = STATE_HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == STATE_HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.short_circuited += 1
+            return False
+
+    def cancel_request(self):
+        """Hand back a permitted request that was never sent (frees the probe slot)."""
+        with self._lock:
+            if self.state == STATE_HALF_OPEN:
+                self._probe_in_flight = False
+
+    def record_success(self):
+        """Record a successful request, closing the breaker if it was probing."""
+        with self._lock:
+            if self.state != STATE_CLOSED:
+                self.recoveries += 1
+                self._events.append({'at': time.time(), 'event': 'closed', 'reason': 'probe succeeded'})
+                print(f"{self.name} circuit closed: probe succeeded")
+            self.state = STATE_CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self, status: Optional[str] = None):
+        """Record a failed request.
+
+        Args:
+            status: Provider or transport status describing the failure
+        """
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == STATE_OPEN:
+                # A request sent before the breaker opened
+                return
+            if self.state == STATE_HALF_OPEN:
+                self._trip(f'probe failed ({status})')
+            elif status in self.trip_statuses:
+                self._trip(status)
+            elif self.state == STATE_CLOSED and self.consecutive_failures >= self.failure_threshold:
+                self._trip(f'{self.consecutive_failures} consecutive failures ({status})')
+
+    def _trip(self, reason: str):
+        """Open the breaker (caller holds the lock)."""
+        self.state = STATE_OPEN
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+        self.trips += 1
+        self._events.append({'at': time.time(), 'event': 'opened', 'reason': reason})
+        print(f"{self.name} circuit opened for {self.cooldown_seconds:.0f}s: {reason}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return current state, counters and recent trip events."""
+        with self._lock:
+            retry_in = 0.0
+            if self.state == STATE_OPEN:
+                retry_in = max(0.0, self.cooldown_seconds - (time.monotonic() - self._opened_at))
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'trips': self.trips,
+                'recoveries': self.recoveries,
+                'short_circuited': self.short_circuited,
+                'retry_in_seconds': round(retry_in, 1),
+                'events': list(self._events),
+            }
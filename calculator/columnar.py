@@ -0,0 +1,239 @@
+"""Compact columnar JSON encoding of bulk results.
+
+Each bulk result is an object with a nested ``breakdown`` of about fifty
+fields, so a 50k row response repeats every key 50k times and the same
+few label strings (brackets, regions, move descriptions) in every row.
+The columnar form sends one header and one array per field instead::
+
+    {
+        'format': 'columnar',
+        'columns': ['row_number', 'status', ..., 'breakdown.transportation_weight_bracket', ...],
+        'data': [[2, 3, ...], None, ..., [1, 0, ...], ...],
+        'dictionaries': {'breakdown.transportation_weight_bracket': ['1,001-2,000 lbs', ...], ...},
+        'constants': {'status': 'success', ...},
+        'aliases': {'breakdown.state_tax': 'breakdown.state_sales_tax', ...},
+        'offset': 0,
+        'limit': 1000,
+        'rows': 1000,
+        'total_rows': 50000
+    }
+
+Nested objects are flattened one level into dotted column names. A field
+a row does not have is null. Columns are encoded in the first way that
+applies:
+
+- the same value in every row: the value is in 'constants',
+- the same values as an earlier column: 'aliases' names that column,
+- strings, or few distinct values: the array holds indexes into the
+  column's entry in 'dictionaries',
+- otherwise the array holds the values.
+
+'data' holds null for constant and aliased columns. Every page is
+self-contained, so rows can be fetched page by page.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from .move_batch import MoveBatch
+
+
+# Largest dictionary for a column that is not all strings
+MAX_DICTIONARY_LABELS = 256
+
+
+def _flatten(key: str, nested: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a nested object of a result into dotted keys."""
+    return {f'{key}.{field}': value for field, value in nested.items()}
+
+
+def encode_results(results: List[Dict[str, Any]], offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+    """Encode a page of bulk results as columns.
+
+    Args:
+        results: Result dicts of process_bulk_calculations
+        offset: Index of the first row of the page
+        limit: Rows per page (None for all remaining rows)
+
+    Returns:
+        Columnar payload (see module docstring)
+    """
+    offset = max(0, offset)
+    page = results[offset:] if limit is None else results[offset:offset + max(0, limit)]
+
+    # Rows fanned out from one priced quote share their nested objects
+    flattened: Dict[int, Dict[str, Any]] = {}
+    rows = []
+    for result in page:
+        flat = {}
+        for key, value in result.items():
+            if isinstance(value, dict):
+                nested = flattened.get(id(value))
+                if nested is None:
+                    nested = flattened[id(value)] = _flatten(key, value)
+                flat.update(nested)
+            else:
+                flat[key] = value
+        rows.append(flat)
+
+    columns: Dict[str, None] = {}
+    for row in rows:
+        for name in row:
+            columns.setdefault(name)
+
+    return _encode_columns(
+        {name: [row.get(name) for row in rows] for name in columns},
+        offset, limit, len(rows), len(results)
+    )
+
+
+def encode_batch(batch: MoveBatch, offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+    """Encode a page of a priced MoveBatch as columns.
+
+    Gives the same payload as encoding the batch's result_rows, but reads
+    the columns straight from the batch: each quote the page uses is
+    flattened once and expanded by quote_index.
+
+    Args:
+        batch: Batch returned by BulkProcessor.process_batch
+        offset: Index of the first row of the page
+        limit: Rows per page (None for all remaining rows)
+
+    Returns:
+        Columnar payload (see module docstring)
+    """
+    offset = max(0, offset)
+    end = len(batch) if limit is None else min(len(batch), offset + max(0, limit))
+    quote_index = batch.quote_index[offset:end].tolist()
+
+    flattened: Dict[int, Dict[str, Any]] = {}
+    for quote in quote_index:
+        if quote >= 0 and quote not in flattened:
+            flat = {}
+            for key, value in batch.quotes[quote].items():
+                if isinstance(value, dict):
+                    flat.update(_flatten(key, value))
+                else:
+                    flat[key] = value
+            flattened[quote] = flat
+
+    columns: Dict[str, None] = {}
+    for flat in flattened.values():
+        for name in flat:
+            columns.setdefault(name)
+
+    data = {name: [flattened[quote].get(name) if quote >= 0 else None for quote in quote_index] for name in columns}
+    failed = [index for index, quote in enumerate(quote_index) if quote < 0]
+    if failed:
+        # Failed rows report their labels and a zero total
+        origins, destinations = batch.labels()
+        for name, values in (('origin', origins), ('destination', destinations)):
+            column = data.setdefault(name, [None] * len(quote_index))
+            for index in failed:
+                column[index] = values[offset + index]
+        totals = data.setdefault('total_should_cost', [None] * len(quote_index))
+        for index in failed:
+            totals[index] = 0
+
+    data['row_number'] = batch.row_number[offset:end].tolist()
+    data['status'] = ['success' if quote >= 0 else 'failed' for quote in quote_index]
+    if failed:
+        data['error'] = [None] * len(quote_index)
+        for index in failed:
+            data['error'][index] = batch.errors[offset + index]
+
+    return _encode_columns(data, offset, limit, len(quote_index), len(batch))
+
+
+def _encode_columns(
+    columns: Dict[str, list], offset: int, limit: Optional[int], count: int, total_rows: int
+) -> Dict[str, Any]:
+    """Encode named value arrays of one page (see module docstring)."""
+    data: List[Optional[list]] = []
+    dictionaries: Dict[str, list] = {}
+    constants: Dict[str, Any] = {}
+    aliases: Dict[str, str] = {}
+    encoded: Dict[Tuple, str] = {}
+    for name, values in columns.items():
+        # Types are part of every comparison so that True, 1 and 1.0 stay apart
+        types = tuple(type(value) for value in values)
+        try:
+            signature = (tuple(values), types)
+            distinct = {(type(value), value): None for value in values}
+        except TypeError:
+            # Unhashable (nested) values are sent as they are
+            data.append(values)
+            continue
+
+        if len(distinct) == 1 and values[0] is not None:
+            constants[name] = values[0]
+            data.append(None)
+        elif signature in encoded:
+            aliases[name] = encoded[signature]
+            data.append(None)
+        else:
+            encoded[signature] = name
+            labels = [value for _, value in distinct if value is not None]
+            if labels and (
+                all(isinstance(value, str) for value in labels)
+                or (len(labels) <= MAX_DICTIONARY_LABELS and len(labels) * 4 <= len(values))
+            ):
+                codes = {(type(value), value): code for code, value in enumerate(labels)}
+                values = [None if value is None else codes[(type(value), value)] for value in values]
+                dictionaries[name] = labels
+            data.append(values)
+
+    return {
+        'format': 'columnar',
+        'columns': list(columns),
+        'data': data,
+        'dictionaries': dictionaries,
+        'constants': constants,
+        'aliases': aliases,
+        'offset': offset,
+        'limit': limit,
+        'rows': count,
+        'total_rows': total_rows,
+    }
+
+
+def decode_results(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Rebuild result dicts from a columnar page (nulls are left out).
+
+    Args:
+        payload: Output of encode_results
+
+    Returns:
+        List of result dicts with their nested objects restored
+    """
+    dictionaries = payload.get('dictionaries', {})
+    constants = payload.get('constants', {})
+    aliases = payload.get('aliases', {})
+    count = payload['rows']
+
+    decoded: Dict[str, list] = {}
+    columns = []
+    for name, values in zip(payload['columns'], payload['data']):
+        if name in constants:
+            values = [constants[name]] * count
+        elif name in aliases:
+            values = decoded[aliases[name]]
+        elif name in dictionaries:
+            labels = dictionaries[name]
+            values = [None if code is None else labels[code] for code in values]
+        decoded[name] = values
+        key, _, field = name.partition('.')
+        columns.append((key, field, values))
+
+    results = []
+    for position in range(count):
+        result: Dict[str, Any] = {}
+        for key, field, values in columns:
+            value = values[position]
+            if value is None:
+                continue
+            if field:
+                result.setdefault(key, {})[field] = value
+            else:
+                result[key] = value
+        results.append(result)
+    return results
@@ -1,13 +1,74 @@
 """Core cost calculation engine for household goods moves."""
 
+import hashlib
 import json
-from typing import Dict, Tuple
+import os
+import time
+from typing import Any, Dict, FrozenSet, Set, Tuple
 from pathlib import Path
 
+from .uncertainty import simulate_quote
+
+
+def rate_card_hash(rates: Dict) -> str:
+    """Return a short content hash of a rate matrix or rate override dict.
+    
+    Args:
+        rates: JSON-serializable rate data
+        
+    Returns:
+        16 hex characters that change whenever any rate changes
+    """
+    canonical = json.dumps(rates, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+def changed_rate_paths(old: Any, new: Any, path: Tuple = ()) -> Set[Tuple]:
+    """Return the paths of the rate card elements that differ between two matrices.
+    
+    Paths are tuples of keys and list indexes, e.g.
+    ('transportation_matrix', 'rates', 2, 1) or
+    ('tariffs', 'state_specific_taxes', 'CA'). A list whose length changed
+    is reported as a whole.
+    
+    Args:
+        old: Previous rate matrix (or a part of it)
+        new: Current rate matrix (or a part of it)
+        path: Path of ``old``/``new`` within the matrix
+        
+    Returns:
+        Set of changed paths
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        changed = set()
+        for key in old.keys() | new.keys():
+            if key not in old or key not in new:
+                changed.add(path + (key,))
+            else:
+                changed |= changed_rate_paths(old[key], new[key], path + (key,))
+        return changed
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        changed = set()
+        for idx, (old_item, new_item) in enumerate(zip(old, new)):
+            changed |= changed_rate_paths(old_item, new_item, path + (idx,))
+        return changed
+    return set() if old == new else {path}
+
+
+def format_rate_path(path: Tuple) -> str:
+    """Render a rate card path as e.g. 'transportation_matrix.rates[2][1]'."""
+    text = ''
+    for part in path:
+        text += f'[{part}]' if isinstance(part, int) else (f'.{part}' if text else str(part))
+    return text
+
 
 class HouseholdGoodsCostCalculator:
     """Calculate should cost estimates for household goods moves."""
 
+    # Minimum seconds between checks of the matrix file for changes
+    RELOAD_CHECK_INTERVAL = 5.0
+
     def __init__(self, matrix_file: str = None):
         """Initialize calculator with household goods matrix data.
         
@@ -17,8 +78,42 @@ class HouseholdGoodsCostCalculator:
         if matrix_file is None:
             matrix_file = Path(__file__).parent.parent / "data" / "household_goods_matrix.json"
         
-        with open(matrix_file, 'r') as f:
+        self.matrix_file = Path(matrix_file)
+        self._last_reload_check = 0.0
+        self.load_matrix()
+    
+    def load_matrix(self):
+        """(Re)load the rate matrix and recompute its version hash."""
+        mtime = os.stat(self.matrix_file).st_mtime
+        with open(self.matrix_file, 'r') as f:
             self.matrix = json.load(f)
+        self._matrix_mtime = mtime
+        self.rate_card_version = rate_card_hash(self.matrix)
+    
+    def reload_if_changed(self) -> bool:
+        """Reload the rate matrix if its file changed since it was loaded.
+        
+        The file is checked at most every RELOAD_CHECK_INTERVAL seconds, so
+        this is cheap enough to call on every request.
+        
+        Returns:
+            True if the matrix was reloaded
+        """
+        now = time.monotonic()
+        if now - self._last_reload_check < self.RELOAD_CHECK_INTERVAL:
+            return False
+        self._last_reload_check = now
+        try:
+            if os.stat(self.matrix_file).st_mtime == self._matrix_mtime:
+                return False
+            previous = self.rate_card_version
+            self.load_matrix()
+        except (OSError, ValueError) as e:
+            print(f"Keeping current rate matrix; reload failed: {e}")
+            return False
+        if self.rate_card_version != previous:
+            print(f"Rate matrix reloaded (version {self.rate_card_version})")
+        return True
     
     def _get_tier_adjustment(self, value: float, tiers: list) -> float:
         """Get rate adjustment based on tier thresholds.
@@ -139,7 +234,7 @@ class HouseholdGoodsCostCalculator:
         
         return 'default'
     
-    def calculate_should_cost(
+    def rate_elements(
         self,
         origin: str,
         destination: str,
@@ -149,6 +244,70 @@ class HouseholdGoodsCostCalculator:
         storage_option: str = 'no_storage',
         include_insurance: bool = True,
         custom_rates: Dict = None
+    ) -> FrozenSet[Tuple]:
+        """Return the rate card elements a calculate_should_cost result depends on.
+        
+        Takes the same arguments as calculate_should_cost. Elements are paths
+        in the rate matrix (see changed_rate_paths); rates replaced by a
+        custom override are not dependencies. Bracket and tier boundaries are
+        dependencies as a whole, since moving one boundary can move a quote
+        into another bracket.
+        
+        Returns:
+            Frozen set of rate card paths
+        """
+        if custom_rates is None:
+            custom_rates = {}
+        matrix = self.matrix.get('transportation_matrix', {})
+        
+        weight_idx = next((idx for idx, bracket in enumerate(matrix['weight_brackets'])
+                           if bracket['min'] <= weight_pounds <= bracket['max']), 0)
+        distance_idx = next((idx for idx, bracket in enumerate(matrix['distance_brackets'])
+                             if bracket['min'] <= distance_miles <= bracket['max']), 0)
+        
+        elements = {
+            ('base_rate_per_pound',),
+            ('weight_tiers',),
+            ('transportation_matrix', 'weight_brackets'),
+            ('transportation_matrix', 'distance_brackets'),
+            ('transportation_matrix', 'rates', weight_idx, distance_idx),
+            ('regional_adjustments', self._determine_region(origin)),
+            ('regional_adjustments', self._determine_region(destination)),
+            ('tariffs', 'enable_interstate_tariffs'),
+        }
+        
+        overridable = [
+            (packing_service, ('service_multipliers', packing_service)),
+            (storage_option, ('service_multipliers', storage_option)),
+            ('fuel_surcharge', ('fuel_surcharge',)),
+            ('minimum_charge', ('minimum_charge',)),
+        ]
+        if include_insurance:
+            overridable.append(('insurance_per_1000', ('insurance_rate_per_1000',)))
+        
+        origin_state = self._extract_state_code(origin)
+        dest_state = self._extract_state_code(destination)
+        if origin_state and dest_state:
+            tariff = 'interstate_tariff_rate' if origin_state != dest_state else 'intrastate_tariff_rate'
+            overridable.append((tariff, ('tariffs', tariff)))
+        if dest_state:
+            # Also a dependency when the state has no tax yet: adding one moves the quote
+            overridable.append((f'state_tax_{dest_state}', ('tariffs', 'state_specific_taxes', dest_state)))
+        
+        elements.update(element for override, element in overridable if override not in custom_rates)
+        return frozenset(elements)
+    
+    def calculate_should_cost(
+        self,
+        origin: str,
+        destination: str,
+        distance_miles: float,
+        weight_pounds: float,
+        packing_service: str = 'self_pack',
+        storage_option: str = 'no_storage',
+        include_insurance: bool = True,
+        custom_rates: Dict = None,
+        uncertainty: Dict = None
     ) -> Dict:
         """Calculate the should cost for a household goods move.
         
@@ -161,6 +320,10 @@ class HouseholdGoodsCostCalculator:
             storage_option: Storage option ('no_storage', 'storage_30days', 'storage_60days')
             include_insurance: Whether to include insurance in calculation
             custom_rates: Optional dictionary of custom rate overrides
+            uncertainty: Optional Monte Carlo spec for estimated weight and
+                         distance (see calculator.uncertainty; may name the
+                         'distance_source'). Adds P10/P50/P90 totals and
+                         bracket-crossing probabilities as 'uncertainty'.
             
         Returns:
             Dictionary containing cost breakdown and total
@@ -311,7 +474,7 @@ class HouseholdGoodsCostCalculator:
         elif tariff_type == 'intrastate' and dest_state:
             tariff_description = f'Intrastate ({dest_state})'
         
-        return {
+        result = {
             'origin': origin,
             'destination': destination,
             'distance_miles': distance_miles,
@@ -375,3 +538,12 @@ class HouseholdGoodsCostCalculator:
             },
             'total_should_cost': round(total_cost, 2)
         }
+        
+        if uncertainty:
+            result['uncertainty'] = simulate_quote(
+                self,
+                (origin, destination, distance_miles, weight_pounds, packing_service, storage_option, include_insurance),
+                uncertainty,
+                custom_rates
+            )
+        return result
@@ -0,0 +1,553 @@
+"""Persistent SQLite-backed cache for geocodes and lane distances."""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .location_canonicalizer import canonicalize_location
+from .shared_cache import DEFAULT_LOCAL_ENTRIES, DEFAULT_LOCAL_TTL_SECONDS, TieredCache
+
+
+# Sentinel returned when a key is not cached (None is a cached "not found")
+CACHE_MISS = object()
+
+# Columns exported to and imported from warm-up snapshots, per table
+SNAPSHOT_COLUMNS = {
+    'geocodes': ('location', 'latitude', 'longitude', 'found', 'created_at', 'expires_at', 'last_access', 'hits'),
+    'distances': (
+        'origin', 'destination', 'provider', 'distance_miles', 'found',
+        'created_at', 'expires_at', 'last_access', 'hits'
+    ),
+}
+
+
+def normalize_cache_key(location: str) -> str:
+    """Normalize a location string for use as a cache key.
+
+    Equivalent spellings ("Austin, Texas", "austin tx") map to the same key.
+
+    Args:
+        location: Location string as entered by the user
+
+    Returns:
+        Lower-cased canonical location
+    """
+    return canonicalize_location(location).lower()
+
+
+class DistanceCache:
+    """On-disk cache of geocodes and lane distances shared by all workers.
+
+    Entries expire after a TTL, failed lookups are cached with a shorter
+    negative TTL, and each table is bounded by evicting the least recently
+    used rows. The database runs in WAL mode and every thread opens its own
+    connection, so the cache can be shared by gunicorn worker processes and
+    waitress threads at the same time.
+
+    Lookups go through a TieredCache in front of the database: each process
+    keeps recently used entries in an in-process LRU tier so hot lanes skip
+    SQLite entirely, and with a shared store (see
+    shared_cache.open_shared_store, e.g. Redis via SHARED_CACHE_URL) entries
+    resolved on one host are hits for every other host. The database stays
+    the durable tier that holds lane popularity for warm-up and snapshots;
+    hits served from the other tiers update its hit counts and access times
+    in batches.
+    """
+
+    DEFAULT_PATH = Path(__file__).parent.parent / "data" / "distance_cache.sqlite3"
+    DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+    DEFAULT_NEGATIVE_TTL_SECONDS = 6 * 3600
+    DEFAULT_MAX_ENTRIES = 200000
+
+    # How many writes between eviction sweeps
+    EVICTION_INTERVAL = 256
+
+    # How many in-process hits are recorded in the database at once
+    TOUCH_FLUSH_INTERVAL = 256
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        negative_ttl_seconds: float = DEFAULT_NEGATIVE_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        local_entries: int = DEFAULT_LOCAL_ENTRIES,
+        local_ttl_seconds: float = DEFAULT_LOCAL_TTL_SECONDS,
+        store=None
+    ):
+        """Initialize the cache, creating the database if needed.
+
+        Args:
+            path: SQLite database path. Defaults to the DISTANCE_CACHE_PATH
+                  env var, then data/distance_cache.sqlite3.
+            ttl_seconds: Lifetime of successful lookups
+            negative_ttl_seconds: Lifetime of failed (not found) lookups
+            max_entries: Maximum rows kept per table before LRU eviction
+            local_entries: Size of the in-process tier (0 disables it)
+            local_ttl_seconds: Longest time an in-process entry is served
+                               before re-reading the shared tiers
+            store: Optional shared store (see shared_cache.open_shared_store)
+                   consulted before the database
+        """
+        self.path = str(path or os.environ.get('DISTANCE_CACHE_PATH') or self.DEFAULT_PATH)
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_entries = max_entries
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes_since_eviction = 0
+        self.shared = TieredCache(
+            store,
+            'distance',
+            ttl_seconds=ttl_seconds,
+            local_entries=local_entries,
+            local_ttl_seconds=local_ttl_seconds
+        )
+        self.local = self.shared.local
+        self._pending_touches: Dict[tuple, int] = {}
+        self._counters = {
+            'geocode_hits': 0,
+            'geocode_local_hits': 0,
+            'geocode_store_hits': 0,
+            'geocode_negative_hits': 0,
+            'geocode_misses': 0,
+            'distance_hits': 0,
+            'distance_local_hits': 0,
+            'distance_store_hits': 0,
+            'distance_negative_hits': 0,
+            'distance_misses': 0,
+            'writes': 0,
+            'evictions': 0,
+        }
+
+        self._create_schema()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening one if needed."""
+        conn = getattr(self._local, 'conn', None)
+        # A connection inherited across fork() must not be reused
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _create_schema(self):
+        """Create cache tables if they do not exist."""
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connection()
+        with conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS geocodes (
+                    location TEXT PRIMARY KEY,
+                    latitude REAL,
+                    longitude REAL,
+                    found INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS distances (
+                    origin TEXT NOT NULL,
+                    destination TEXT NOT NULL,
+                    provider TEXT NOT NULL,
+                    distance_miles REAL,
+                    found INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (origin, destination, provider)
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_geocodes_access ON geocodes (last_access)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_distances_access ON distances (last_access)')
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _expiry(self, found: bool, now: float) -> float:
+        return now + (self.ttl_seconds if found else self.negative_ttl_seconds)
+
+    @staticmethod
+    def _tier_key(entry: tuple) -> str:
+        """Key of a database entry (table plus primary key) in the tiered cache."""
+        return json.dumps(entry, separators=(',', ':'))
+
+    def _tiered(self, entry: tuple) -> Any:
+        """Look an entry up in the in-process tier and the shared store.
+
+        Returns:
+            The cached value, or CACHE_MISS if the database has to be read
+        """
+        value, tier = self.shared.lookup(self._tier_key(entry), CACHE_MISS)
+        if tier is not None:
+            kind = 'geocode' if entry[0] == 'geocodes' else 'distance'
+            self._count(f'{kind}_local_hits' if tier == 'local' else f'{kind}_store_hits')
+            self._defer_touch(entry)
+        return value
+
+    def _share(self, entry: tuple, value: Any, expires_at: float, now: float):
+        """Put an entry into the in-process tier and the shared store until it expires."""
+        self.shared.set(self._tier_key(entry), value, ttl_seconds=expires_at - now)
+
+    def get_geocode(self, location: str) -> Any:
+        """Look up cached coordinates for a location.
+
+        Args:
+            location: Location string
+
+        Returns:
+            (latitude, longitude) tuple, None for a cached failed lookup,
+            or CACHE_MISS if the location is not cached or has expired
+        """
+        key = normalize_cache_key(location)
+        coords = self._tiered(('geocodes', key))
+        if coords is not CACHE_MISS:
+            coords = tuple(coords) if coords is not None else None
+        else:
+            now = time.time()
+            conn = self._connection()
+            row = conn.execute(
+                'SELECT latitude, longitude, found, expires_at FROM geocodes WHERE location = ? AND expires_at > ?',
+                (key, now)
+            ).fetchone()
+
+            if row is None:
+                self._count('geocode_misses')
+                return CACHE_MISS
+
+            self._touch(conn, 'UPDATE geocodes SET hits = hits + 1, last_access = ? WHERE location = ?', (now, key))
+            coords = (row[0], row[1]) if row[2] else None
+            self._share(('geocodes', key), coords, row[3], now)
+
+        if coords is None:
+            self._count('geocode_negative_hits')
+            return None
+
+        self._count('geocode_hits')
+        return coords
+
+    def set_geocode(self, location: str, coords: Optional[Tuple[float, float]]):
+        """Store coordinates (or a failed lookup) for a location.
+
+        Args:
+            location: Location string
+            coords: (latitude, longitude) tuple, or None if not found
+        """
+        key = normalize_cache_key(location)
+        now = time.time()
+        found = coords is not None
+        latitude, longitude = coords if found else (None, None)
+        expires_at = self._expiry(found, now)
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                '''INSERT OR REPLACE INTO geocodes
+                   (location, latitude, longitude, found, created_at, expires_at, last_access, hits)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, 0)''',
+                (key, latitude, longitude, int(found), now, expires_at, now)
+            )
+        self._share(('geocodes', key), (latitude, longitude) if found else None, expires_at, now)
+        self._after_write()
+
+    def get_distance(self, origin: str, destination: str, provider: str) -> Any:
+        """Look up a cached lane distance for a provider.
+
+        Args:
+            origin: Origin location string
+            destination: Destination location string
+            provider: Distance provider (e.g. 'google_driving', 'geodesic')
+
+        Returns:
+            Distance in miles, None for a cached failed lookup, or
+            CACHE_MISS if the lane is not cached or has expired
+        """
+        key = (normalize_cache_key(origin), normalize_cache_key(destination), provider)
+        miles = self._tiered(('distances',) + key)
+        if miles is CACHE_MISS:
+            now = time.time()
+            conn = self._connection()
+            row = conn.execute(
+                '''SELECT distance_miles, found, expires_at FROM distances
+                   WHERE origin = ? AND destination = ? AND provider = ? AND expires_at > ?''',
+                key + (now,)
+            ).fetchone()
+
+            if row is None:
+                self._count('distance_misses')
+                return CACHE_MISS
+
+            self._touch(
+                conn,
+                '''UPDATE distances SET hits = hits + 1, last_access = ?
+                   WHERE origin = ? AND destination = ? AND provider = ?''',
+                (now,) + key
+            )
+            miles = row[0] if row[1] else None
+            self._share(('distances',) + key, miles, row[2], now)
+
+        if miles is None:
+            self._count('distance_negative_hits')
+            return None
+
+        self._count('distance_hits')
+        return miles
+
+    def set_distance(self, origin: str, destination: str, provider: str, distance_miles: Optional[float]):
+        """Store a lane distance (or a failed lookup) for a provider.
+
+        Args:
+            origin: Origin location string
+            destination: Destination location string
+            provider: Distance provider (e.g. 'google_driving', 'geodesic')
+            distance_miles: Distance in miles, or None if the lookup failed
+        """
+        now = time.time()
+        found = distance_miles is not None
+        key = (normalize_cache_key(origin), normalize_cache_key(destination), provider)
+        expires_at = self._expiry(found, now)
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                '''INSERT OR REPLACE INTO distances
+                   (origin, destination, provider, distance_miles, found,
+                    created_at, expires_at, last_access, hits)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)''',
+                key + (distance_miles, int(found), now, expires_at, now)
+            )
+        self._share(('distances',) + key, distance_miles, expires_at, now)
+        self._after_write()
+
+    def _touch(self, conn: sqlite3.Connection, sql: str, params: tuple):
+        """Record an access; skipped if another writer holds the lock."""
+        try:
+            with conn:
+                conn.execute(sql, params)
+        except sqlite3.OperationalError:
+            pass
+
+    def _defer_touch(self, entry: tuple):
+        """Queue an access served by the in-process tier or shared store for the database hit counts."""
+        with self._lock:
+            self._pending_touches[entry] = self._pending_touches.get(entry, 0) + 1
+            due = len(self._pending_touches) >= self.TOUCH_FLUSH_INTERVAL
+        if due:
+            self.flush_touches()
+
+    def flush_touches(self):
+        """Record queued in-process hits in the database (hits and last access)."""
+        with self._lock:
+            pending, self._pending_touches = self._pending_touches, {}
+        if not pending:
+            return
+        now = time.time()
+        geocodes = [(hits, now, entry[1]) for entry, hits in pending.items() if entry[0] == 'geocodes']
+        distances = [(hits, now) + entry[1:] for entry, hits in pending.items() if entry[0] == 'distances']
+        conn = self._connection()
+        try:
+            with conn:
+                conn.executemany(
+                    'UPDATE geocodes SET hits = hits + ?, last_access = ? WHERE location = ?', geocodes
+                )
+                conn.executemany(
+                    '''UPDATE distances SET hits = hits + ?, last_access = ?
+                       WHERE origin = ? AND destination = ? AND provider = ?''',
+                    distances
+                )
+        except sqlite3.OperationalError:
+            pass
+
+    def _after_write(self):
+        with self._lock:
+            self._counters['writes'] += 1
+            self._writes_since_eviction += 1
+            due = self._writes_since_eviction >= self.EVICTION_INTERVAL
+            if due:
+                self._writes_since_eviction = 0
+        if due:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop expired rows and trim each table to max_entries (LRU).
+
+        Returns:
+            Number of rows removed
+        """
+        self.flush_touches()
+        now = time.time()
+        removed = 0
+        conn = self._connection()
+        with conn:
+            for table in ('geocodes', 'distances'):
+                removed += conn.execute(f'DELETE FROM {table} WHERE expires_at <= ?', (now,)).rowcount
+                count = conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                excess = count - self.max_entries
+                if excess > 0:
+                    removed += conn.execute(
+                        f'''DELETE FROM {table} WHERE rowid IN (
+                               SELECT rowid FROM {table} ORDER BY last_access ASC LIMIT ?
+                           )''',
+                        (excess,)
+                    ).rowcount
+        self._count('evictions', removed)
+        if removed:
+            self.local.clear()
+        return removed
+
+    def iter_distances(self, provider: str) -> Iterator[Tuple[str, str, float]]:
+        """Iterate over live, successful lane distances for a provider.
+
+        Reads do not count as hits, so this is safe for offline analysis
+        such as calibrating the road-distance estimator.
+
+        Args:
+            provider: Distance provider (e.g. 'google_driving')
+
+        Yields:
+            (origin_key, destination_key, distance_miles) tuples
+        """
+        conn = self._connection()
+        cursor = conn.execute(
+            '''SELECT origin, destination, distance_miles FROM distances
+               WHERE provider = ? AND found = 1 AND expires_at > ?''',
+            (provider, time.time())
+        )
+        for row in cursor:
+            yield row
+
+    def peek_geocode(self, location: str) -> Optional[Tuple[float, float]]:
+        """Return cached coordinates without touching counters or access times.
+
+        Args:
+            location: Location string
+
+        Returns:
+            (latitude, longitude) or None if not cached as found
+        """
+        row = self._connection().execute(
+            'SELECT latitude, longitude FROM geocodes WHERE location = ? AND found = 1 AND expires_at > ?',
+            (normalize_cache_key(location), time.time())
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def top_lanes(self, provider: str, limit: int, since: float = 0.0) -> List[Tuple[str, str]]:
+        """Return the most frequently hit lanes for a provider.
+
+        Args:
+            provider: Distance provider (e.g. 'google_driving')
+            limit: Maximum number of lanes
+            since: Only lanes accessed at or after this Unix time
+
+        Returns:
+            (origin_key, destination_key) tuples, most hits first
+        """
+        self.flush_touches()
+        rows = self._connection().execute(
+            '''SELECT origin, destination FROM distances
+               WHERE provider = ? AND found = 1 AND last_access >= ?
+               ORDER BY hits DESC, last_access DESC LIMIT ?''',
+            (provider, since, limit)
+        ).fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+    def export_entries(self, limit: int) -> Dict[str, List[list]]:
+        """Export the most frequently hit live rows of each table.
+
+        Args:
+            limit: Maximum rows per table
+
+        Returns:
+            Dict with 'geocodes' and 'distances' lists of raw rows, in the
+            column order expected by import_entries
+        """
+        self.flush_touches()
+        conn = self._connection()
+        now = time.time()
+        entries = {}
+        for table, columns in SNAPSHOT_COLUMNS.items():
+            rows = conn.execute(
+                f'''SELECT {', '.join(columns)} FROM {table} WHERE expires_at > ?
+                    ORDER BY hits DESC, last_access DESC LIMIT ?''',
+                (now, limit)
+            ).fetchall()
+            entries[table] = [list(row) for row in rows]
+        return entries
+
+    def import_entries(self, entries: Dict[str, List[list]]) -> Dict[str, int]:
+        """Load rows exported by export_entries, e.g. from a snapshot.
+
+        Rows already in the cache are kept (they are at least as fresh), and
+        rows that have expired since the export are skipped.
+
+        Args:
+            entries: Dict with 'geocodes' and/or 'distances' row lists
+
+        Returns:
+            Number of rows inserted per table
+        """
+        now = time.time()
+        inserted = {}
+        conn = self._connection()
+        with conn:
+            for table, columns in SNAPSHOT_COLUMNS.items():
+                expires = columns.index('expires_at')
+                rows = [row for row in entries.get(table, []) if len(row) == len(columns) and row[expires] > now]
+                before = conn.total_changes
+                conn.executemany(
+                    f'''INSERT OR IGNORE INTO {table} ({', '.join(columns)})
+                        VALUES ({', '.join('?' * len(columns))})''',
+                    rows
+                )
+                inserted[table] = conn.total_changes - before
+        self._after_write()
+        return inserted
+
+    def clear(self):
+        """Remove all cached entries."""
+        conn = self._connection()
+        with conn:
+            conn.execute('DELETE FROM geocodes')
+            conn.execute('DELETE FROM distances')
+        self.local.clear()
+        with self._lock:
+            self._pending_touches.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for this process and current table sizes.
+
+        Returns:
+            Dict of counters (hits include in-process tier and shared store
+            hits, which are also counted separately as '*_local_hits' and
+            '*_store_hits'), 'geocode_entries', 'distance_entries' and
+            per-tier hit counts under 'tiers' ('shared' covers the shared
+            store and the database)
+        """
+        conn = self._connection()
+        with self._lock:
+            stats = dict(self._counters)
+        stats['geocode_entries'] = conn.execute('SELECT COUNT(*) FROM geocodes').fetchone()[0]
+        stats['distance_entries'] = conn.execute('SELECT COUNT(*) FROM distances').fetchone()[0]
+        local_hits = stats['geocode_local_hits'] + stats['distance_local_hits']
+        all_hits = sum(stats[f'{kind}_{outcome}'] for kind in ('geocode', 'distance') for outcome in ('hits', 'negative_hits'))
+        stats['tiers'] = {
+            'in_process': {'hits': local_hits, 'entries': len(self.local)},
+            'shared': {'hits': all_hits - local_hits},
+        }
+        if self.shared.store is not None:
+            stats['tiers']['shared_store'] = {
+                'hits': stats['geocode_store_hits'] + stats['distance_store_hits'],
+                'errors': self.shared.stats()['shared']['errors'],
+            }
+        return stats
@@ -1,26 +1,259 @@
 """Distance calculation service using Google Maps and geopy fallback."""
 
 import os
+import math
+import contextvars
+import time
+import threading
 import requests
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from functools import partial
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from geopy.adapters import RequestsAdapter
 from geopy.geocoders import Nominatim
 from geopy.distance import geodesic
-from typing import Tuple, Optional
+from typing import Tuple, Optional, List, Dict, Any
+from .circuit_breaker import CircuitBreaker
+from .distance_cache import DistanceCache, CACHE_MISS, normalize_cache_key
+from .gazetteer import Gazetteer, get_default_gazetteer
+from .rate_limiter import ProviderRateLimiter, RateLimitExceeded
+from .geo_vector import coordinate_pair_distances
+from .lane_table import LaneTable
+from .road_estimator import RoadDistanceEstimator
+from .singleflight import SingleFlight
+
+
+METERS_TO_MILES = 0.000621371
+
+# Cache provider names for lane distances
+PROVIDER_GOOGLE_DRIVING = 'google_driving'
+PROVIDER_GEODESIC = 'geodesic'
+
+# Distance Matrix element statuses that mean the route genuinely does not exist
+NEGATIVE_CACHE_STATUSES = ('NOT_FOUND', 'ZERO_RESULTS')
+
+
+def lane_key(origin: str, destination: str) -> Tuple[str, str, str]:
+    """Single-flight key for a Google driving-distance lookup."""
+    return (PROVIDER_GOOGLE_DRIVING, normalize_cache_key(origin), normalize_cache_key(destination))
+
+
+def geocode_key(location: str) -> Tuple[str, str]:
+    """Single-flight key for a network geocode lookup."""
+    return ('geocode', normalize_cache_key(location))
 
 
 class DistanceService:
     """Service for calculating distances between locations."""
 
-    def __init__(self, google_api_key: Optional[str] = None):
+    GOOGLE_DISTANCE_MATRIX_URL = "https://maps.googleapis.com/maps/api/distancematrix/json"
+
+    # Distance Matrix API limits per request
+    MAX_MATRIX_ORIGINS = 25
+    MAX_MATRIX_DESTINATIONS = 25
+    MAX_MATRIX_ELEMENTS = 100
+    # Unrequested (but billed) elements a packed block may carry per requested
+    # element; origins whose destinations overlap less get their own requests
+    MAX_WASTED_ELEMENT_SHARE = 0.5
+
+    # Shared deadline for resolving both ends of one request
+    DEFAULT_GEOCODE_DEADLINE_SECONDS = 10.0
+    GEOCODE_WORKERS = 8
+
+    # Number of recent lookup latencies kept per kind
+    LATENCY_SAMPLE_SIZE = 1000
+
+    # HTTP connection pool and retry policy shared by Google and Nominatim calls.
+    # The transport only retries connections that failed before a request was
+    # sent; 429/503 responses are retried per request through the rate
+    # limiter and circuit breaker, and all attempts share one deadline.
+    DEFAULT_POOL_SIZE = 16
+    DEFAULT_MAX_RETRIES = 3
+    RETRY_BACKOFF_FACTOR = 0.5
+    RETRY_STATUS_CODES = (429, 503)
+    HTTP_TIMEOUT_SECONDS = 10
+
+    # Hedged single-lane resolution: total budget, and how long the primary
+    # provider runs alone before the fallback is started alongside it.
+    # Fallbacks get their own threads so that they never queue behind the
+    # (possibly hung) primary attempts they hedge.
+    DEFAULT_LATENCY_BUDGET_SECONDS = 3.0
+    DEFAULT_HEDGE_DELAY_SECONDS = 0.5
+    HEDGE_WORKERS = 16
+    FALLBACK_WORKERS = 16
+
+    def __init__(
+        self,
+        google_api_key: Optional[str] = None,
+        google_api_url: Optional[str] = None,
+        cache: Optional[DistanceCache] = None,
+        gazetteer: Optional[Gazetteer] = None,
+        use_gazetteer: bool = True,
+        road_estimator: Optional[RoadDistanceEstimator] = None,
+        estimator_confidence_threshold: Optional[float] = None,
+        nominatim_domain: Optional[str] = None,
+        nominatim_scheme: Optional[str] = None,
+        geocode_deadline: float = DEFAULT_GEOCODE_DEADLINE_SECONDS,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        rate_limiter: Optional[ProviderRateLimiter] = None,
+        google_breaker: Optional[CircuitBreaker] = None,
+        latency_budget: Optional[float] = None,
+        hedge_delay: float = DEFAULT_HEDGE_DELAY_SECONDS,
+        lane_table: Optional[LaneTable] = None
+    ):
         """Initialize the distance service.
         
         Args:
             google_api_key: Google Maps API key for distance calculations.
                           If not provided, will check GOOGLE_MAPS_API_KEY env var.
                           Falls back to geopy if no API key available.
+            google_api_url: Optional override of the Distance Matrix endpoint
+                          (e.g. a local stand-in server for testing).
+            cache: Optional persistent cache for geocodes and lane distances.
+            gazetteer: Offline gazetteer used before any network geocoding.
+                      Defaults to the bundled US gazetteer.
+            use_gazetteer: Set False to always geocode through Nominatim.
+            road_estimator: Optional calibrated estimator that converts
+                          straight-line distance to estimated driving miles
+                          whenever Google driving distance is unavailable.
+            estimator_confidence_threshold: If set, estimates at or above this
+                          confidence are used instead of calling Google at all.
+            nominatim_domain: Optional Nominatim host[:port] override.
+            nominatim_scheme: Optional Nominatim URL scheme ('http' or 'https').
+            geocode_deadline: Seconds allowed for geocoding both ends of a
+                          request; origin and destination are resolved in parallel.
+            pool_size: Keep-alive connections kept open per host.
+            max_retries: Retries with exponential backoff for connection
+                          errors and 429/503 responses. Timed-out reads are
+                          never retried.
+            rate_limiter: Optional per-provider token-bucket scheduler applied
+                          to every Google and Nominatim request.
+            google_breaker: Circuit breaker guarding Google requests. While
+                          open, lookups skip Google and fall back immediately.
+            latency_budget: If set, calculate_distance resolves through
+                          resolve_distance with this budget in seconds.
+            hedge_delay: Seconds the primary provider runs alone before the
+                          fallback is started in parallel.
+            lane_table: Optional customer-supplied lane distance table,
+                          consulted before any provider or network call.
         """
         self.google_api_key = google_api_key or os.environ.get('GOOGLE_MAPS_API_KEY')
-        self.geolocator = Nominatim(user_agent="household-goods-calculator")
+        self.google_api_url = google_api_url or self.GOOGLE_DISTANCE_MATRIX_URL
+        self.nominatim_domain = nominatim_domain or 'nominatim.openstreetmap.org'
+        self.nominatim_scheme = nominatim_scheme
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        self.session.mount('http://', self._http_adapter())
+        self.session.mount('https://', self._http_adapter())
+        self.geolocator = Nominatim(
+            user_agent="household-goods-calculator",
+            domain=self.nominatim_domain,
+            scheme=self.nominatim_scheme,
+            timeout=self.HTTP_TIMEOUT_SECONDS,
+            adapter_factory=partial(
+                RequestsAdapter,
+                pool_connections=self.pool_size,
+                pool_maxsize=self.pool_size,
+                max_retries=self._retry_policy()
+            )
+        )
         self.use_google_maps = bool(self.google_api_key)
+        self.cache = cache
+        self.gazetteer = (gazetteer or get_default_gazetteer()) if use_gazetteer else None
+        self.road_estimator = road_estimator
+        self.estimator_confidence_threshold = estimator_confidence_threshold
+        self.geocode_deadline = geocode_deadline
+        self.rate_limiter = rate_limiter
+        self.google_breaker = google_breaker or CircuitBreaker('Google Maps')
+        self.latency_budget = latency_budget
+        self.hedge_delay = hedge_delay
+        self.lane_table = lane_table
+        
+        self._geocode_executor: Optional[ThreadPoolExecutor] = None
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+        self._fallback_executor: Optional[ThreadPoolExecutor] = None
+        self._resolution_sources: Dict[str, int] = {}
+        self._executor_lock = threading.Lock()
+        self._latencies: Dict[str, deque] = {}
+        self._latency_lock = threading.Lock()
+        # Identical concurrent lookups share one network call
+        self._inflight = SingleFlight()
+    
+    def _retry_policy(self) -> Retry:
+        """Transport retry policy: backoff on connection errors only.
+        
+        Reads that time out are not retried (a hung provider would otherwise
+        hold a request for several timeouts), and retryable responses are
+        left to _retry_delay so that retries pass the rate limiter again.
+        """
+        return Retry(
+            total=self.max_retries,
+            connect=self.max_retries,
+            read=0,
+            status=0,
+            other=0,
+            backoff_factor=self.RETRY_BACKOFF_FACTOR,
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False
+        )
+    
+    def _retry_delay(self, attempt: int, retry_after: Optional[str], deadline: float) -> Optional[float]:
+        """Seconds to wait before retrying a 429/503 response, or None to give up.
+        
+        Args:
+            attempt: Number of retries already made
+            retry_after: The response's Retry-After header, if any
+            deadline: time.monotonic() by which all attempts must be done
+        """
+        if attempt >= self.max_retries:
+            return None
+        delay = self.RETRY_BACKOFF_FACTOR * (2 ** attempt)
+        try:
+            delay = max(delay, float(retry_after))
+        except (TypeError, ValueError):
+            pass
+        # The retry needs time for its own response as well
+        if time.monotonic() + delay >= deadline - self.RETRY_BACKOFF_FACTOR:
+            return None
+        return delay
+    
+    def _http_adapter(self) -> HTTPAdapter:
+        """Pooled keep-alive transport adapter for the shared session."""
+        return HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            max_retries=self._retry_policy()
+        )
+    
+    def connection_stats(self) -> Dict[str, Dict[str, int]]:
+        """Report TCP connection reuse for the Google and Nominatim sessions.
+        
+        Returns:
+            Dict keyed by 'google' and 'nominatim' with 'requests' sent,
+            'connections' opened and 'reused' (requests that skipped a new
+            TCP/TLS handshake)
+        """
+        sessions = {'google': self.session}
+        nominatim_session = getattr(self.geolocator.adapter, 'session', None)
+        if nominatim_session is not None:
+            sessions['nominatim'] = nominatim_session
+        
+        stats = {}
+        for name, session in sessions.items():
+            sent = opened = 0
+            for adapter in session.adapters.values():
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools.get(key)
+                    if pool is not None:
+                        sent += pool.num_requests
+                        opened += pool.num_connections
+            stats[name] = {'requests': sent, 'connections': opened, 'reused': max(0, sent - opened)}
+        return stats
     
     def _geocode_location(self, location: str) -> Optional[Tuple[float, float]]:
         """Convert location string to coordinates.
@@ -31,11 +264,54 @@ class DistanceService:
         Returns:
             Tuple of (latitude, longitude) or None if not found
         """
-        try:
-            result = self.geolocator.geocode(location)
-            if result:
-                return (result.latitude, result.longitude)
+        # Offline gazetteer resolves most US ZIPs and city/state strings
+        if self.gazetteer is not None:
+            coords = self.gazetteer.lookup(location)
+            if coords is not None:
+                return coords
+        
+        return self._timed_geocode(location)
+    
+    def _geocode_remote(self, location: str) -> Optional[Tuple[float, float]]:
+        """Geocode a location the gazetteer does not know (cache, then Nominatim).
+        
+        Args:
+            location: Location string (address, city, state, ZIP)
+            
+        Returns:
+            Tuple of (latitude, longitude) or None if not found
+        """
+        if self.cache is not None:
+            cached = self.cache.get_geocode(location)
+            if cached is not CACHE_MISS:
+                return cached
+        
+        return self._inflight.do(geocode_key(location), self._fetch_geocode, location)
+    
+    def _fetch_geocode(self, location: str) -> Optional[Tuple[float, float]]:
+        """Geocode through Nominatim and cache the result (found or not)."""
+        if not self._throttle('nominatim'):
             return None
+        
+        deadline = time.monotonic() + self.HTTP_TIMEOUT_SECONDS
+        attempt = 0
+        try:
+            while True:
+                try:
+                    result = self.geolocator.geocode(location, timeout=max(deadline - time.monotonic(), 0.001))
+                    break
+                except GeocoderRateLimited as e:
+                    delay = self._retry_delay(attempt, e.retry_after, deadline)
+                    if delay is None:
+                        raise
+                    time.sleep(delay)
+                    if not self._throttle('nominatim'):
+                        return None
+                    attempt += 1
+            coords = (result.latitude, result.longitude) if result else None
+            if self.cache is not None:
+                self.cache.set_geocode(location, coords)
+            return coords
         except Exception as e:
             print(f"Geocoding error for '{location}': {e}")
             return None
@@ -53,49 +329,438 @@ class DistanceService:
         if not self.google_api_key:
             return None
         
-        try:
-            url = "https://maps.googleapis.com/maps/api/distancematrix/json"
-            params = {
-                'origins': origin,
-                'destinations': destination,
-                'units': 'imperial',  # Get results in miles
-                'key': self.google_api_key
-            }
+        result = self.calculate_distances_batch([(origin, destination)])[0]
+        if result['status'] != 'OK':
+            print(f"Google Maps route error: {result['status']}")
+        return result['distance_miles']
+    
+    def _element_distance_miles(self, element: Dict[str, Any]) -> Optional[float]:
+        """Extract the distance in miles from a Distance Matrix response element.
+        
+        Args:
+            element: A single element from a Distance Matrix response row
             
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
+        Returns:
+            Distance in miles rounded to 2 decimals, or None if absent
+        """
+        distance_meters = element.get('distance', {}).get('value')
+        if distance_meters is None:
+            return None
+        return round(distance_meters * METERS_TO_MILES, 2)
+    
+    def _pack_matrix_requests(self, pairs: List[Tuple[str, str]]) -> List[Tuple[List[str], List[str]]]:
+        """Pack origin/destination pairs into Distance Matrix request blocks.
+        
+        Pairs are grouped by origin. Google bills every element of the
+        origins x destinations grid, so origins are only combined into one
+        block while their destination sets overlap enough: the block must
+        stay within the limits of a single request and carry at most
+        MAX_WASTED_ELEMENT_SHARE unrequested elements per requested one.
+        Other origins are sent as rows of their own.
+        
+        Args:
+            pairs: Unique (origin, destination) pairs
             
-            data = response.json()
+        Returns:
+            List of (origins, destinations) blocks, one per HTTP request
+        """
+        destinations_by_origin: Dict[str, List[str]] = {}
+        for origin, destination in pairs:
+            destinations_by_origin.setdefault(origin, [])
+            if destination not in destinations_by_origin[origin]:
+                destinations_by_origin[origin].append(destination)
+        
+        max_destinations = min(self.MAX_MATRIX_DESTINATIONS, self.MAX_MATRIX_ELEMENTS)
+        blocks: List[Tuple[List[str], List[str]]] = []
+        block_origins: List[str] = []
+        block_destinations: List[str] = []
+        block_requested = 0
+        
+        # Origins with the same destination sets end up adjacent
+        for origin in sorted(destinations_by_origin, key=lambda o: sorted(destinations_by_origin[o])):
+            destinations = destinations_by_origin[origin]
             
-            if data.get('status') != 'OK':
-                print(f"Google Maps API error: {data.get('status')}")
-                return None
+            # Origins with too many destinations get dedicated blocks
+            if len(destinations) > max_destinations:
+                for start in range(0, len(destinations), max_destinations):
+                    blocks.append(([origin], destinations[start:start + max_destinations]))
+                continue
             
-            # Extract distance from response
-            rows = data.get('rows', [])
-            if not rows or not rows[0].get('elements'):
-                return None
+            merged = block_destinations + [d for d in destinations if d not in block_destinations]
+            requested = block_requested + len(destinations)
+            billed = (len(block_origins) + 1) * len(merged)
+            fits = (
+                len(block_origins) + 1 <= self.MAX_MATRIX_ORIGINS
+                and len(merged) <= self.MAX_MATRIX_DESTINATIONS
+                and billed <= self.MAX_MATRIX_ELEMENTS
+                and billed - requested <= self.MAX_WASTED_ELEMENT_SHARE * requested
+            )
+            if block_origins and not fits:
+                blocks.append((block_origins, block_destinations))
+                block_origins, merged, requested = [], list(destinations), len(destinations)
             
-            element = rows[0]['elements'][0]
+            block_origins = block_origins + [origin]
+            block_destinations = merged
+            block_requested = requested
+        
+        if block_origins:
+            blocks.append((block_origins, block_destinations))
+        
+        return blocks
+    
+    def _request_distance_matrix(self, origins: List[str], destinations: List[str]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Send one Distance Matrix request and parse the full response grid.
+        
+        Args:
+            origins: Origin location strings (at most MAX_MATRIX_ORIGINS)
+            destinations: Destination location strings (at most MAX_MATRIX_DESTINATIONS)
             
-            if element.get('status') != 'OK':
-                print(f"Google Maps route error: {element.get('status')}")
-                return None
+        Returns:
+            Dict mapping (origin, destination) to a dict with
+            'distance_miles' (float or None) and 'status' (element status,
+            or the request-level status if the whole request failed)
+        """
+        if not self.google_breaker.allow_request():
+            return self._parse_distance_matrix(origins, destinations, {'status': 'CIRCUIT_OPEN'})
+        if not self._throttle('google'):
+            self.google_breaker.cancel_request()
+            return self._parse_distance_matrix(origins, destinations, {'status': 'RATE_LIMITED'})
+        
+        params = self._matrix_params(origins, destinations)
+        
+        start = time.perf_counter()
+        deadline = time.monotonic() + self.HTTP_TIMEOUT_SECONDS
+        attempt = 0
+        try:
+            while True:
+                response = self.session.get(
+                    self.google_api_url, params=params, timeout=max(deadline - time.monotonic(), 0.001)
+                )
+                delay = None
+                if response.status_code in self.RETRY_STATUS_CODES:
+                    delay = self._retry_delay(attempt, response.headers.get('Retry-After'), deadline)
+                if delay is None:
+                    break
+                
+                # Every retry is a new request as far as the breaker and the
+                # provider's rate limit are concerned
+                self.google_breaker.record_failure(f'HTTP {response.status_code}')
+                time.sleep(delay)
+                if not self.google_breaker.allow_request():
+                    return self._parse_distance_matrix(origins, destinations, {'status': 'CIRCUIT_OPEN'})
+                if not self._throttle('google'):
+                    self.google_breaker.cancel_request()
+                    return self._parse_distance_matrix(origins, destinations, {'status': 'RATE_LIMITED'})
+                attempt += 1
+            response.raise_for_status()
+            data = response.json()
+        except requests.exceptions.RequestException as e:
+            print(f"Google Maps API request failed: {e}")
+            data = {'status': 'REQUEST_FAILED'}
+        except ValueError as e:
+            print(f"Google Maps API returned invalid JSON: {e}")
+            data = {'status': 'INVALID_RESPONSE'}
+        finally:
+            self._record_latency('google', time.perf_counter() - start)
+        
+        self._record_google_outcome(data)
+        return self._parse_distance_matrix(origins, destinations, data)
+    
+    def _record_google_outcome(self, data: Dict[str, Any]):
+        """Feed the request-level status of a Distance Matrix response to the breaker."""
+        status = data.get('status', 'UNKNOWN_ERROR')
+        if status == 'OK':
+            self.google_breaker.record_success()
+        else:
+            self.google_breaker.record_failure(status)
+    
+    def _matrix_params(self, origins: List[str], destinations: List[str]) -> Dict[str, str]:
+        """Build Distance Matrix query parameters for one request block."""
+        return {
+            'origins': '|'.join(origins),
+            'destinations': '|'.join(destinations),
+            'units': 'imperial',
+            'key': self.google_api_key
+        }
+    
+    def _parse_distance_matrix(
+        self,
+        origins: List[str],
+        destinations: List[str],
+        data: Dict[str, Any]
+    ) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Parse a Distance Matrix response into per-pair results.
+        
+        Args:
+            origins: Origins sent in the request
+            destinations: Destinations sent in the request
+            data: Decoded JSON response (or a dict with only a failure 'status')
             
-            # Distance is in meters, convert to miles
-            distance_meters = element.get('distance', {}).get('value')
-            if distance_meters is None:
-                return None
+        Returns:
+            Dict mapping (origin, destination) to 'distance_miles' and 'status'
+        """
+        status = data.get('status', 'UNKNOWN_ERROR')
+        rows = data.get('rows', []) if status == 'OK' else []
+        if status != 'OK':
+            print(f"Google Maps API error: {status}")
+        
+        grid = {}
+        for i, origin in enumerate(origins):
+            elements = rows[i].get('elements', []) if i < len(rows) else []
+            for j, destination in enumerate(destinations):
+                if status != 'OK':
+                    grid[(origin, destination)] = {'distance_miles': None, 'status': status}
+                    continue
+                
+                element = elements[j] if j < len(elements) else {}
+                element_status = element.get('status', 'MISSING_ELEMENT')
+                distance = self._element_distance_miles(element) if element_status == 'OK' else None
+                if element_status == 'OK' and distance is None:
+                    element_status = 'MISSING_DISTANCE'
+                grid[(origin, destination)] = {'distance_miles': distance, 'status': element_status}
+        
+        return grid
+    
+    def _cached_google_distances(self, pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Return batch results for pairs already in the cache."""
+        resolved: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        if self.cache is None:
+            return resolved
+        
+        for origin, destination in pairs:
+            cached = self.cache.get_distance(origin, destination, PROVIDER_GOOGLE_DRIVING)
+            if cached is not CACHE_MISS:
+                status = 'OK' if cached is not None else 'CACHED_NOT_FOUND'
+                resolved[(origin, destination)] = {'distance_miles': cached, 'status': status}
+        return resolved
+    
+    def _store_google_grid(self, grid: Dict[Tuple[str, str], Dict[str, Any]]):
+        """Cache successful and definitively-not-found elements of a response grid."""
+        if self.cache is None:
+            return
+        
+        for (origin, destination), element in grid.items():
+            if element['status'] == 'OK' or element['status'] in NEGATIVE_CACHE_STATUSES:
+                self.cache.set_distance(origin, destination, PROVIDER_GOOGLE_DRIVING, element['distance_miles'])
+    
+    def calculate_distances_batch(self, pairs: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """Calculate driving distances for many pairs with batched Distance Matrix calls.
+        
+        Pairs are packed into as few requests as the API limits allow
+        (25 origins, 25 destinations, 100 elements per request). Duplicate
+        pairs are only requested once.
+        
+        Args:
+            pairs: List of (origin, destination) location string tuples
             
-            distance_miles = distance_meters * 0.000621371  # meters to miles
-            return round(distance_miles, 2)
+        Returns:
+            List of dicts in the same order as ``pairs``, each containing
+            'origin', 'destination', 'distance_miles' (float or None) and
+            'status' ('OK' or the Google element/request status)
+        """
+        if not self.google_api_key:
+            return [
+                {'origin': o, 'destination': d, 'distance_miles': None, 'status': 'NO_API_KEY'}
+                for o, d in pairs
+            ]
+        
+        unique_pairs = list(dict.fromkeys(pairs))
+        resolved = self._cached_google_distances(unique_pairs)
+        
+        missing = [pair for pair in unique_pairs if pair not in resolved]
+        led, joined = self._acquire_lanes(missing)
+        try:
+            for origins, destinations in self._pack_matrix_requests(list(led.values())):
+                grid = self._request_distance_matrix(origins, destinations)
+                self._store_google_grid(grid)
+                resolved.update(grid)
+        finally:
+            self._release_lanes(led, resolved)
+        
+        for pair, call in joined.items():
+            resolved[pair] = call.wait()
+        
+        return [
+            {'origin': o, 'destination': d, **resolved[(o, d)]}
+            for o, d in pairs
+        ]
+    
+    def _acquire_lanes(self, pairs: List[Tuple[str, str]]) -> Tuple[Dict[Any, Tuple[str, str]], Dict[Tuple[str, str], Any]]:
+        """Claim uncached lanes for this caller, joining lanes already being fetched.
+        
+        Args:
+            pairs: Unique (origin, destination) pairs missing from the cache
             
-        except requests.exceptions.RequestException as e:
-            print(f"Google Maps API request failed: {e}")
-            return None
-        except Exception as e:
-            print(f"Error calculating Google Maps distance: {e}")
-            return None
+        Returns:
+            Tuple of (led, joined): led maps each claimed lane key to the pair
+            to request; joined maps pairs fetched elsewhere to their in-flight call
+        """
+        keys = {}
+        for pair in pairs:
+            keys.setdefault(lane_key(*pair), []).append(pair)
+        led_calls, joined_calls = self._inflight.acquire(keys)
+        
+        led = {key: keys[key][0] for key in led_calls}
+        joined = {pair: joined_calls[key] for key in joined_calls for pair in keys[key]}
+        # Spelling variants of a led lane reuse the leader's result
+        for key in led_calls:
+            for pair in keys[key][1:]:
+                joined[pair] = led_calls[key]
+        return led, joined
+    
+    def _release_lanes(self, led: Dict[Any, Tuple[str, str]], resolved: Dict[Tuple[str, str], Dict[str, Any]]):
+        """Publish results for lanes this caller led; unanswered lanes fail as REQUEST_FAILED."""
+        for key, pair in led.items():
+            self._inflight.release(key, resolved.get(pair, {'distance_miles': None, 'status': 'REQUEST_FAILED'}))
+    
+    def _executor(self) -> ThreadPoolExecutor:
+        """Return the shared geocoding thread pool, creating it on first use."""
+        with self._executor_lock:
+            if self._geocode_executor is None:
+                self._geocode_executor = ThreadPoolExecutor(
+                    max_workers=self.GEOCODE_WORKERS,
+                    thread_name_prefix='geocode'
+                )
+            return self._geocode_executor
+    
+    def _throttle(self, provider: str) -> bool:
+        """Wait for a rate-limiter token for one request to ``provider``.
+        
+        Args:
+            provider: Rate-limited provider ('google' or 'nominatim')
+            
+        Returns:
+            True if the request may be sent, False if the wait budget ran out
+        """
+        if self.rate_limiter is None:
+            return True
+        try:
+            self.rate_limiter.acquire(provider)
+            return True
+        except RateLimitExceeded as e:
+            print(f"Skipping lookup: {e}")
+            return False
+    
+    def _hedge_pool(self) -> ThreadPoolExecutor:
+        """Return the thread pool for hedged provider attempts, creating it on first use."""
+        with self._executor_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(
+                    max_workers=self.HEDGE_WORKERS,
+                    thread_name_prefix='distance-hedge'
+                )
+            return self._hedge_executor
+    
+    def _fallback_pool(self) -> ThreadPoolExecutor:
+        """Return the thread pool for fallback attempts, creating it on first use."""
+        with self._executor_lock:
+            if self._fallback_executor is None:
+                self._fallback_executor = ThreadPoolExecutor(
+                    max_workers=self.FALLBACK_WORKERS,
+                    thread_name_prefix='distance-fallback'
+                )
+            return self._fallback_executor
+    
+    def _record_latency(self, kind: str, seconds: float):
+        """Record the latency of one external lookup."""
+        with self._latency_lock:
+            samples = self._latencies.setdefault(kind, deque(maxlen=self.LATENCY_SAMPLE_SIZE))
+            samples.append(seconds)
+    
+    def _timed_geocode(self, location: str) -> Optional[Tuple[float, float]]:
+        start = time.perf_counter()
+        try:
+            return self._geocode_remote(location)
+        finally:
+            self._record_latency('geocode', time.perf_counter() - start)
+    
+    def _geocode_pair(
+        self,
+        origin: str,
+        destination: str,
+        deadline: Optional[float] = None
+    ) -> Tuple[Optional[Tuple[float, float]], Optional[Tuple[float, float]]]:
+        """Geocode origin and destination concurrently under one shared deadline.
+        
+        Locations the offline gazetteer knows are resolved inline; only the
+        rest are sent to the thread pool, so the slow path costs one network
+        round trip instead of two.
+        
+        Args:
+            origin: Origin location string
+            destination: Destination location string
+            deadline: Seconds allowed for both lookups (defaults to geocode_deadline)
+            
+        Returns:
+            Tuple of (origin_coords, destination_coords); an end that could not
+            be resolved before the deadline is None
+        """
+        timeout = self.geocode_deadline if deadline is None else deadline
+        expires = time.monotonic() + timeout
+        
+        resolved: Dict[str, Any] = {}
+        for location in (origin, destination):
+            if location in resolved:
+                continue
+            coords = self.gazetteer.lookup(location) if self.gazetteer is not None else None
+            if coords is None:
+                # Pool threads inherit the caller's lookup priority
+                coords = self._executor().submit(contextvars.copy_context().run, self._timed_geocode, location)
+            resolved[location] = coords
+        
+        for location, value in resolved.items():
+            if not hasattr(value, 'result'):
+                continue
+            try:
+                resolved[location] = value.result(timeout=max(0.0, expires - time.monotonic()))
+            except FutureTimeoutError:
+                print(f"Geocoding '{location}' exceeded the {timeout:.1f}s deadline")
+                resolved[location] = None
+        
+        return resolved[origin], resolved[destination]
+    
+    def latency_stats(self) -> Dict[str, Dict[str, float]]:
+        """Summarize recent external lookup latencies.
+        
+        Returns:
+            Dict keyed by lookup kind (e.g. 'geocode') with 'count',
+            'p50_ms', 'p95_ms' and 'max_ms'
+        """
+        with self._latency_lock:
+            snapshot = {kind: sorted(samples) for kind, samples in self._latencies.items()}
+        
+        stats = {}
+        for kind, samples in snapshot.items():
+            if not samples:
+                continue
+            stats[kind] = {
+                'count': len(samples),
+                'p50_ms': round(samples[len(samples) // 2] * 1000, 2),
+                'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 2),
+                'max_ms': round(samples[-1] * 1000, 2),
+            }
+        return stats
+    
+    def metrics(self) -> Dict[str, Any]:
+        """Return operational metrics for the /metrics endpoint."""
+        with self._latency_lock:
+            sources = dict(self._resolution_sources)
+        metrics: Dict[str, Any] = {
+            'latency': self.latency_stats(),
+            'resolution_sources': sources,
+            'connections': self.connection_stats(),
+            'coalescing': self._inflight.stats(),
+        }
+        metrics['circuit_breakers'] = {'google': self.google_breaker.stats()}
+        if self.rate_limiter is not None:
+            metrics['rate_limits'] = self.rate_limiter.stats()
+        if self.cache is not None:
+            metrics['cache'] = self.cache.stats()
+        if self.lane_table is not None:
+            metrics['lane_table'] = self.lane_table.stats()
+        if self.gazetteer is not None:
+            metrics['gazetteer'] = {'hits': self.gazetteer.hits, 'misses': self.gazetteer.misses}
+        return metrics
     
     def _calculate_geodesic_distance(self, origin: str, destination: str) -> Optional[float]:
         """Calculate straight-line distance using geopy (fallback method).
@@ -107,23 +772,135 @@ class DistanceService:
         Returns:
             Geodesic distance in miles, or None if calculation fails
         """
-        origin_coords = self._geocode_location(origin)
-        destination_coords = self._geocode_location(destination)
+        if self.cache is not None:
+            cached = self.cache.get_distance(origin, destination, PROVIDER_GEODESIC)
+            if cached is not CACHE_MISS and cached is not None:
+                return cached
+        
+        origin_coords, destination_coords = self._geocode_pair(origin, destination)
         
         if origin_coords is None or destination_coords is None:
             return None
         
         # Calculate distance using geodesic (great circle distance)
         distance_km = geodesic(origin_coords, destination_coords).kilometers
-        distance_miles = distance_km * 0.621371  # Convert km to miles
+        distance_miles = round(distance_km * 0.621371, 2)  # Convert km to miles
         
-        return round(distance_miles, 2)
+        if self.cache is not None:
+            self.cache.set_distance(origin, destination, PROVIDER_GEODESIC, distance_miles)
+        
+        return distance_miles
+    
+    def _google_attempt(self, origin: str, destination: str) -> Tuple[Optional[float], str]:
+        return self._calculate_google_maps_distance(origin, destination), 'google'
+    
+    def _fallback_attempt(self, origin: str, destination: str) -> Tuple[Optional[float], str]:
+        """Estimated road distance if the estimator is calibrated, else geodesic."""
+        if self.road_estimator is not None and self.road_estimator.is_calibrated:
+            estimate = self.estimate_road_distance(origin, destination)
+            if estimate is not None:
+                return estimate['distance_miles'], 'estimate'
+        return self._calculate_geodesic_distance(origin, destination), 'geodesic'
+    
+    def resolve_distance(
+        self,
+        origin: str,
+        destination: str,
+        budget: Optional[float] = None,
+        hedge_delay: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Resolve a lane distance within a latency budget, hedging slow providers.
+        
+        Cached and confidently estimated distances are returned at once.
+        Otherwise Google is asked first; if it has not answered within the
+        hedge delay (or fails), the fallback (road estimate or geodesic) is
+        started in parallel and the first valid answer wins. Attempts still
+        running when the answer is returned finish in the background and
+        populate the cache.
+        
+        Args:
+            origin: Origin location string
+            destination: Destination location string
+            budget: Seconds allowed in total (defaults to latency_budget,
+                    then DEFAULT_LATENCY_BUDGET_SECONDS)
+            hedge_delay: Seconds before the fallback is started (defaults
+                    to the service's hedge_delay)
+            
+        Returns:
+            Dict with 'distance_miles' (None if nothing answered in time),
+            'source' ('lane_table', 'cache', 'estimate', 'google',
+            'geodesic' or None)
+            and 'elapsed_ms'
+        """
+        budget = budget or self.latency_budget or self.DEFAULT_LATENCY_BUDGET_SECONDS
+        hedge_delay = self.hedge_delay if hedge_delay is None else hedge_delay
+        start = time.monotonic()
+        deadline = start + budget
+        
+        distance, source = None, None
+        attempts = [(self._fallback_attempt, self._fallback_pool)]
+        if self.lane_table is not None:
+            distance = self.lane_table.lookup(origin, destination)
+            source = 'lane_table'
+        if distance is None and self.use_google_maps:
+            cached = CACHE_MISS
+            if self.cache is not None:
+                cached = self.cache.get_distance(origin, destination, PROVIDER_GOOGLE_DRIVING)
+            if cached is not CACHE_MISS and cached is not None:
+                distance, source = cached, 'cache'
+            elif self.estimator_confidence_threshold is not None:
+                estimate = self.estimate_road_distance(origin, destination, offline_only=True)
+                if estimate and estimate['confidence'] >= self.estimator_confidence_threshold:
+                    distance, source = estimate['distance_miles'], 'estimate'
+            # A cached "no route" skips straight to the fallback
+            if cached is CACHE_MISS:
+                attempts.insert(0, (self._google_attempt, self._hedge_pool))
+        
+        pending = set()
+        launch_at = start
+        while distance is None:
+            now = time.monotonic()
+            if attempts and (now >= launch_at or not pending):
+                attempt, pool = attempts.pop(0)
+                pending.add(pool().submit(contextvars.copy_context().run, attempt, origin, destination))
+                launch_at = now + hedge_delay
+            if not pending:
+                break
+            
+            timeout = deadline - now
+            if attempts:
+                timeout = min(timeout, launch_at - now)
+            done, pending = wait(pending, timeout=max(0.0, timeout), return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    distance, source = future.result()
+                except Exception as e:
+                    print(f"Distance attempt failed: {e}")
+                if distance is not None:
+                    break
+            if distance is None and time.monotonic() >= deadline:
+                print(f"No distance for {origin} -> {destination} within the {budget:.1f}s budget")
+                break
+        
+        elapsed = time.monotonic() - start
+        self._record_latency('resolve', elapsed)
+        source = source if distance is not None else None
+        with self._latency_lock:
+            key = source or 'unresolved'
+            self._resolution_sources[key] = self._resolution_sources.get(key, 0) + 1
+        return {
+            'distance_miles': distance,
+            'source': source,
+            'elapsed_ms': round(elapsed * 1000, 1),
+        }
     
     def calculate_distance(self, origin: str, destination: str) -> Optional[float]:
         """Calculate distance in miles between two locations.
         
         Uses Google Maps API for driving distance if available,
         falls back to geodesic (straight-line) distance otherwise.
+        With a latency_budget configured the lookup is hedged through
+        resolve_distance.
         
         Args:
             origin: Origin location string
@@ -132,6 +909,23 @@ class DistanceService:
         Returns:
             Distance in miles, or None if calculation fails
         """
+        if self.latency_budget is not None:
+            return self.resolve_distance(origin, destination)['distance_miles']
+        
+        if self.lane_table is not None:
+            distance = self.lane_table.lookup(origin, destination)
+            if distance is not None:
+                print(f"Lane table distance: {distance} miles")
+                return distance
+        
+        # Skip the paid API call when the offline estimate is trustworthy
+        if self.use_google_maps and self.estimator_confidence_threshold is not None:
+            estimate = self.estimate_road_distance(origin, destination, offline_only=True)
+            if estimate and estimate['confidence'] >= self.estimator_confidence_threshold:
+                print(f"Estimated road distance: {estimate['distance_miles']} miles "
+                      f"(confidence {estimate['confidence']})")
+                return estimate['distance_miles']
+        
         # Try Google Maps first if API key is available
         if self.use_google_maps:
             distance = self._calculate_google_maps_distance(origin, destination)
@@ -141,9 +935,172 @@ class DistanceService:
             else:
                 print("Google Maps failed, falling back to geodesic distance")
         
-        # Fallback to geodesic distance
+        # Fallback to estimated road distance, then plain geodesic distance
+        if self.road_estimator is not None and self.road_estimator.is_calibrated:
+            estimate = self.estimate_road_distance(origin, destination)
+            if estimate is not None:
+                print(f"Estimated road distance: {estimate['distance_miles']} miles "
+                      f"(confidence {estimate['confidence']})")
+                return estimate['distance_miles']
+        
         distance = self._calculate_geodesic_distance(origin, destination)
         if distance is not None:
             print(f"Geodesic distance: {distance} miles (straight-line)")
         
         return distance
+    
+    def geodesic_distances_batch(self, pairs: List[Tuple[str, str]]) -> List[Optional[float]]:
+        """Calculate straight-line distances for many pairs at once.
+        
+        Each distinct location is geocoded once, then all pairs are measured
+        in a single vectorized haversine pass (within 0.35% of geodesic for
+        continental US lanes).
+        
+        Args:
+            pairs: List of (origin, destination) location string tuples
+            
+        Returns:
+            Distances in miles in the same order as ``pairs``, None where
+            either end could not be geocoded
+        """
+        locations = list(dict.fromkeys(location for pair in pairs for location in pair))
+        coords = {}
+        remote = []
+        for location in locations:
+            coords[location] = self.gazetteer.lookup(location) if self.gazetteer is not None else None
+            if coords[location] is None:
+                remote.append(location)
+        context = contextvars.copy_context()
+        coords.update(zip(remote, self._executor().map(
+            lambda location: context.copy().run(self._timed_geocode, location), remote
+        )))
+        
+        distances = coordinate_pair_distances(
+            [coords[origin] for origin, _ in pairs],
+            [coords[destination] for _, destination in pairs]
+        )
+        return [None if math.isnan(d) else round(float(d), 2) for d in distances]
+    
+    def calculate_distances(self, pairs: List[Tuple[str, str]]) -> List[Optional[float]]:
+        """Calculate distances in miles for many pairs.
+        
+        Batch counterpart of calculate_distance: Google driving distances are
+        fetched with batched Distance Matrix requests when an API key is
+        available, and any pairs Google cannot answer fall back to the
+        vectorized straight-line engine.
+        
+        Args:
+            pairs: List of (origin, destination) location string tuples
+            
+        Returns:
+            Distances in miles in the same order as ``pairs``, None where
+            no distance could be calculated
+        """
+        return [resolution['distance_miles'] for resolution in self.resolve_distances(pairs)]
+    
+    def resolve_distances(self, pairs: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """Like calculate_distances, but also report where each distance came from.
+        
+        Args:
+            pairs: List of (origin, destination) location string tuples
+            
+        Returns:
+            Dicts in the same order as ``pairs`` with 'distance_miles' (None
+            where no distance could be calculated) and 'source'
+            ('lane_table', 'google', 'estimate', 'geodesic' or None)
+        """
+        distances = self._lane_table_distances(pairs)
+        sources = ['lane_table' if distance is not None else None for distance in distances]
+        
+        if self.use_google_maps:
+            remaining = [i for i, distance in enumerate(distances) if distance is None]
+            results = self.calculate_distances_batch([pairs[i] for i in remaining])
+            for i, result in zip(remaining, results):
+                distances[i], sources[i] = result['distance_miles'], 'google'
+        
+        fallback = [i for i, distance in enumerate(distances) if distance is None]
+        if fallback:
+            geodesic_distances = self.geodesic_distances_batch([pairs[i] for i in fallback])
+            use_estimator = self.road_estimator is not None and self.road_estimator.is_calibrated
+            for i, distance in zip(fallback, geodesic_distances):
+                sources[i] = 'geodesic'
+                if use_estimator and distance is not None:
+                    estimate = self.estimate_road_distance(*pairs[i], straight_miles=distance)
+                    if estimate:
+                        distance, sources[i] = estimate['distance_miles'], 'estimate'
+                distances[i] = distance
+        
+        return [
+            {'distance_miles': distance, 'source': source if distance is not None else None}
+            for distance, source in zip(distances, sources)
+        ]
+    
+    def _lane_table_distances(self, pairs: List[Tuple[str, str]]) -> List[Optional[float]]:
+        """Distances from the lane table for many pairs, None where absent."""
+        if self.lane_table is None or not pairs:
+            return [None] * len(pairs)
+        return [None if math.isnan(m) else float(m) for m in self.lane_table.lookup_many(pairs)]
+    
+    def calculate_distances_from(self, origin: str, destinations: List[str]) -> List[Optional[float]]:
+        """Calculate distances from one origin to many destinations.
+        
+        Args:
+            origin: Origin location string
+            destinations: Destination location strings
+            
+        Returns:
+            Distances in miles in the same order as ``destinations``
+        """
+        return self.calculate_distances([(origin, destination) for destination in destinations])
+    
+    def _locate_offline(self, location: str) -> Optional[Tuple[float, float]]:
+        """Resolve a location from the gazetteer or cache without network calls."""
+        if self.gazetteer is not None:
+            coords = self.gazetteer.lookup(location)
+            if coords is not None:
+                return coords
+        if self.cache is not None:
+            return self.cache.peek_geocode(location)
+        return None
+    
+    def calibrate_road_estimator(self) -> int:
+        """Recalibrate the road estimator from cached Google driving distances.
+        
+        Returns:
+            Number of calibration lanes used (0 without estimator or cache)
+        """
+        if self.road_estimator is None or self.cache is None:
+            return 0
+        used = self.road_estimator.fit_from_cache(self.cache, self._locate_offline, PROVIDER_GOOGLE_DRIVING)
+        print(f"Road distance estimator calibrated from {used} cached driving distances")
+        return used
+    
+    def estimate_road_distance(
+        self,
+        origin: str,
+        destination: str,
+        offline_only: bool = False,
+        straight_miles: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Estimate driving distance from geodesic distance and learned circuity.
+        
+        Args:
+            origin: Origin location string
+            destination: Destination location string
+            offline_only: Only use the gazetteer and cache to locate the ends
+            straight_miles: Precomputed straight-line miles, if known
+            
+        Returns:
+            Estimate dict from RoadDistanceEstimator.estimate, or None if no
+            estimator is configured or either end cannot be located
+        """
+        if self.road_estimator is None:
+            return None
+        
+        locate = self._locate_offline if offline_only else self._geocode_location
+        origin_coords = locate(origin)
+        destination_coords = locate(destination)
+        if origin_coords is None or destination_coords is None:
+            return None
+        
+        return self.road_estimator.estimate(origin_coords, destination_coords, straight_miles)
@@ -0,0 +1,241 @@
+"""Offline US gazetteer for resolving ZIP codes and city/state names to coordinates.
+
+The bundled data file (data/us_gazetteer.csv.gz) holds ZIP centroids plus
+city and state centroids averaged from them. It was derived from the
+MIT-licensed ``zipcodes`` package data set.
+"""
+
+import csv
+import gzip
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+STATE_NAMES = {
+    'alabama': 'AL', 'alaska': 'AK', 'arizona': 'AZ', 'arkansas': 'AR',
+    'california': 'CA', 'colorado': 'CO', 'connecticut': 'CT', 'delaware': 'DE',
+    'district of columbia': 'DC', 'florida': 'FL', 'georgia': 'GA', 'hawaii': 'HI',
+    'idaho': 'ID', 'illinois': 'IL', 'indiana': 'IN', 'iowa': 'IA',
+    'kansas': 'KS', 'kentucky': 'KY', 'louisiana': 'LA', 'maine': 'ME',
+    'maryland': 'MD', 'massachusetts': 'MA', 'michigan': 'MI', 'minnesota': 'MN',
+    'mississippi': 'MS', 'missouri': 'MO', 'montana': 'MT', 'nebraska': 'NE',
+    'nevada': 'NV', 'new hampshire': 'NH', 'new jersey': 'NJ', 'new mexico': 'NM',
+    'new york': 'NY', 'north carolina': 'NC', 'north dakota': 'ND', 'ohio': 'OH',
+    'oklahoma': 'OK', 'oregon': 'OR', 'pennsylvania': 'PA', 'rhode island': 'RI',
+    'south carolina': 'SC', 'south dakota': 'SD', 'tennessee': 'TN', 'texas': 'TX',
+    'utah': 'UT', 'vermont': 'VT', 'virginia': 'VA', 'washington': 'WA',
+    'west virginia': 'WV', 'wisconsin': 'WI', 'wyoming': 'WY',
+    'puerto rico': 'PR', 'guam': 'GU', 'virgin islands': 'VI',
+}
+
+STATE_CODES = set(STATE_NAMES.values())
+
+# Abbreviations expanded in place names ("St. Louis" -> "saint louis")
+NAME_ABBREVIATIONS = {
+    'st': 'saint',
+    'ste': 'sainte',
+    'ft': 'fort',
+    'mt': 'mount',
+    'pt': 'point',
+}
+
+# Single-letter directions are only expanded as the first word ("N Las Vegas")
+LEADING_DIRECTIONS = {'n': 'north', 's': 'south', 'e': 'east', 'w': 'west'}
+
+COUNTRY_SUFFIXES = [
+    ['united', 'states', 'of', 'america'],
+    ['united', 'states'],
+    ['usa'],
+    ['us'],
+]
+
+ZIP_PATTERN = re.compile(r'(?<!\d)(\d{5})(?:-\d{4})?(?!\d)')
+
+
+def tokenize_place(text: str) -> List[str]:
+    """Split a place string into lower-case word tokens.
+
+    Apostrophes are dropped ("O'Fallon" -> "ofallon") and all other
+    punctuation separates words.
+
+    Args:
+        text: Place string
+
+    Returns:
+        List of tokens
+    """
+    text = text.lower().replace("'", '').replace('’', '')
+    return re.sub(r'[^a-z0-9]+', ' ', text).split()
+
+
+def normalize_place_name(tokens: List[str]) -> str:
+    """Build the index key for a city name from its tokens.
+
+    Args:
+        tokens: City name tokens from tokenize_place
+
+    Returns:
+        Normalized name, e.g. ['st', 'louis'] -> 'saint louis'
+    """
+    words = [NAME_ABBREVIATIONS.get(token, token) for token in tokens]
+    if len(words) > 1 and words[0] in LEADING_DIRECTIONS:
+        words[0] = LEADING_DIRECTIONS[words[0]]
+    return ' '.join(words)
+
+
+def split_state(tokens: List[str]) -> Tuple[List[str], Optional[str]]:
+    """Split a trailing state code or state name off a token list.
+
+    Args:
+        tokens: Place tokens (country suffix already removed)
+
+    Returns:
+        Tuple of (remaining tokens, two-letter state code or None)
+    """
+    # Longest state names first so "west virginia" wins over "virginia"
+    for width in (4, 3, 2, 1):
+        if len(tokens) < width:
+            continue
+        candidate = ' '.join(tokens[-width:])
+        if candidate in STATE_NAMES:
+            return tokens[:-width], STATE_NAMES[candidate]
+    if tokens and tokens[-1].upper() in STATE_CODES:
+        return tokens[:-1], tokens[-1].upper()
+    return tokens, None
+
+
+def strip_country(tokens: List[str]) -> List[str]:
+    """Remove a trailing country name ("USA", "United States")."""
+    for suffix in COUNTRY_SUFFIXES:
+        if len(tokens) > len(suffix) and tokens[-len(suffix):] == suffix:
+            return tokens[:-len(suffix)]
+    return tokens
+
+
+class Gazetteer:
+    """In-memory index of US ZIP, city and state centroids.
+
+    The data file is loaded lazily on first lookup; after that every lookup
+    is a handful of dict probes.
+    """
+
+    DEFAULT_PATH = Path(__file__).parent.parent / "data" / "us_gazetteer.csv.gz"
+
+    def __init__(self, path: Optional[str] = None):
+        """Initialize the gazetteer.
+
+        Args:
+            path: Path to a gzipped CSV with kind,name,state,latitude,longitude
+                  rows. Defaults to the bundled data/us_gazetteer.csv.gz.
+        """
+        self.path = Path(path) if path else self.DEFAULT_PATH
+        self._zips: Dict[str, Tuple[float, float]] = {}
+        self._cities: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        self._city_states: Dict[str, List[str]] = {}
+        self._states: Dict[str, Tuple[float, float]] = {}
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            with gzip.open(self.path, 'rt', newline='') as f:
+                for row in csv.DictReader(f):
+                    coords = (float(row['latitude']), float(row['longitude']))
+                    kind = row['kind']
+                    if kind == 'zip':
+                        self._zips[row['name']] = coords
+                    elif kind == 'city':
+                        name = normalize_place_name(tokenize_place(row['name']))
+                        self._cities[(name, row['state'])] = coords
+                        self._city_states.setdefault(name, []).append(row['state'])
+                    elif kind == 'state':
+                        self._states[row['state']] = coords
+            self._loaded = True
+
+    def load(self):
+        """Load the data file now instead of on the first lookup."""
+        self._ensure_loaded()
+
+    def lookup_zip(self, zip_code: str) -> Optional[Tuple[float, float]]:
+        """Return the centroid of a 5-digit ZIP code, or None."""
+        self._ensure_loaded()
+        return self._zips.get(zip_code)
+
+    def lookup_city(self, city: str, state: Optional[str] = None) -> Optional[Tuple[float, float]]:
+        """Return the centroid of a city.
+
+        Args:
+            city: City name in any common spelling ("St. Louis", "Saint Louis")
+            state: Two-letter state code. Without it the city must be unique
+                   across states to resolve.
+
+        Returns:
+            (latitude, longitude) or None if unknown or ambiguous
+        """
+        self._ensure_loaded()
+        name = normalize_place_name(tokenize_place(city))
+        if state:
+            return self._cities.get((name, state.upper()))
+        states = self._city_states.get(name, [])
+        if len(states) == 1:
+            return self._cities[(name, states[0])]
+        return None
+
+    def _resolve(self, location: str) -> Optional[Tuple[float, float]]:
+        match = ZIP_PATTERN.search(location)
+        if match:
+            coords = self.lookup_zip(match.group(1))
+            if coords:
+                return coords
+
+        tokens = [t for t in tokenize_place(location) if not t.isdigit()]
+        tokens = strip_country(tokens)
+        city_tokens, state = split_state(tokens)
+
+        if city_tokens:
+            return self.lookup_city(' '.join(city_tokens), state)
+
+        # Bare names like "New York" are tried as a city before the state
+        if state:
+            coords = self.lookup_city(' '.join(tokens))
+            return coords or self._states.get(state)
+        return None
+
+    def lookup(self, location: str) -> Optional[Tuple[float, float]]:
+        """Resolve a free-form US location string to coordinates.
+
+        Handles ZIP codes ("78701", "78701-1234", "Austin, TX 78701"),
+        "City, ST", "City ST", "City, State Name" and bare state names.
+
+        Args:
+            location: Location string
+
+        Returns:
+            (latitude, longitude) or None if the location is not in the gazetteer
+        """
+        self._ensure_loaded()
+        coords = self._resolve(location)
+        if coords is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return coords
+
+
+_default_gazetteer: Optional[Gazetteer] = None
+
+
+def get_default_gazetteer() -> Gazetteer:
+    """Return the process-wide gazetteer for the bundled data file."""
+    global _default_gazetteer
+    if _default_gazetteer is None:
+        _default_gazetteer = Gazetteer()
+    return _default_gazetteer
@@ -0,0 +1,246 @@
+"""Precomputed lane distance table stored as a sorted, memory-mapped binary index.
+
+Customers often move between a fixed set of offices and can supply an
+origin-destination distance table. ``build_lane_table`` converts such a
+table (CSV or Parquet, millions of rows) into a compact binary file:
+
+    header   16 bytes  magic b'HGLT', version, flags, row count
+    keys     8 bytes per lane, uint64 hash of the normalized lane, sorted
+    miles    4 bytes per lane, float32, aligned with keys
+
+``LaneTable`` memory-maps the file read-only and answers lookups with a
+binary search, so opening it costs nothing, only the pages touched by
+lookups are read, and every worker process shares the same page cache.
+
+Usage:
+    python -m calculator.lane_table lanes.csv [data/lane_table.bin]
+"""
+
+import argparse
+import hashlib
+import os
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .distance_cache import normalize_cache_key
+
+
+MAGIC = b'HGLT'
+# Version 2 hashes canonicalized locations; version 1 tables must be re-imported
+FORMAT_VERSION = 2
+HEADER = struct.Struct('<4sHHQ')
+
+# Rows hashed per chunk while importing
+IMPORT_CHUNK_ROWS = 500000
+
+ORIGIN_COLUMN = 'origin'
+DESTINATION_COLUMN = 'destination'
+DISTANCE_COLUMN = 'distance_miles'
+
+
+def lane_hash(origin: str, destination: str) -> int:
+    """64-bit key of a normalized lane.
+
+    Collisions are possible in principle but negligible for tables of a few
+    million lanes (about 1 in 10^6 chance for 5 million rows).
+
+    Args:
+        origin: Origin location string
+        destination: Destination location string
+
+    Returns:
+        Unsigned 64-bit integer key
+    """
+    lane = f'{normalize_cache_key(origin)}\x1f{normalize_cache_key(destination)}'
+    return int.from_bytes(hashlib.blake2b(lane.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _read_chunks(source: str) -> Iterator[pd.DataFrame]:
+    """Yield the O-D table in chunks (Parquet requires pyarrow or fastparquet)."""
+    columns = [ORIGIN_COLUMN, DESTINATION_COLUMN, DISTANCE_COLUMN]
+    if str(source).lower().endswith(('.parquet', '.pq')):
+        yield pd.read_parquet(source, columns=columns)
+        return
+    yield from pd.read_csv(source, usecols=columns, chunksize=IMPORT_CHUNK_ROWS, dtype={
+        ORIGIN_COLUMN: str, DESTINATION_COLUMN: str
+    })
+
+
+def build_lane_table(source: str, output: str) -> int:
+    """Import a customer O-D distance table into a binary lane index.
+
+    The source needs 'origin', 'destination' and 'distance_miles' columns.
+    Rows with missing or non-positive distances are skipped; for duplicate
+    lanes the last row wins. The output is written atomically.
+
+    Args:
+        source: Path to a CSV or Parquet file
+        output: Path of the binary lane table to write
+
+    Returns:
+        Number of lanes written
+    """
+    key_chunks: List[np.ndarray] = []
+    mile_chunks: List[np.ndarray] = []
+    for chunk in _read_chunks(source):
+        miles = pd.to_numeric(chunk[DISTANCE_COLUMN], errors='coerce')
+        chunk = chunk[(miles > 0) & chunk[ORIGIN_COLUMN].notna() & chunk[DESTINATION_COLUMN].notna()]
+        keys = np.fromiter(
+            (lane_hash(o, d) for o, d in zip(chunk[ORIGIN_COLUMN], chunk[DESTINATION_COLUMN])),
+            dtype=np.uint64,
+            count=len(chunk)
+        )
+        key_chunks.append(keys)
+        mile_chunks.append(miles[chunk.index].to_numpy(dtype=np.float32))
+
+    keys = np.concatenate(key_chunks) if key_chunks else np.empty(0, dtype=np.uint64)
+    miles = np.concatenate(mile_chunks) if mile_chunks else np.empty(0, dtype=np.float32)
+
+    # Stable sort keeps file order among duplicates; keep the last of each run
+    order = np.argsort(keys, kind='stable')
+    keys, miles = keys[order], miles[order]
+    last = np.ones(len(keys), dtype=bool)
+    last[:-1] = keys[1:] != keys[:-1]
+    keys, miles = keys[last], miles[last]
+
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output.with_name(output.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(keys)))
+        f.write(keys.astype('<u8').tobytes())
+        f.write(miles.astype('<f4').tobytes())
+    os.replace(tmp, output)
+    return len(keys)
+
+
+class LaneTable:
+    """Read-only, memory-mapped lookup of precomputed lane distances."""
+
+    DEFAULT_PATH = Path(__file__).parent.parent / "data" / "lane_table.bin"
+
+    def __init__(self, path: Optional[str] = None, symmetric: bool = False):
+        """Open a lane table (the file is mapped on first lookup).
+
+        Args:
+            path: Binary lane table path. Defaults to the LANE_TABLE_PATH env
+                  var, then data/lane_table.bin.
+            symmetric: Also answer B -> A from an A -> B row
+        """
+        self.path = Path(path or os.environ.get('LANE_TABLE_PATH') or self.DEFAULT_PATH)
+        self.symmetric = symmetric
+        self._keys: Optional[np.ndarray] = None
+        self._miles: Optional[np.ndarray] = None
+        self._open_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def open_default(cls, symmetric: bool = False) -> Optional['LaneTable']:
+        """Return the configured lane table, or None if no usable table file exists.
+
+        The header is checked up front, so a table written by an older
+        version of the import tool is reported once at startup (and ignored)
+        rather than failing every lookup.
+        """
+        table = cls(symmetric=symmetric)
+        if not table.path.exists():
+            return None
+        try:
+            table._ensure_open()
+        except (OSError, ValueError) as e:
+            print(f"Running without lane table: {e}; re-import it with python -m calculator.lane_table")
+            return None
+        return table
+
+    def _ensure_open(self):
+        if self._keys is not None:
+            return
+        with self._open_lock:
+            if self._keys is not None:
+                return
+            with open(self.path, 'rb') as f:
+                header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise ValueError(f"{self.path} is not a version {FORMAT_VERSION} lane table")
+            magic, version, _, count = HEADER.unpack(header)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"{self.path} is not a version {FORMAT_VERSION} lane table")
+            if count == 0:
+                self._miles = np.empty(0, dtype='<f4')
+                self._keys = np.empty(0, dtype='<u8')
+                return
+            self._miles = np.memmap(self.path, dtype='<f4', mode='r', offset=HEADER.size + 8 * count, shape=(count,))
+            self._keys = np.memmap(self.path, dtype='<u8', mode='r', offset=HEADER.size, shape=(count,))
+
+    def __len__(self) -> int:
+        self._ensure_open()
+        return len(self._keys)
+
+    def _find(self, keys: np.ndarray) -> np.ndarray:
+        """Distances for an array of lane keys, NaN where absent."""
+        positions = np.searchsorted(self._keys, keys)
+        found = positions < len(self._keys)
+        found[found] = self._keys[positions[found]] == keys[found]
+        miles = np.full(len(keys), np.nan)
+        miles[found] = self._miles[positions[found]]
+        return miles
+
+    def lookup_many(self, pairs: Iterable[Tuple[str, str]]) -> np.ndarray:
+        """Look up many lanes in one vectorized binary search.
+
+        Args:
+            pairs: (origin, destination) location string tuples
+
+        Returns:
+            float64 array of miles (rounded to 2 decimals), NaN where the
+            lane is not in the table
+        """
+        self._ensure_open()
+        pairs = list(pairs)
+        keys = np.fromiter((lane_hash(o, d) for o, d in pairs), dtype=np.uint64, count=len(pairs))
+        miles = self._find(keys)
+        if self.symmetric:
+            missing = np.isnan(miles)
+            if missing.any():
+                reverse = np.fromiter(
+                    (lane_hash(pairs[i][1], pairs[i][0]) for i in np.flatnonzero(missing)),
+                    dtype=np.uint64
+                )
+                miles[missing] = self._find(reverse)
+
+        found = int((~np.isnan(miles)).sum())
+        self.hits += found
+        self.misses += len(pairs) - found
+        return np.round(miles, 2)
+
+    def lookup(self, origin: str, destination: str) -> Optional[float]:
+        """Return the table distance for a lane in miles, or None."""
+        miles = self.lookup_many([(origin, destination)])[0]
+        return None if np.isnan(miles) else float(miles)
+
+    def stats(self) -> dict:
+        """Return table size and lookup counters."""
+        return {'path': str(self.path), 'lanes': len(self), 'hits': self.hits, 'misses': self.misses}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point for importing a lane table."""
+    parser = argparse.ArgumentParser(description='Import an O-D distance table into a binary lane index.')
+    parser.add_argument('source', help="CSV or Parquet file with origin, destination and distance_miles columns")
+    parser.add_argument('output', nargs='?', default=str(LaneTable.DEFAULT_PATH), help='Lane table to write')
+    args = parser.parse_args(argv)
+
+    count = build_lane_table(args.source, args.output)
+    print(f"Wrote {count} lanes to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""Canonical location strings so equivalent spellings share cache entries.
+
+"Austin, TX", "austin tx", "AUSTIN,TX" and "Austin, Texas" all become
+"Austin, TX"; a ZIP code is kept and normalized to five digits
+("Austin, Texas 78701-1234" -> "Austin, TX 78701"), since a ZIP centroid is
+a more precise location than the city's. Canonicalization is applied once
+where locations enter the system (the /calculate request and bulk uploads),
+and the lower-cased canonical form is the key of every distance cache and
+lane index.
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .gazetteer import (
+    COUNTRY_SUFFIXES, ZIP_PATTERN, normalize_place_name, split_state, strip_country, tokenize_place
+)
+
+
+# Common nicknames and abbreviations for major moving destinations
+DEFAULT_ALIASES = {
+    'nyc': 'New York, NY',
+    'new york city': 'New York, NY',
+    'manhattan': 'New York, NY',
+    'sf': 'San Francisco, CA',
+    'san fran': 'San Francisco, CA',
+    'dc': 'Washington, DC',
+    'washington dc': 'Washington, DC',
+    'washington d c': 'Washington, DC',
+    'philly': 'Philadelphia, PA',
+    'vegas': 'Las Vegas, NV',
+    'slc': 'Salt Lake City, UT',
+    'nola': 'New Orleans, LA',
+    'dfw': 'Dallas, TX',
+}
+
+# Canonical forms remembered per canonicalizer
+MEMO_SIZE = 100000
+
+
+def _title(tokens: List[str]) -> str:
+    return ' '.join(token.capitalize() for token in tokens)
+
+
+class LocationCanonicalizer:
+    """Turn free-form US location strings into one canonical spelling."""
+
+    def __init__(self, aliases: Optional[Dict[str, str]] = None):
+        """Initialize the canonicalizer.
+
+        Args:
+            aliases: Nickname -> canonical location overrides, matched on the
+                     lower-cased, punctuation-free input. Defaults to
+                     DEFAULT_ALIASES.
+        """
+        source = DEFAULT_ALIASES if aliases is None else aliases
+        self.aliases = {' '.join(tokenize_place(name)): target for name, target in source.items()}
+        self._memo: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def canonicalize(self, location: str) -> str:
+        """Return the canonical spelling of a location.
+
+        Args:
+            location: Location string as entered by the user
+
+        Returns:
+            "City, ST", "City, ST 12345", "12345" or, for street addresses,
+            "<street>, City, ST 12345". Strings without a recognizable state
+            are returned with whitespace and comma spacing normalized.
+        """
+        location = str(location)
+        canonical = self._memo.get(location)
+        if canonical is None:
+            canonical = self._canonicalize(location)
+            with self._lock:
+                if len(self._memo) >= MEMO_SIZE:
+                    self._memo.clear()
+                self._memo[location] = canonical
+        return canonical
+
+    def _canonicalize(self, location: str) -> str:
+        text = ' '.join(location.split())
+        if not text:
+            return ''
+
+        alias = self.aliases.get(' '.join(tokenize_place(text)))
+        if alias:
+            return alias
+
+        match = ZIP_PATTERN.search(text)
+        zip_code = match.group(1) if match else None
+        if match:
+            text = (text[:match.start()] + text[match.end():]).strip(' ,')
+
+        parts = [' '.join(part.split()) for part in text.split(',')]
+        parts = [part for part in parts if part]
+        while parts and tokenize_place(parts[-1]) in COUNTRY_SUFFIXES:
+            parts.pop()
+
+        place = self._city_state(parts)
+        canonical = ', '.join(parts if place is None else place)
+        return ' '.join(part for part in (canonical, zip_code) if part)
+
+    def _city_state(self, parts: List[str]) -> Optional[List[str]]:
+        """Canonicalize the trailing city/state of comma-separated parts.
+
+        Returns:
+            Parts with the tail replaced by "City" and "ST", or None if no
+            state could be recognized
+        """
+        if not parts:
+            return []
+
+        tail = strip_country(tokenize_place(parts[-1]))
+        city_tokens, state = split_state(tail)
+        if state is None:
+            return None
+
+        prefix = parts[:-1]
+        if not city_tokens and prefix:
+            # "Austin, TX": the city is the previous part
+            city_tokens = tokenize_place(prefix.pop())
+        elif not city_tokens:
+            # Bare state name; "New York" may also be the city, so keep the name
+            return [_title(tail)] if len(tail) > 1 else [state]
+
+        city = _title(normalize_place_name(city_tokens).split())
+        return prefix + [city, state]
+
+    def collapse_stats(self, lanes: Iterable[Tuple[str, str]]) -> Dict[str, float]:
+        """Measure how many distinct locations and lanes canonicalization merges.
+
+        Args:
+            lanes: Raw (origin, destination) pairs
+
+        Returns:
+            Dict with raw and canonical counts of distinct locations and
+            lanes, and the collapse ratio (raw / canonical) of each
+        """
+        lanes = list(lanes)
+        raw_locations = {location for lane in lanes for location in lane}
+        canonical_locations = {self.canonicalize(location) for location in raw_locations}
+        raw_lanes = set(lanes)
+        canonical_lanes = {(self.canonicalize(o), self.canonicalize(d)) for o, d in raw_lanes}
+        return {
+            'raw_locations': len(raw_locations),
+            'canonical_locations': len(canonical_locations),
+            'location_collapse_ratio': round(len(raw_locations) / len(canonical_locations), 3) if canonical_locations else 1.0,
+            'raw_lanes': len(raw_lanes),
+            'canonical_lanes': len(canonical_lanes),
+            'lane_collapse_ratio': round(len(raw_lanes) / len(canonical_lanes), 3) if canonical_lanes else 1.0,
+        }
+
+
+_default_canonicalizer: Optional[LocationCanonicalizer] = None
+
+
+def get_default_canonicalizer() -> LocationCanonicalizer:
+    """Return the process-wide canonicalizer with the default alias table."""
+    global _default_canonicalizer
+    if _default_canonicalizer is None:
+        _default_canonicalizer = LocationCanonicalizer()
+    return _default_canonicalizer
+
+
+def canonicalize_location(location: str) -> str:
+    """Canonicalize a location with the default canonicalizer."""
+    return get_default_canonicalizer().canonicalize(location)
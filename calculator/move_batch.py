@@ -0,0 +1,383 @@
+"""Columnar container for a batch of moves.
+
+Bulk uploads used to be walked with ``DataFrame.iterrows``, building a
+pandas Series and several Python objects per row just to normalize its
+inputs. A MoveBatch holds the normalized batch as typed columns instead:
+
+- ``weight_pounds`` and ``distance_miles`` as float64 arrays (a NaN
+  distance still has to be resolved),
+- ``include_insurance`` as a bool array,
+- ``origin``, ``destination``, ``packing_service`` and ``storage_option``
+  as pandas Categoricals (int codes into one array of distinct labels),
+- ``row_number`` and a per-row validation ``errors`` array.
+
+Normalization and validation run column by column with the same rules and
+messages as the per-row code did. Regions and states are derived once per
+distinct location when the batch is turned into a pricing frame (see
+vector_pricing.price_moves).
+
+Once priced, a batch also holds its results as columns: ``quotes`` lists
+each distinct calculate_should_cost result once and ``quote_index`` points
+every row at its quote (-1 for rows that failed, whose message is in
+``errors``). Row dicts are only built by ``result_rows`` for responses in
+the row format.
+"""
+
+import io
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+MISSING_DISTANCE_ERROR = "Could not calculate distance. Please provide distance manually."
+
+_TRUE_STRINGS = ('true', 'yes', '1', 'y')
+
+
+def _as_bool(value: Any) -> bool:
+    """Interpret an uploaded include_insurance cell."""
+    if isinstance(value, str):
+        return value.lower() in _TRUE_STRINGS
+    return bool(value)
+
+
+def _to_float(values: pd.Series, errors: np.ndarray) -> np.ndarray:
+    """Convert a column to float64, recording float() errors for unparseable cells."""
+    numbers = pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64)
+    # Cells pandas cannot parse get float()'s own verdict (and error message)
+    for position in np.flatnonzero(np.isnan(numbers) & values.notna().to_numpy()):
+        try:
+            numbers[position] = float(values.iloc[position])
+        except (TypeError, ValueError) as e:
+            if errors[position] is None:
+                errors[position] = str(e)
+    return numbers
+
+
+class MoveBatch:
+    """A batch of moves stored as typed columns."""
+
+    def __init__(
+        self,
+        row_number: Sequence[int],
+        origin: Sequence[str],
+        destination: Sequence[str],
+        distance_miles: Sequence[float],
+        weight_pounds: Sequence[float],
+        packing_service: Sequence[str],
+        storage_option: Sequence[str],
+        include_insurance: Sequence[bool],
+        errors: Optional[Sequence[Optional[str]]] = None
+    ):
+        """Initialize the batch from aligned columns.
+
+        Args:
+            row_number: Row numbers reported back to the user
+            origin: Origin locations
+            destination: Destination locations
+            distance_miles: Distances in miles (NaN if not yet resolved)
+            weight_pounds: Weights in pounds
+            packing_service: Packing service names
+            storage_option: Storage option names
+            include_insurance: Whether insurance is included
+            errors: Validation error per row (None for valid rows)
+        """
+        self.row_number = np.asarray(row_number, dtype=np.int64)
+        self.origin = pd.Categorical(origin)
+        self.destination = pd.Categorical(destination)
+        self.distance_miles = np.asarray(distance_miles, dtype=np.float64)
+        self.weight_pounds = np.asarray(weight_pounds, dtype=np.float64)
+        self.packing_service = pd.Categorical(packing_service)
+        self.storage_option = pd.Categorical(storage_option)
+        self.include_insurance = np.asarray(include_insurance, dtype=bool)
+        if errors is None:
+            errors = [None] * len(self.row_number)
+        self.errors = np.asarray(errors, dtype=object)
+        self.quote_index = np.full(len(self.row_number), -1, dtype=np.int64)
+        self.quotes: List[Dict[str, Any]] = []
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, first_row: int = 2) -> 'MoveBatch':
+        """Normalize and validate uploaded rows.
+
+        Args:
+            df: Rows with the bulk template columns (origin, destination,
+                weight and optional distance_miles, packing_service,
+                storage_option, include_insurance)
+            first_row: Row number of the first row (2 below a header row)
+
+        Returns:
+            MoveBatch with a validation error for each invalid row
+        """
+        count = len(df)
+
+        def column(name, default):
+            return df[name] if name in df.columns else pd.Series([default] * count, index=df.index, dtype=object)
+
+        def text(name, default):
+            # str() per cell like the per-row code (astype(str) keeps NaN as NaN)
+            return column(name, default).map(str).str.strip()
+
+        origin = text('origin', '')
+        destination = text('destination', '')
+        packing_service = text('packing_service', 'self_pack').str.lower()
+        storage_option = text('storage_option', 'no_storage').str.lower()
+
+        insurance = column('include_insurance', True)
+        include_insurance = insurance.map({value: _as_bool(value) for value in insurance.unique()})
+
+        # Error precedence matches validating one row at a time: an unreadable
+        # weight, then missing locations, then the weight, then the distance
+        weight_errors = np.full(count, None, dtype=object)
+        weight_pounds = _to_float(column('weight', 0), weight_errors)
+        errors = np.full(count, None, dtype=object)
+        distance_errors = np.full(count, None, dtype=object)
+
+        distance = column('distance_miles', None)
+        blank = distance.isna().to_numpy() | (distance == '').to_numpy()
+        distance_miles = _to_float(distance.where(~blank), distance_errors)
+        unreadable = np.not_equal(distance_errors, None)
+        errors[unreadable] = distance_errors[unreadable]
+
+        not_positive = weight_pounds <= 0
+        errors[not_positive] = [f"Weight must be greater than 0, got {weight}" for weight in weight_pounds[not_positive]]
+        errors[((origin == '') | (destination == '')).to_numpy()] = "Origin and destination are required"
+        unreadable = np.not_equal(weight_errors, None)
+        errors[unreadable] = weight_errors[unreadable]
+
+        return cls(
+            np.arange(first_row, first_row + count),
+            origin.to_numpy(dtype=object),
+            destination.to_numpy(dtype=object),
+            distance_miles,
+            weight_pounds,
+            packing_service.to_numpy(dtype=object),
+            storage_option.to_numpy(dtype=object),
+            include_insurance.to_numpy(dtype=bool),
+            errors
+        )
+
+    @classmethod
+    def from_moves(cls, moves: Iterable[Tuple], row_numbers: Optional[Sequence[int]] = None) -> 'MoveBatch':
+        """Build a batch from calculate_should_cost argument tuples.
+
+        Args:
+            moves: (origin, destination, distance_miles, weight_pounds,
+                   packing_service, storage_option, include_insurance)
+            row_numbers: Optional row numbers (default 1, 2, ...)
+        """
+        moves = list(moves)
+        columns = list(zip(*moves)) if moves else [()] * 7
+        if row_numbers is None:
+            row_numbers = range(1, len(moves) + 1)
+        distances = [np.nan if distance is None else distance for distance in columns[2]]
+        return cls(row_numbers, columns[0], columns[1], distances, *columns[3:])
+
+    @classmethod
+    def from_results(cls, results: Sequence[Dict[str, Any]]) -> 'MoveBatch':
+        """Build a priced batch from result dicts in the row format (see result_rows).
+
+        Args:
+            results: Result dicts, e.g. posted back by the bulk page
+
+        Returns:
+            MoveBatch whose quotes are the successful results
+        """
+        quotes = []
+        quote_index = []
+        columns = []
+        for result in results:
+            breakdown = result.get('breakdown', {})
+            if result.get('status') == 'failed':
+                quote_index.append(-1)
+            else:
+                quote_index.append(len(quotes))
+                quotes.append({key: value for key, value in result.items() if key not in ('row_number', 'status')})
+            columns.append((
+                result.get('row_number'),
+                result.get('origin', 'N/A'),
+                result.get('destination', 'N/A'),
+                result.get('distance_miles', np.nan),
+                result.get('weight_pounds', np.nan),
+                breakdown.get('packing_service', ''),
+                breakdown.get('storage_option', ''),
+                bool(breakdown.get('insurance_cost')),
+                result.get('error', 'Unknown error') if result.get('status') == 'failed' else None,
+            ))
+        batch = cls(*(zip(*columns) if columns else [()] * 9))
+        batch.quote_index = np.asarray(quote_index, dtype=np.int64)
+        batch.quotes = quotes
+        return batch
+
+    @classmethod
+    def from_excel(cls, source: Union[str, bytes, io.IOBase]) -> 'MoveBatch':
+        """Read an Excel workbook in the bulk template layout."""
+        if isinstance(source, bytes):
+            source = io.BytesIO(source)
+        return cls.from_frame(pd.read_excel(source))
+
+    @classmethod
+    def from_csv(cls, source: Union[str, bytes, io.IOBase]) -> 'MoveBatch':
+        """Read a CSV file in the bulk template layout."""
+        if isinstance(source, bytes):
+            source = io.BytesIO(source)
+        return cls.from_frame(pd.read_csv(source))
+
+    @classmethod
+    def from_json(cls, payload: Union[List[Dict[str, Any]], Dict[str, List[Any]]]) -> 'MoveBatch':
+        """Build a batch from JSON rows or JSON column arrays.
+
+        Args:
+            payload: Either a list of row objects or an object mapping each
+                     column name to an array of values
+
+        Returns:
+            MoveBatch numbered from row 1
+        """
+        return cls.from_frame(pd.DataFrame(payload), first_row=1)
+
+    def __len__(self) -> int:
+        return len(self.row_number)
+
+    @property
+    def valid(self) -> np.ndarray:
+        """Bool mask of the rows without a validation error."""
+        return np.equal(self.errors, None)
+
+    def take(self, indices) -> 'MoveBatch':
+        """Return the rows at ``indices`` (positions or a bool mask) as a new batch."""
+        batch = MoveBatch(
+            self.row_number[indices],
+            np.asarray(self.origin)[indices],
+            np.asarray(self.destination)[indices],
+            self.distance_miles[indices],
+            self.weight_pounds[indices],
+            np.asarray(self.packing_service)[indices],
+            np.asarray(self.storage_option)[indices],
+            self.include_insurance[indices],
+            self.errors[indices]
+        )
+        batch.quote_index = self.quote_index[indices]
+        batch.quotes = self.quotes
+        return batch
+
+    @property
+    def priced(self) -> np.ndarray:
+        """Bool mask of the rows with a quote."""
+        return self.quote_index >= 0
+
+    def labels(self) -> Tuple[List[str], List[str]]:
+        """Origins and destinations as reported for failed rows ('N/A' where missing)."""
+        return (
+            [location or 'N/A' for location in np.asarray(self.origin).tolist()],
+            [location or 'N/A' for location in np.asarray(self.destination).tolist()],
+        )
+
+    def result_rows(self, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Build result dicts of the row format for rows ``offset`` to ``offset + limit``.
+
+        Successful rows are their quote plus row_number and status; failed
+        rows carry the error, origin, destination and a zero total.
+        """
+        end = len(self) if limit is None else min(len(self), offset + limit)
+        origins, destinations = self.labels()
+        rows = []
+        for position in range(max(0, offset), end):
+            quote = int(self.quote_index[position])
+            row_number = int(self.row_number[position])
+            if quote >= 0:
+                rows.append({**self.quotes[quote], 'row_number': row_number, 'status': 'success'})
+            else:
+                rows.append({
+                    'row_number': row_number,
+                    'status': 'failed',
+                    'error': self.errors[position],
+                    'origin': origins[position],
+                    'destination': destinations[position],
+                    'total_should_cost': 0
+                })
+        return rows
+
+    def inputs(self) -> Iterator[Optional[Tuple]]:
+        """Yield each row's calculate_should_cost arguments as plain Python values.
+
+        The distance is None where it still has to be resolved; invalid rows
+        yield None.
+        """
+        columns = zip(
+            np.asarray(self.origin).tolist(),
+            np.asarray(self.destination).tolist(),
+            self.distance_miles.tolist(),
+            self.weight_pounds.tolist(),
+            np.asarray(self.packing_service).tolist(),
+            np.asarray(self.storage_option).tolist(),
+            self.include_insurance.tolist(),
+            self.errors.tolist()
+        )
+        for origin, destination, distance, weight, packing, storage, insurance, error in columns:
+            if error is not None:
+                yield None
+            else:
+                yield (origin, destination, None if distance != distance else distance, weight, packing, storage, insurance)
+
+    def lanes_to_resolve(self) -> List[Tuple[str, str]]:
+        """Distinct (origin, destination) lanes of valid rows without a distance."""
+        pending = self.valid & np.isnan(self.distance_miles)
+        if not pending.any():
+            return []
+        lanes = pd.DataFrame({
+            'origin': np.asarray(self.origin)[pending],
+            'destination': np.asarray(self.destination)[pending],
+        }).drop_duplicates()
+        return list(zip(lanes['origin'], lanes['destination']))
+
+    def with_distances(self, resolved: Dict[Tuple[str, str], Optional[float]]) -> 'MoveBatch':
+        """Return a copy with missing distances filled from ``resolved``.
+
+        Rows whose lane is still unresolved get MISSING_DISTANCE_ERROR.
+        """
+        batch = self.take(np.arange(len(self)))  # index arrays copy the columns
+        pending = np.flatnonzero(self.valid & np.isnan(self.distance_miles))
+        origins = np.asarray(self.origin)
+        destinations = np.asarray(self.destination)
+        for position in pending:
+            distance = resolved.get((origins[position], destinations[position]))
+            if distance is None:
+                batch.errors[position] = MISSING_DISTANCE_ERROR
+            else:
+                batch.distance_miles[position] = distance
+        return batch
+
+    def to_frame(self, calculator=None) -> pd.DataFrame:
+        """Return the batch as a DataFrame (categorical columns stay categorical).
+
+        Args:
+            calculator: Optional HouseholdGoodsCostCalculator; if given,
+                        origin/destination region and state columns are
+                        added, looked up once per distinct location
+
+        Returns:
+            DataFrame with row_number, the calculate_should_cost columns and
+            error, plus region/state columns with a calculator
+        """
+        frame = pd.DataFrame({
+            'row_number': self.row_number,
+            'origin': self.origin,
+            'destination': self.destination,
+            'distance_miles': self.distance_miles,
+            'weight_pounds': self.weight_pounds,
+            'packing_service': self.packing_service,
+            'storage_option': self.storage_option,
+            'include_insurance': self.include_insurance,
+            'error': self.errors,
+        })
+        if calculator is not None:
+            for side in ('origin', 'destination'):
+                locations = getattr(self, side)
+                categories = list(locations.categories)
+                for name, lookup in (('region', calculator._determine_region), ('state', calculator._extract_state_code)):
+                    labels = np.array([lookup(location) for location in categories] + [''], dtype=object)
+                    # Code -1 (missing) maps to the trailing ''
+                    frame[f'{side}_{name}'] = pd.Categorical(labels[locations.codes])
+        return frame
@@ -0,0 +1,128 @@
+"""Memoization of /calculate quotes.
+
+Identical quote requests are common (users re-click, integrations retry),
+so finished quotes are cached under a key derived from the canonical
+request inputs and the rate card version. The same key is the quote's
+ETag: a client that sends it back in If-None-Match gets a 304 without the
+quote being recomputed or re-sent.
+
+The rate card version is part of the key, so when the rate matrix is
+reloaded every cached quote misses; the in-process tier is also cleared
+then to free its memory. Custom rate overrides are part of the inputs, so
+each rate profile gets its own entries.
+"""
+
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from .shared_cache import MISS, TieredCache
+
+
+# Distance sources a quote may be memoized for; quotes priced on a
+# straight-line or estimated fallback are recomputed so they pick up the
+# driving distance once the provider answers again
+MEMOIZED_DISTANCE_SOURCES = ('manual', 'lane_table', 'cache', 'google')
+
+
+class QuoteCache:
+    """Quote cache bounded by memory, shared between workers through a store."""
+
+    DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+    DEFAULT_MAX_ENTRIES = 100000
+    DEFAULT_TTL_SECONDS = 24 * 3600
+
+    def __init__(
+        self,
+        calculator,
+        store=None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS
+    ):
+        """Initialize the cache.
+
+        Args:
+            calculator: HouseholdGoodsCostCalculator whose rate card version
+                        keys the quotes
+            store: Optional shared store (see shared_cache.open_shared_store)
+            max_bytes: Memory bound of the in-process tier (LRU eviction)
+            max_entries: Entry bound of the in-process tier
+            ttl_seconds: Lifetime of cached quotes
+        """
+        self.calculator = calculator
+        self.cache = TieredCache(
+            store,
+            'quote',
+            ttl_seconds=ttl_seconds,
+            local_entries=max_entries,
+            local_ttl_seconds=ttl_seconds,
+            local_max_bytes=max_bytes
+        )
+        self._version = calculator.rate_card_version
+        self._lock = threading.Lock()
+        self.invalidations = 0
+
+    def quote_key(self, inputs: Dict[str, Any]) -> str:
+        """Return the cache key (and ETag value) of a quote request.
+
+        Args:
+            inputs: Canonical quote inputs (JSON-serializable)
+
+        Returns:
+            32 hex characters
+        """
+        canonical = json.dumps(
+            {'inputs': inputs, 'rate_card': self.calculator.rate_card_version},
+            sort_keys=True,
+            separators=(',', ':')
+        )
+        return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _check_version(self):
+        """Drop in-process entries after the rate matrix has been reloaded."""
+        version = self.calculator.rate_card_version
+        if version == self._version:
+            return
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self.cache.local.clear()
+                self.invalidations += 1
+
+    def get(self, inputs: Dict[str, Any]) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Look up a memoized quote.
+
+        Args:
+            inputs: Canonical quote inputs
+
+        Returns:
+            (etag, response payload), or None if not cached
+        """
+        self._check_version()
+        key = self.quote_key(inputs)
+        payload = self.cache.get(key)
+        return None if payload is MISS else (key, payload)
+
+    def put(self, inputs: Dict[str, Any], payload: Dict[str, Any]) -> str:
+        """Memoize a quote.
+
+        Args:
+            inputs: Canonical quote inputs
+            payload: JSON-serializable response payload
+
+        Returns:
+            The quote's ETag value
+        """
+        self._check_version()
+        key = self.quote_key(inputs)
+        self.cache.set(key, payload)
+        return key
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-tier hit counters, memory use and invalidations."""
+        stats = self.cache.stats()
+        stats['rate_card_version'] = self._version
+        stats['invalidations'] = self.invalidations
+        return stats
@@ -0,0 +1,53 @@
+"""Index from rate card elements to the stored quotes that depend on them.
+
+When one cell of the transportation matrix or one state tax changes, only
+the quotes priced with that element move. Each stored quote records the
+rate card elements it depended on (see
+HouseholdGoodsCostCalculator.rate_elements); this index inverts that so the
+quotes affected by a set of changed elements (see changed_rate_paths) are
+found without repricing everything.
+"""
+
+from typing import Dict, Hashable, Iterable, Set, Tuple
+
+
+class RateDependencyIndex:
+    """Maps rate card paths to the keys of the quotes that depend on them."""
+
+    def __init__(self):
+        self._dependents: Dict[Tuple, Set[Hashable]] = {}
+        self._keys: Set[Hashable] = set()
+
+    def add(self, key: Hashable, elements: Iterable[Tuple]):
+        """Record that quote ``key`` depends on ``elements``."""
+        self._keys.add(key)
+        for element in elements:
+            self._dependents.setdefault(tuple(element), set()).add(key)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def affected(self, changed: Iterable[Tuple]) -> Set[Hashable]:
+        """Return the keys of quotes depending on any of the changed paths.
+
+        A change affects an element if either path contains the other: a
+        changed rate cell affects quotes depending on the whole table, and a
+        replaced table affects quotes depending on one of its cells.
+
+        Args:
+            changed: Changed rate card paths
+
+        Returns:
+            Set of affected quote keys
+        """
+        affected: Set[Hashable] = set()
+        changed = [tuple(path) for path in changed]
+        for path in changed:
+            # Elements the changed path lies within (including itself)
+            for length in range(1, len(path) + 1):
+                affected |= self._dependents.get(path[:length], set())
+        for element, keys in self._dependents.items():
+            # Elements within a changed (replaced) section
+            if any(len(element) > len(path) and element[:len(path)] == path for path in changed):
+                affected |= keys
+        return affected
@@ -0,0 +1,278 @@
+"""Per-provider token-bucket rate limiting with priority scheduling.
+
+Nominatim's usage policy allows about one request per second and the
+Google key has a per-second quota. ProviderRateLimiter hands out request
+tokens per provider; callers that have to wait queue up by priority, so
+interactive lookups are always served ahead of queued bulk lookups. A
+caller that cannot get a token within its wait budget gets
+RateLimitExceeded instead of blocking indefinitely.
+
+Buckets live in memory by default. Given a SQLite path, the bucket state is
+kept in that database and updated under an immediate transaction, so every
+worker process draws from the same budget.
+"""
+
+import contextvars
+import heapq
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+PRIORITY_INTERACTIVE = 'interactive'
+PRIORITY_BULK = 'bulk'
+
+# Lower rank is served first
+PRIORITY_RANK = {PRIORITY_INTERACTIVE: 0, PRIORITY_BULK: 1}
+
+# Requests per second per provider
+DEFAULT_RATES = {
+    'nominatim': float(os.environ.get('NOMINATIM_RATE_LIMIT', 1.0)),
+    'google': float(os.environ.get('GOOGLE_MAPS_RATE_LIMIT', 10.0)),
+}
+
+# Longest a caller waits for a token before giving up, in seconds
+DEFAULT_WAIT_BUDGETS = {
+    PRIORITY_INTERACTIVE: 2.0,
+    PRIORITY_BULK: 60.0,
+}
+
+_current_priority = contextvars.ContextVar('lookup_priority', default=PRIORITY_INTERACTIVE)
+
+
+@contextmanager
+def lookup_priority(priority: str):
+    """Run the enclosed lookups at the given priority ('interactive' or 'bulk')."""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> str:
+    """Return the lookup priority of the current context."""
+    return _current_priority.get()
+
+
+class RateLimitExceeded(Exception):
+    """Raised when no token became available within the caller's wait budget."""
+
+
+class TokenBucket:
+    """In-process token bucket."""
+
+    def __init__(self, rate: float, burst: float):
+        """Initialize a full bucket.
+
+        Args:
+            rate: Tokens added per second
+            burst: Bucket capacity
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+
+    def try_take(self) -> float:
+        """Take one token if available.
+
+        Returns:
+            0.0 if a token was taken, otherwise seconds until one is available
+        """
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return 0.0
+        return (1.0 - self._tokens) / self.rate
+
+
+class SharedTokenBucket:
+    """Token bucket stored in SQLite and shared by all worker processes."""
+
+    def __init__(self, path: str, provider: str, rate: float, burst: float):
+        """Initialize the bucket, creating its table if needed.
+
+        Args:
+            path: SQLite database path
+            provider: Provider name (row key)
+            rate: Tokens added per second
+            burst: Bucket capacity
+        """
+        self.path = str(path)
+        self.provider = provider
+        self.rate = rate
+        self.burst = burst
+        self._local = threading.local()
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection().execute('''
+            CREATE TABLE IF NOT EXISTS rate_buckets (
+                provider TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        ''')
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening one if needed."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def try_take(self) -> float:
+        """Take one token if available.
+
+        Returns:
+            0.0 if a token was taken, otherwise seconds until one is available
+        """
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            now = time.time()
+            row = conn.execute(
+                'SELECT tokens, updated_at FROM rate_buckets WHERE provider = ?', (self.provider,)
+            ).fetchone()
+            tokens = self.burst if row is None else min(
+                self.burst, row[0] + max(0.0, now - row[1]) * self.rate
+            )
+            wait = 0.0 if tokens >= 1.0 else (1.0 - tokens) / self.rate
+            if wait == 0.0:
+                tokens -= 1.0
+            conn.execute(
+                'INSERT OR REPLACE INTO rate_buckets (provider, tokens, updated_at) VALUES (?, ?, ?)',
+                (self.provider, tokens, now)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return wait
+
+
+class _ProviderQueue:
+    """Waiters for one provider, ordered by (priority rank, arrival)."""
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self.cond = threading.Condition()
+        self.waiting = []
+        self.sequence = itertools.count()
+        self.queued = {priority: 0 for priority in PRIORITY_RANK}
+        self.max_queue_depth = 0
+        self.granted = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+
+
+class ProviderRateLimiter:
+    """Token-bucket scheduler for external lookups, shared by all threads in a worker."""
+
+    def __init__(
+        self,
+        rates: Optional[Dict[str, float]] = None,
+        bursts: Optional[Dict[str, float]] = None,
+        wait_budgets: Optional[Dict[str, float]] = None,
+        path: Optional[str] = None
+    ):
+        """Initialize the limiter.
+
+        Args:
+            rates: Requests per second per provider (defaults to DEFAULT_RATES);
+                   providers not listed are not throttled
+            bursts: Bucket capacity per provider (defaults to one second of rate,
+                    at least 1)
+            wait_budgets: Maximum wait in seconds per priority
+            path: Optional SQLite path for bucket state shared across processes
+        """
+        self.rates = dict(DEFAULT_RATES if rates is None else rates)
+        bursts = bursts or {}
+        self.wait_budgets = {**DEFAULT_WAIT_BUDGETS, **(wait_budgets or {})}
+        self.path = path
+
+        self._queues: Dict[str, _ProviderQueue] = {}
+        for provider, rate in self.rates.items():
+            burst = bursts.get(provider, max(1.0, rate))
+            if path:
+                bucket = SharedTokenBucket(path, provider, rate, burst)
+            else:
+                bucket = TokenBucket(rate, burst)
+            self._queues[provider] = _ProviderQueue(bucket)
+
+    def acquire(self, provider: str, priority: Optional[str] = None, budget: Optional[float] = None) -> float:
+        """Block until a request to ``provider`` may be sent.
+
+        Args:
+            provider: Provider name, e.g. 'nominatim' or 'google'
+            priority: 'interactive' or 'bulk' (defaults to the current context's)
+            budget: Maximum seconds to wait (defaults to the priority's budget)
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            RateLimitExceeded: If no token is available within the budget
+        """
+        queue = self._queues.get(provider)
+        if queue is None:
+            return 0.0
+
+        priority = priority or current_priority()
+        budget = self.wait_budgets[priority] if budget is None else budget
+        start = time.monotonic()
+        deadline = start + budget
+
+        with queue.cond:
+            ticket = (PRIORITY_RANK[priority], next(queue.sequence))
+            heapq.heappush(queue.waiting, ticket)
+            queue.queued[priority] += 1
+            queue.max_queue_depth = max(queue.max_queue_depth, len(queue.waiting))
+            try:
+                while True:
+                    now = time.monotonic()
+                    # Only the head of the queue may take a token
+                    wait = queue.bucket.try_take() if queue.waiting[0] == ticket else None
+                    if wait == 0.0:
+                        waited = now - start
+                        queue.granted += 1
+                        queue.wait_seconds += waited
+                        return waited
+
+                    remaining = deadline - now
+                    if remaining <= 0 or (wait is not None and wait > remaining):
+                        queue.rejected += 1
+                        raise RateLimitExceeded(
+                            f"{provider} rate limit: no request slot within {budget:.1f}s ({priority})"
+                        )
+                    queue.cond.wait(remaining if wait is None else wait)
+            finally:
+                queue.waiting.remove(ticket)
+                heapq.heapify(queue.waiting)
+                queue.queued[priority] -= 1
+                queue.cond.notify_all()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return rate, queue depth and grant/reject counters per provider."""
+        stats = {}
+        for provider, queue in self._queues.items():
+            with queue.cond:
+                stats[provider] = {
+                    'rate_per_second': queue.bucket.rate,
+                    'burst': queue.bucket.burst,
+                    'queued': dict(queue.queued),
+                    'max_queue_depth': queue.max_queue_depth,
+                    'granted': queue.granted,
+                    'rejected': queue.rejected,
+                    'avg_wait_ms': round(queue.wait_seconds / queue.granted * 1000, 2) if queue.granted else 0.0,
+                }
+        return stats
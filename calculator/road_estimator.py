@@ -0,0 +1,244 @@
+"""Offline road-distance estimator calibrated from cached driving distances.
+
+Driving routes are longer than the straight line between two points by a
+"circuity factor" that depends mostly on the terrain and road network
+between them and on the trip length. The estimator learns median circuity
+factors per (region pair, distance band) from Google driving distances
+already stored in the DistanceCache and applies them to geodesic distance,
+so lanes can be priced on estimated driving miles without a paid API call.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .geo_vector import haversine_miles
+
+
+# Typical US road circuity when no calibration data is available
+DEFAULT_CIRCUITY = 1.2
+
+# Straight-line distance band edges in miles, aligned with the
+# transportation matrix distance brackets
+DISTANCE_BAND_EDGES = [100, 250, 500, 1000, 1500, 2500]
+
+# Ratios outside this range are treated as bad data (ferries, bad geocodes)
+MIN_CIRCUITY = 1.0
+MAX_CIRCUITY = 3.0
+
+# Lanes shorter than this are too noisy to learn from
+MIN_CALIBRATION_MILES = 5.0
+
+# Confidence ceiling for each level of the fallback hierarchy
+LEVEL_CONFIDENCE = {
+    'region_band': 1.0,
+    'band': 0.8,
+    'global': 0.6,
+    'default': 0.2,
+}
+
+
+def coordinate_region(latitude: float, longitude: float) -> str:
+    """Coarse terrain region for a coordinate.
+
+    Args:
+        latitude: Latitude in degrees
+        longitude: Longitude in degrees
+
+    Returns:
+        Region name such as 'west-north' or 'east-south', or 'pacific'
+        for Alaska and Hawaii
+    """
+    if longitude < -130:
+        return 'pacific'
+    if longitude < -104:
+        east_west = 'west'
+    elif longitude < -90:
+        east_west = 'central'
+    else:
+        east_west = 'east'
+    north_south = 'north' if latitude >= 37 else 'south'
+    return f'{east_west}-{north_south}'
+
+
+def region_pair(origin: Tuple[float, float], destination: Tuple[float, float]) -> str:
+    """Order-independent region pair key for a lane."""
+    regions = sorted([coordinate_region(*origin), coordinate_region(*destination)])
+    return '|'.join(regions)
+
+
+def distance_band(straight_miles: float) -> int:
+    """Index of the distance band containing a straight-line distance."""
+    return int(np.searchsorted(DISTANCE_BAND_EDGES, straight_miles, side='right'))
+
+
+class RoadDistanceEstimator:
+    """Estimate driving miles from geodesic miles using learned circuity factors."""
+
+    def __init__(self, min_samples: int = 5):
+        """Initialize an uncalibrated estimator.
+
+        Args:
+            min_samples: Minimum calibration lanes for a group to be used
+        """
+        self.min_samples = min_samples
+        self._groups: Dict[Tuple[str, Any], Dict[str, float]] = {}
+        self.sample_count = 0
+
+    @property
+    def is_calibrated(self) -> bool:
+        """Whether any calibration data has been loaded."""
+        return self.sample_count > 0
+
+    def fit(self, samples: Iterable[Tuple[Tuple[float, float], Tuple[float, float], float]]) -> int:
+        """Learn circuity factors from known driving distances.
+
+        Args:
+            samples: (origin_coords, destination_coords, driving_miles) tuples
+
+        Returns:
+            Number of samples used after filtering
+        """
+        samples = list(samples)
+        if not samples:
+            self._groups = {}
+            self.sample_count = 0
+            return 0
+
+        coords = np.array([(o[0], o[1], d[0], d[1]) for o, d, _ in samples], dtype=np.float64)
+        driving = np.array([miles for _, _, miles in samples], dtype=np.float64)
+        straight = haversine_miles(coords[:, 0], coords[:, 1], coords[:, 2], coords[:, 3])
+
+        usable = straight >= MIN_CALIBRATION_MILES
+        ratios = np.where(usable, driving / np.where(usable, straight, 1.0), np.nan)
+        usable &= (ratios >= MIN_CIRCUITY) & (ratios <= MAX_CIRCUITY)
+
+        grouped: Dict[Tuple[str, Any], List[float]] = {}
+        for i in np.flatnonzero(usable):
+            band = distance_band(straight[i])
+            pair = region_pair((coords[i, 0], coords[i, 1]), (coords[i, 2], coords[i, 3]))
+            ratio = float(ratios[i])
+            grouped.setdefault(('region_band', (pair, band)), []).append(ratio)
+            grouped.setdefault(('band', band), []).append(ratio)
+            grouped.setdefault(('global', None), []).append(ratio)
+
+        self._groups = {key: self._summarize(values) for key, values in grouped.items()}
+        self.sample_count = int(usable.sum())
+        return self.sample_count
+
+    def fit_from_cache(self, cache, locate: Callable[[str], Optional[Tuple[float, float]]], provider: str) -> int:
+        """Learn circuity factors from driving distances stored in a DistanceCache.
+
+        Args:
+            cache: DistanceCache holding cached driving distances
+            locate: Offline resolver from location key to coordinates; lanes
+                    it cannot resolve are skipped
+            provider: Cache provider name of the driving distances
+
+        Returns:
+            Number of samples used
+        """
+        samples = []
+        for origin, destination, miles in cache.iter_distances(provider):
+            origin_coords = locate(origin)
+            destination_coords = locate(destination)
+            if origin_coords is not None and destination_coords is not None:
+                samples.append((origin_coords, destination_coords, miles))
+        return self.fit(samples)
+
+    def _summarize(self, ratios: List[float]) -> Dict[str, float]:
+        values = np.asarray(ratios)
+        median = float(np.median(values))
+        q25, q75 = np.percentile(values, [25, 75])
+        return {
+            'factor': median,
+            'samples': len(values),
+            'spread': float((q75 - q25) / median),
+        }
+
+    def _lookup(self, pair: str, band: int) -> Tuple[str, Dict[str, float]]:
+        for level, key in (('region_band', (pair, band)), ('band', band), ('global', None)):
+            group = self._groups.get((level, key))
+            if group and group['samples'] >= self.min_samples:
+                return level, group
+        return 'default', {'factor': DEFAULT_CIRCUITY, 'samples': 0, 'spread': 1.0}
+
+    def estimate(
+        self,
+        origin: Tuple[float, float],
+        destination: Tuple[float, float],
+        straight_miles: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Estimate the driving distance of a lane.
+
+        Args:
+            origin: Origin (latitude, longitude)
+            destination: Destination (latitude, longitude)
+            straight_miles: Precomputed straight-line miles (computed if omitted)
+
+        Returns:
+            Dict with 'distance_miles', 'geodesic_miles', 'circuity_factor',
+            'confidence' (0-1), 'samples' and 'basis' (the calibration level used)
+        """
+        if straight_miles is None:
+            straight_miles = float(haversine_miles(origin[0], origin[1], destination[0], destination[1]))
+
+        level, group = self._lookup(region_pair(origin, destination), distance_band(straight_miles))
+        samples = group['samples']
+        confidence = LEVEL_CONFIDENCE[level] * (samples / (samples + self.min_samples)) / (1.0 + 4.0 * group['spread'])
+        if level == 'default':
+            confidence = LEVEL_CONFIDENCE['default']
+
+        return {
+            'distance_miles': round(straight_miles * group['factor'], 2),
+            'geodesic_miles': round(straight_miles, 2),
+            'circuity_factor': round(group['factor'], 3),
+            'confidence': round(confidence, 2),
+            'samples': samples,
+            'basis': level,
+        }
+
+    def export_state(self) -> Dict[str, Any]:
+        """Return the learned calibration as JSON-serializable data."""
+        return {
+            'sample_count': self.sample_count,
+            'groups': [
+                {'level': level, 'key': key, **group}
+                for (level, key), group in self._groups.items()
+            ],
+        }
+
+    def load_state(self, state: Dict[str, Any]) -> int:
+        """Restore a calibration saved with export_state.
+
+        Args:
+            state: Dict returned by export_state (possibly round-tripped through JSON)
+
+        Returns:
+            Number of calibration samples restored
+        """
+        groups = {}
+        for group in state.get('groups', []):
+            key = group['key']
+            groups[(group['level'], tuple(key) if isinstance(key, list) else key)] = {
+                'factor': group['factor'],
+                'samples': group['samples'],
+                'spread': group['spread'],
+            }
+        self._groups = groups
+        self.sample_count = int(state.get('sample_count', 0))
+        return self.sample_count
+
+    def summary(self) -> Dict[str, Any]:
+        """Return calibration size and the learned per-band factors."""
+        return {
+            'samples': self.sample_count,
+            'global_factor': self._groups.get(('global', None), {}).get('factor', DEFAULT_CIRCUITY),
+            'band_factors': {
+                band: group['factor']
+                for (level, band), group in sorted(
+                    ((k, v) for k, v in self._groups.items() if k[0] == 'band'),
+                    key=lambda item: item[0][1]
+                )
+            },
+        }
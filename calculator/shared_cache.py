@@ -0,0 +1,457 @@
+"""Two-tier cache shared by every worker process.
+
+Each gunicorn worker (and each waitress process) keeps its own in-process
+LRU tier in front of a shared store that all workers read and write, so a
+value computed by one worker is a cheap hit for its siblings:
+
+    in-process LRU  ->  shared store  ->  miss
+
+The shared store speaks the subset of the Redis client API the cache needs
+(get/set with ``ex``/``nx``, mget, delete, exists, ping, flushdb).
+SQLiteSharedStore implements it on a local SQLite database in WAL mode, so
+a single host needs no extra service; set SHARED_CACHE_URL to a
+``redis://`` URL (and install the ``redis`` package) to share the cache
+between hosts instead.
+"""
+
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, List, Optional, Tuple, Union
+
+
+# Returned by get() when a key is not cached (None is a valid cached value)
+MISS = object()
+
+DEFAULT_LOCAL_ENTRIES = 10000
+
+# In-process entries are re-read from the shared store after this many
+# seconds, which bounds how long a worker can serve a value its siblings
+# have replaced
+DEFAULT_LOCAL_TTL_SECONDS = 300
+
+
+class LocalLRU:
+    """Thread-safe, size-bounded in-process LRU with per-entry expiry."""
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_LOCAL_ENTRIES,
+        ttl_seconds: float = DEFAULT_LOCAL_TTL_SECONDS,
+        max_bytes: Optional[int] = None
+    ):
+        """Initialize an empty tier.
+
+        Args:
+            max_entries: Maximum entries kept (0 disables the tier)
+            ttl_seconds: Longest time an entry is served
+            max_bytes: Optional bound on the total size passed to set()
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = MISS) -> Any:
+        """Return a live entry (marking it recently used) or ``default``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at, size = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.bytes -= size
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, expires_at: Optional[float] = None, size: int = 0):
+        """Store an entry.
+
+        Args:
+            key: Entry key
+            value: Value to store
+            expires_at: Unix time the value stops being valid; the entry is
+                        served until the earlier of this and the tier TTL
+            size: Approximate size of the value in bytes (for max_bytes)
+        """
+        if self.max_entries <= 0 or (self.max_bytes is not None and size > self.max_bytes):
+            return
+        local_expiry = time.time() + self.ttl_seconds
+        expires_at = local_expiry if expires_at is None else min(expires_at, local_expiry)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[2]
+            self._entries[key] = (value, expires_at, size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self.bytes > self.max_bytes
+            ):
+                self.bytes -= self._entries.popitem(last=False)[1][2]
+
+    def pop(self, key: Hashable):
+        """Remove an entry if present."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.bytes -= entry[2]
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _to_bytes(value: Union[bytes, str, int, float]) -> bytes:
+    """Encode a value the way the Redis client does."""
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode('utf-8')
+
+
+class SQLiteSharedStore:
+    """Local stand-in for a Redis server, backed by SQLite in WAL mode.
+
+    Values are returned as bytes, like redis-py without decode_responses.
+    Expired keys are dropped lazily on read and in periodic sweeps, which
+    also trim the store to ``max_entries`` least recently used keys (like
+    Redis with an allkeys-lru maxmemory policy).
+    """
+
+    DEFAULT_PATH = Path(__file__).parent.parent / "data" / "shared_cache.sqlite3"
+    # Room for the distance cache's geocodes and lanes plus the quote cache
+    DEFAULT_MAX_ENTRIES = 500000
+
+    # How many writes between sweeps of expired keys
+    SWEEP_INTERVAL = 512
+
+    # How many read keys are recorded as accessed at once
+    TOUCH_FLUSH_INTERVAL = 256
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """Open the store, creating the database if needed.
+
+        Args:
+            path: SQLite database path (defaults to data/shared_cache.sqlite3)
+            max_entries: Keys kept before the least recently used are evicted
+        """
+        self.path = str(path or self.DEFAULT_PATH)
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes_since_sweep = 0
+        self._pending_touches: Dict[str, None] = {}
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS shared_cache (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    expires_at REAL,
+                    last_access REAL NOT NULL DEFAULT 0
+                )
+            ''')
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(shared_cache)')]
+            if 'last_access' not in columns:
+                conn.execute('ALTER TABLE shared_cache ADD COLUMN last_access REAL NOT NULL DEFAULT 0')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_shared_cache_access ON shared_cache (last_access)')
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening one if needed."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the value of a key, or None if it is missing or expired."""
+        return self.mget([key])[0]
+
+    def mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        """Return the values of several keys (None where missing)."""
+        if not keys:
+            return []
+        placeholders = ', '.join('?' * len(keys))
+        rows = self._connection().execute(
+            f'''SELECT key, value FROM shared_cache
+                WHERE key IN ({placeholders}) AND (expires_at IS NULL OR expires_at > ?)''',
+            list(keys) + [time.time()]
+        ).fetchall()
+        found = {row[0]: bytes(row[1]) for row in rows}
+        if found:
+            self._defer_touch(found)
+        return [found.get(key) for key in keys]
+
+    def set(self, key: str, value: Union[bytes, str, int, float], ex: Optional[float] = None, nx: bool = False) -> Optional[bool]:
+        """Set a key.
+
+        Args:
+            key: Key name
+            value: Value (str and numbers are stored UTF-8 encoded)
+            ex: Expiry in seconds (None keeps the key until deleted)
+            nx: Only set the key if it does not exist
+
+        Returns:
+            True if the key was set, None if ``nx`` prevented it
+        """
+        now = time.time()
+        expires_at = now + ex if ex is not None else None
+        conn = self._connection()
+        with conn:
+            if nx:
+                conn.execute('DELETE FROM shared_cache WHERE key = ? AND expires_at <= ?', (key, now))
+                changed = conn.execute(
+                    'INSERT OR IGNORE INTO shared_cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)',
+                    (key, _to_bytes(value), expires_at, now)
+                ).rowcount
+            else:
+                changed = conn.execute(
+                    'INSERT OR REPLACE INTO shared_cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)',
+                    (key, _to_bytes(value), expires_at, now)
+                ).rowcount
+        self._after_write()
+        return True if changed else None
+
+    def delete(self, *keys: str) -> int:
+        """Delete keys; returns the number that existed."""
+        if not keys:
+            return 0
+        conn = self._connection()
+        with conn:
+            return conn.execute(
+                f'DELETE FROM shared_cache WHERE key IN ({", ".join("?" * len(keys))})', keys
+            ).rowcount
+
+    def exists(self, *keys: str) -> int:
+        """Return how many of the given keys exist."""
+        return sum(value is not None for value in self.mget(list(keys)))
+
+    def ping(self) -> bool:
+        """Check that the store is reachable."""
+        self._connection().execute('SELECT 1')
+        return True
+
+    def flushdb(self) -> bool:
+        """Delete every key."""
+        conn = self._connection()
+        with conn:
+            conn.execute('DELETE FROM shared_cache')
+        return True
+
+    def _defer_touch(self, keys: Dict[str, Any]):
+        """Queue read keys for their last access time (recorded in batches)."""
+        with self._lock:
+            self._pending_touches.update(dict.fromkeys(keys))
+            due = len(self._pending_touches) >= self.TOUCH_FLUSH_INTERVAL
+        if due:
+            self.flush_touches()
+
+    def flush_touches(self):
+        """Record the last access time of queued read keys."""
+        with self._lock:
+            pending, self._pending_touches = self._pending_touches, {}
+        if not pending:
+            return
+        now = time.time()
+        conn = self._connection()
+        try:
+            with conn:
+                conn.executemany(
+                    'UPDATE shared_cache SET last_access = ? WHERE key = ?', [(now, key) for key in pending]
+                )
+        except sqlite3.OperationalError:
+            pass
+
+    def _after_write(self):
+        with self._lock:
+            self._writes_since_sweep += 1
+            due = self._writes_since_sweep >= self.SWEEP_INTERVAL
+            if due:
+                self._writes_since_sweep = 0
+        if due:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop expired keys and trim the store to max_entries (LRU).
+
+        Returns:
+            Number of keys removed
+        """
+        self.flush_touches()
+        conn = self._connection()
+        with conn:
+            removed = conn.execute('DELETE FROM shared_cache WHERE expires_at <= ?', (time.time(),)).rowcount
+            excess = conn.execute('SELECT COUNT(*) FROM shared_cache').fetchone()[0] - self.max_entries
+            if excess > 0:
+                removed += conn.execute(
+                    '''DELETE FROM shared_cache WHERE key IN (
+                           SELECT key FROM shared_cache ORDER BY last_access ASC LIMIT ?
+                       )''',
+                    (excess,)
+                ).rowcount
+        return removed
+
+
+def open_shared_store(url: Optional[str] = None):
+    """Open the configured shared store.
+
+    Args:
+        url: ``redis://`` / ``rediss://`` URL, a SQLite path, or None to use
+             the SHARED_CACHE_URL env var and then the local SQLite store
+
+    Returns:
+        A redis.Redis client or a SQLiteSharedStore
+    """
+    url = url or os.environ.get('SHARED_CACHE_URL')
+    if url and url.startswith(('redis://', 'rediss://', 'unix://')):
+        try:
+            import redis
+        except ImportError:
+            print("SHARED_CACHE_URL points at Redis but the redis package is not installed; "
+                  "using the local SQLite shared cache")
+        else:
+            return redis.Redis.from_url(url)
+        url = None
+    return SQLiteSharedStore(url)
+
+
+class TieredCache:
+    """JSON value cache with an in-process tier in front of a shared store."""
+
+    def __init__(
+        self,
+        store,
+        namespace: str,
+        ttl_seconds: Optional[float] = None,
+        local_entries: int = DEFAULT_LOCAL_ENTRIES,
+        local_ttl_seconds: float = DEFAULT_LOCAL_TTL_SECONDS,
+        local_max_bytes: Optional[int] = None
+    ):
+        """Initialize the cache.
+
+        Args:
+            store: Shared store with the Redis get/set/delete interface, or
+                   None for an in-process cache only
+            namespace: Key prefix separating this cache from others in the store
+            ttl_seconds: Lifetime of shared entries (None: until evicted/deleted)
+            local_entries: Size of the in-process tier (0 disables it)
+            local_ttl_seconds: Longest time an in-process entry is served
+            local_max_bytes: Optional memory bound of the in-process tier,
+                             measured as serialized JSON size
+        """
+        self.store = store
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.local = LocalLRU(local_entries, local_ttl_seconds, local_max_bytes)
+        self._lock = threading.Lock()
+        self._counters = {'local_hits': 0, 'shared_hits': 0, 'misses': 0, 'writes': 0, 'shared_errors': 0}
+
+    def _key(self, key: str) -> str:
+        return f'{self.namespace}:{key}'
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    def get(self, key: str, default: Any = MISS) -> Any:
+        """Look a key up in the in-process tier, then the shared store.
+
+        Shared-store errors are counted and treated as misses, so an
+        unavailable store only costs cache hits.
+
+        Returns:
+            The cached value, or ``default`` if not cached
+        """
+        return self.lookup(key, default)[0]
+
+    def lookup(self, key: str, default: Any = MISS) -> Tuple[Any, Optional[str]]:
+        """Like get, but also report the tier that answered.
+
+        Returns:
+            (value, 'local' or 'shared'), or (``default``, None) if not cached
+        """
+        value = self.local.get(key)
+        if value is not MISS:
+            self._count('local_hits')
+            return value, 'local'
+
+        try:
+            raw = self.store.get(self._key(key)) if self.store is not None else None
+        except Exception as e:
+            print(f"Shared cache read failed ({self.namespace}): {e}")
+            self._count('shared_errors')
+            raw = None
+        if raw is None:
+            self._count('misses')
+            return default, None
+
+        value = json.loads(raw)
+        self.local.set(key, value, size=len(raw))
+        self._count('shared_hits')
+        return value, 'shared'
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        """Store a JSON-serializable value in both tiers.
+
+        Args:
+            key: Cache key (unique within the namespace)
+            value: JSON-serializable value
+            ttl_seconds: Lifetime overriding the cache default
+        """
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        payload = json.dumps(value, separators=(',', ':'))
+        self.local.set(key, value, None if ttl is None else time.time() + ttl, size=len(payload))
+        self._count('writes')
+        if self.store is None:
+            return
+        try:
+            ex = ttl
+            if ttl is not None and not isinstance(self.store, SQLiteSharedStore):
+                # Redis takes whole seconds; the in-process tier keeps the exact expiry
+                ex = max(1, math.ceil(ttl))
+            self.store.set(self._key(key), payload, ex=ex)
+        except Exception as e:
+            print(f"Shared cache write failed ({self.namespace}): {e}")
+            self._count('shared_errors')
+
+    def delete(self, key: str):
+        """Remove a key from both tiers (other workers' in-process copies expire on their own)."""
+        self.local.pop(key)
+        if self.store is None:
+            return
+        try:
+            self.store.delete(self._key(key))
+        except Exception as e:
+            print(f"Shared cache delete failed ({self.namespace}): {e}")
+            self._count('shared_errors')
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit counters per tier for this process."""
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters['local_hits'] + counters['shared_hits'] + counters['misses']
+        hits = counters['local_hits'] + counters['shared_hits']
+        return {
+            'in_process': {'hits': counters['local_hits'], 'entries': len(self.local), 'bytes': self.local.bytes},
+            'shared': {'hits': counters['shared_hits'], 'errors': counters['shared_errors']},
+            'misses': counters['misses'],
+            'writes': counters['writes'],
+            'hit_ratio': round(hits / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,126 @@
+"""Single-flight coalescing of identical in-flight lookups.
+
+When several threads ask for the same key at the same time, only the first
+one (the leader) does the work; the others block until it finishes and
+receive the same result, or the same exception.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+
+class InFlightCall:
+    """Handle for one in-flight lookup that followers can wait on."""
+
+    __slots__ = ('_event', 'value', 'error')
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+    def wait(self, timeout: Optional[float] = None) -> Any:
+        """Block until the leader finishes.
+
+        Args:
+            timeout: Seconds to wait, or None to wait indefinitely
+
+        Returns:
+            The leader's result
+
+        Raises:
+            TimeoutError: If the leader has not finished within ``timeout``
+            Exception: Whatever the leader raised
+        """
+        if not self._event.wait(timeout):
+            raise TimeoutError('in-flight lookup did not finish in time')
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class SingleFlight:
+    """Registry of in-flight calls keyed by lookup key, shared by all threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, InFlightCall] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def acquire(self, keys: Iterable[Hashable]) -> Tuple[Dict[Hashable, InFlightCall], Dict[Hashable, InFlightCall]]:
+        """Claim leadership of every key that is not already in flight.
+
+        Every led key must later be passed to ``release``.
+
+        Args:
+            keys: Lookup keys (duplicates are ignored)
+
+        Returns:
+            Tuple of (led, joined): calls this caller must perform, and calls
+            already in flight elsewhere that it should wait on
+        """
+        led: Dict[Hashable, InFlightCall] = {}
+        joined: Dict[Hashable, InFlightCall] = {}
+        with self._lock:
+            for key in keys:
+                if key in led or key in joined:
+                    continue
+                call = self._calls.get(key)
+                if call is None:
+                    call = self._calls[key] = InFlightCall()
+                    led[key] = call
+                    self.executed += 1
+                else:
+                    joined[key] = call
+                    self.coalesced += 1
+        return led, joined
+
+    def release(self, key: Hashable, value: Any = None, error: Optional[BaseException] = None):
+        """Publish the result of a led call and wake its followers.
+
+        Args:
+            key: Key returned as led by ``acquire``
+            value: Result handed to followers
+            error: Exception re-raised in followers instead of a result
+        """
+        with self._lock:
+            call = self._calls.pop(key, None)
+        if call is None:
+            return
+        call.value = value
+        call.error = error
+        call._event.set()
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run ``fn`` unless an identical call is in flight, then share its result.
+
+        Args:
+            key: Lookup key identifying identical calls
+            fn: Function performing the lookup
+            *args: Positional arguments for ``fn``
+            **kwargs: Keyword arguments for ``fn``
+
+        Returns:
+            Result of ``fn`` (from this call or the one already in flight)
+        """
+        led, joined = self.acquire([key])
+        if key in joined:
+            return joined[key].wait()
+
+        try:
+            value = fn(*args, **kwargs)
+        except BaseException as e:
+            self.release(key, error=e)
+            raise
+        self.release(key, value)
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        """Return counts of executed and coalesced calls and current in-flight keys."""
+        with self._lock:
+            return {
+                'executed': self.executed,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._calls),
+            }
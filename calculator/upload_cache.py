@@ -0,0 +1,173 @@
+"""Content-addressed cache of parsed bulk uploads and their priced results.
+
+The bulk page posts the same workbook to /bulk/validate and then to
+/bulk/process, and coordinators often re-submit a workbook unchanged.
+Uploads are identified by the SHA-256 of their bytes; the parsed and
+canonicalized frame is kept under that hash, and priced results are kept
+under the hash plus a variant key (rate card version and custom rates).
+
+Entries are pickled to a local directory so every worker process on the
+host shares them (validate and process may be served by different
+workers); the directory is bounded by total size and the least recently
+used files are removed first. A small in-process LRU tier sits in front.
+"""
+
+import hashlib
+import os
+import pickle
+import re
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .shared_cache import MISS, LocalLRU
+
+
+class UploadCache:
+    """Bounded on-disk cache of parsed uploads keyed by content hash."""
+
+    DEFAULT_DIRECTORY = Path(__file__).parent.parent / "data" / "upload_cache"
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+    # Parsed uploads / result sets kept in each process
+    DEFAULT_LOCAL_ENTRIES = 16
+    
+    # Entry names are dot-separated words (e.g. '<hash>.frame'); anything
+    # else, such as a path separator or '..', never reaches the filesystem
+    NAME_PATTERN = re.compile(r'[0-9A-Za-z_-]+(\.[0-9A-Za-z_-]+)*')
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        local_entries: int = DEFAULT_LOCAL_ENTRIES
+    ):
+        """Initialize the cache.
+
+        Args:
+            directory: Cache directory. Defaults to the UPLOAD_CACHE_DIR env
+                       var, then data/upload_cache.
+            max_bytes: Total size of the cache files before LRU removal
+            local_entries: Entries kept in the in-process tier
+        """
+        self.directory = Path(directory or os.environ.get('UPLOAD_CACHE_DIR') or self.DEFAULT_DIRECTORY)
+        self.max_bytes = max_bytes
+        self.local = LocalLRU(local_entries, ttl_seconds=3600)
+        self._lock = threading.Lock()
+        self._counters = {'local_hits': 0, 'disk_hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+
+    @staticmethod
+    def content_hash(data: bytes) -> str:
+        """Return the hex SHA-256 of uploaded bytes."""
+        return hashlib.sha256(data).hexdigest()
+
+    def _path(self, name: str) -> Path:
+        """Return the file of an entry.
+        
+        Raises:
+            ValueError: If the name is not a valid entry name
+        """
+        if not self.NAME_PATTERN.fullmatch(name):
+            raise ValueError(f"Invalid upload cache entry name: {name!r}")
+        return self.directory / f'{name}.pkl'
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def get(self, name: str) -> Any:
+        """Return a cached object, or MISS.
+
+        Args:
+            name: Entry name, e.g. '<hash>.frame'
+
+        Returns:
+            The stored object (shared with other callers in this process;
+            do not mutate it) or MISS
+        """
+        path = self._path(name)
+        value = self.local.get(name)
+        if value is not MISS:
+            self._count('local_hits')
+            return value
+
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            os.utime(path)
+        except OSError:
+            self._count('misses')
+            return MISS
+        except Exception as e:
+            # A damaged entry is dropped and recomputed by the caller
+            print(f"Discarding unreadable upload cache entry {name}: {e}")
+            self._discard(path)
+            self._count('misses')
+            return MISS
+        self.local.set(name, value)
+        self._count('disk_hits')
+        return value
+
+    def put(self, name: str, value: Any):
+        """Store an object, then trim the directory to max_bytes.
+
+        Args:
+            name: Entry name, e.g. '<hash>.frame'
+            value: Picklable object
+        """
+        path = self._path(name)
+        self.local.set(name, value)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Each writer (process or thread) gets its own temporary file
+        tmp = None
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=f'{path.name}.', suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Upload cache write failed: {e}")
+            if tmp is not None:
+                self._discard(Path(tmp))
+            return
+        except Exception:
+            self._discard(Path(tmp))
+            raise
+        self._count('writes')
+        self._trim()
+
+    @staticmethod
+    def _discard(path: Path):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+    def _trim(self):
+        """Remove least recently used files until the directory fits max_bytes."""
+        files = []
+        for path in self.directory.glob('*.pkl'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            self.local.pop(path.name[:-len('.pkl')])
+            total -= size
+            self._count('evictions')
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit counters per tier and the cache size on disk."""
+        with self._lock:
+            stats = dict(self._counters)
+        stats['bytes'] = sum(path.stat().st_size for path in self.directory.glob('*.pkl')) if self.directory.exists() else 0
+        return stats
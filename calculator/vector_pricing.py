@@ -0,0 +1,210 @@
+"""Vectorized pricing of many moves under one or more rate cards.
+
+HouseholdGoodsCostCalculator.calculate_should_cost prices one move and
+builds a full breakdown; comparing a quarter of moves under two rate cards
+that way means two full passes. Here the rate-card-independent parts of a
+batch (regions and states of each location) are derived once with
+``move_frame``, and ``price_moves`` applies the calculate_should_cost
+formula to whole columns with NumPy for any rate matrix and custom rate
+overrides. Totals agree with calculate_should_cost to the cent.
+"""
+
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .move_batch import MoveBatch
+
+
+def move_frame(calculator, moves: Union[MoveBatch, Iterable[Tuple]]) -> pd.DataFrame:
+    """Build the columnar input of price_moves.
+
+    Args:
+        calculator: HouseholdGoodsCostCalculator used for region and state
+                    lookups (these do not depend on the rate card)
+        moves: MoveBatch, or calculate_should_cost argument tuples
+               (origin, destination, distance_miles, weight_pounds,
+               packing_service, storage_option, include_insurance)
+
+    Returns:
+        DataFrame of the moves plus origin/destination region and state
+    """
+    batch = moves if isinstance(moves, MoveBatch) else MoveBatch.from_moves(moves)
+    return batch.to_frame(calculator)
+
+
+def bracket_index(values: np.ndarray, brackets: list) -> Tuple[np.ndarray, np.ndarray]:
+    """Index of the first bracket containing each value, and whether one does.
+
+    Values outside every bracket get index 0, like calculate_should_cost.
+    Works on arrays of any shape.
+    """
+    index = np.zeros(np.shape(values), dtype=np.int64)
+    found = np.zeros(np.shape(values), dtype=bool)
+    # Walk backwards so the first matching bracket wins
+    for idx in range(len(brackets) - 1, -1, -1):
+        inside = (values >= brackets[idx]['min']) & (values <= brackets[idx]['max'])
+        index[inside] = idx
+        found |= inside
+    return index, found
+
+
+def bracket_labels(index: np.ndarray, found: np.ndarray, brackets: list) -> np.ndarray:
+    """Labels of bracket_index results ('Unknown' outside every bracket)."""
+    labels = np.array([bracket['label'] for bracket in brackets], dtype=object)
+    return np.where(found, labels[index], 'Unknown')
+
+
+def _tier_adjustment(values: np.ndarray, tiers: list) -> np.ndarray:
+    """Adjustment of the first tier whose maximum is not exceeded (else the last tier)."""
+    adjustment = np.full(np.shape(values), tiers[-1]['rate_adjustment'], dtype=np.float64)
+    for tier in reversed(tiers):
+        limit = tier['max_pounds' if 'max_pounds' in tier else 'max_miles']
+        adjustment[values <= limit] = tier['rate_adjustment']
+    return adjustment
+
+
+def rate_factors(frame: pd.DataFrame, matrix: Dict, custom_rates: Optional[Dict] = None) -> Dict[str, np.ndarray]:
+    """Per-move rates that do not depend on weight or distance.
+
+    Args:
+        frame: Output of move_frame
+        matrix: Rate matrix
+        custom_rates: Optional custom rate overrides
+
+    Returns:
+        Dict of arrays aligned with ``frame``: packing_multiplier,
+        storage_multiplier, regional_adjustment, insured, tariff_rate and
+        state_tax_rate
+    """
+    if custom_rates is None:
+        custom_rates = {}
+
+    def lookup(column, rate):
+        # Looked up once per distinct value, then mapped onto the column
+        values = frame[column]
+        return values.map({value: rate(value) for value in values.unique()}).to_numpy(dtype=np.float64)
+
+    def multiplier(name):
+        return custom_rates.get(name, matrix['service_multipliers'].get(name, 1.0))
+
+    regional_adjustments = matrix['regional_adjustments']
+    origin_adjustment = lookup('origin_region', lambda region: regional_adjustments.get(region, 1.0))
+    dest_adjustment = lookup('destination_region', lambda region: regional_adjustments.get(region, 1.0))
+
+    tariff_config = matrix.get('tariffs', {})
+    origin_state = frame['origin_state'].to_numpy(dtype=object)
+    dest_state = frame['destination_state'].to_numpy(dtype=object)
+    both_states = (origin_state != '') & (dest_state != '')
+    tariff_rate = np.zeros(len(frame), dtype=np.float64)
+    if tariff_config.get('enable_interstate_tariffs', False):
+        interstate_rate = custom_rates.get('interstate_tariff_rate', tariff_config.get('interstate_tariff_rate', 0.03))
+        intrastate_rate = custom_rates.get('intrastate_tariff_rate', tariff_config.get('intrastate_tariff_rate', 0.0))
+        tariff_rate[both_states & (origin_state != dest_state)] = interstate_rate
+        tariff_rate[both_states & (origin_state == dest_state)] = intrastate_rate
+
+    state_taxes = tariff_config.get('state_specific_taxes', {})
+    return {
+        'packing_multiplier': lookup('packing_service', multiplier),
+        'storage_multiplier': lookup('storage_option', multiplier),
+        'regional_adjustment': (origin_adjustment + dest_adjustment) / 2,
+        'insured': frame['include_insurance'].to_numpy(dtype=bool),
+        'tariff_rate': tariff_rate,
+        'state_tax_rate': lookup(
+            'destination_state',
+            lambda state: custom_rates.get(f'state_tax_{state}', state_taxes[state]) if state in state_taxes else 0.0
+        ),
+    }
+
+
+def price_arrays(
+    weight: np.ndarray,
+    distance: np.ndarray,
+    factors: Dict[str, np.ndarray],
+    matrix: Dict,
+    custom_rates: Optional[Dict] = None
+) -> Dict[str, np.ndarray]:
+    """Apply the calculate_should_cost formula to weight and distance arrays.
+
+    ``weight``, ``distance`` and the arrays of ``factors`` broadcast against
+    each other, so factors of N moves shaped (N, 1) price an (N, samples)
+    grid of sampled weights and distances in one pass.
+
+    Args:
+        weight: Weights in pounds
+        distance: Distances in miles
+        factors: Output of rate_factors (possibly reshaped)
+        matrix: Rate matrix
+        custom_rates: Optional custom rate overrides
+
+    Returns:
+        Dict of arrays: total (unrounded), transportation_cost,
+        weight_index, distance_index, weight_found, distance_found and
+        applied_minimum
+    """
+    if custom_rates is None:
+        custom_rates = {}
+    weight, distance = np.broadcast_arrays(np.asarray(weight, dtype=np.float64), np.asarray(distance, dtype=np.float64))
+
+    transportation_matrix = matrix.get('transportation_matrix', {})
+    weight_idx, weight_found = bracket_index(weight, transportation_matrix['weight_brackets'])
+    distance_idx, distance_found = bracket_index(distance, transportation_matrix['distance_brackets'])
+    transportation_cost = np.asarray(transportation_matrix['rates'], dtype=np.float64)[weight_idx, distance_idx]
+
+    material_cost = weight * matrix['base_rate_per_pound']
+    adjusted_cost = transportation_cost + material_cost * _tier_adjustment(weight, matrix['weight_tiers'])
+    service_cost = adjusted_cost * factors['packing_multiplier'] * factors['storage_multiplier']
+    regional_cost = service_cost * factors['regional_adjustment']
+
+    insurance_rate = custom_rates.get('insurance_per_1000', matrix['insurance_rate_per_1000'])
+    insurance_cost = np.where(factors['insured'], weight / 1000 * insurance_rate, 0.0)
+
+    subtotal_base = regional_cost + insurance_cost
+    fuel_charge = subtotal_base * custom_rates.get('fuel_surcharge', matrix['fuel_surcharge'])
+    subtotal = subtotal_base - subtotal_base * custom_rates.get('discount', 0.0) + fuel_charge
+
+    total = subtotal + insurance_cost + (subtotal * factors['tariff_rate'] + subtotal * factors['state_tax_rate'])
+    minimum_charge = custom_rates.get('minimum_charge', matrix['minimum_charge'])
+    applied_minimum = total < minimum_charge
+
+    return {
+        'total': np.where(applied_minimum, minimum_charge, total),
+        'transportation_cost': transportation_cost,
+        'weight_index': weight_idx,
+        'distance_index': distance_idx,
+        'weight_found': weight_found,
+        'distance_found': distance_found,
+        'applied_minimum': applied_minimum,
+    }
+
+
+def price_moves(frame: pd.DataFrame, matrix: Dict, custom_rates: Optional[Dict] = None) -> pd.DataFrame:
+    """Price every move of a move_frame under one rate matrix.
+
+    Args:
+        frame: Output of move_frame
+        matrix: Rate matrix (same layout as household_goods_matrix.json)
+        custom_rates: Optional custom rate overrides
+
+    Returns:
+        DataFrame aligned with ``frame`` with total_should_cost,
+        transportation_cost, weight_bracket, distance_bracket and
+        applied_minimum_charge
+    """
+    priced = price_arrays(
+        frame['weight_pounds'].to_numpy(dtype=np.float64),
+        frame['distance_miles'].to_numpy(dtype=np.float64),
+        rate_factors(frame, matrix, custom_rates),
+        matrix,
+        custom_rates
+    )
+    transportation_matrix = matrix.get('transportation_matrix', {})
+    return pd.DataFrame({
+        # Python's round, like calculate_should_cost (np.round can differ by a cent)
+        'total_should_cost': [round(total, 2) for total in priced['total'].tolist()],
+        'transportation_cost': priced['transportation_cost'],
+        'weight_bracket': bracket_labels(priced['weight_index'], priced['weight_found'], transportation_matrix['weight_brackets']),
+        'distance_bracket': bracket_labels(priced['distance_index'], priced['distance_found'], transportation_matrix['distance_brackets']),
+        'applied_minimum_charge': priced['applied_minimum'],
+    }, index=frame.index)
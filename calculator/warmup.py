@@ -0,0 +1,245 @@
+"""Cache snapshots and boot-time warm-up for the distance service.
+
+A fresh deploy or a recycled gunicorn worker starts cold: the geocode and
+distance cache may live on a disk that did not survive the deploy, the road
+estimator has to be recalibrated from the whole cache, and the gazetteer is
+only read on the first lookup. WarmupManager periodically writes a compact
+snapshot of the hottest cache rows and the road estimator calibration to
+local disk (and again on shutdown), and at boot it:
+
+1. loads the snapshot back into the cache and restores the calibration
+   (or calibrates from the cache if the snapshot has none),
+2. loads the gazetteer,
+3. optionally pre-resolves the most frequently used lanes of recent
+   history at bulk priority, so expired entries are refreshed before
+   interactive traffic asks for them.
+
+``ready`` turns True once warm-up has finished (or failed; a worker that
+could not warm up still serves requests, only more slowly).
+"""
+
+import atexit
+import gzip
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .distance_service import PROVIDER_GOOGLE_DRIVING
+from .location_canonicalizer import canonicalize_location
+from .rate_limiter import PRIORITY_BULK, lookup_priority
+
+
+SNAPSHOT_VERSION = 1
+
+STATE_PENDING = 'pending'
+STATE_WARMING = 'warming'
+STATE_READY = 'ready'
+
+# Hottest rows per cache table kept in a snapshot
+DEFAULT_SNAPSHOT_ENTRIES = 20000
+
+# Lanes pre-resolved at boot (0 disables pre-resolving)
+DEFAULT_TOP_LANES = int(os.environ.get('WARMUP_TOP_LANES', 200))
+
+# Only lanes used within this many days count as recent history
+DEFAULT_HISTORY_DAYS = float(os.environ.get('WARMUP_HISTORY_DAYS', 7))
+
+# Seconds between periodic snapshots (0 disables them)
+DEFAULT_SNAPSHOT_INTERVAL = float(os.environ.get('CACHE_SNAPSHOT_INTERVAL', 900))
+
+
+class WarmupManager:
+    """Saves cache snapshots and warms a DistanceService up from them."""
+
+    DEFAULT_PATH = Path(__file__).parent.parent / "data" / "cache_snapshot.json.gz"
+
+    def __init__(
+        self,
+        distance_service,
+        path: Optional[str] = None,
+        top_lanes: int = DEFAULT_TOP_LANES,
+        history_days: float = DEFAULT_HISTORY_DAYS,
+        snapshot_interval: float = DEFAULT_SNAPSHOT_INTERVAL,
+        snapshot_entries: int = DEFAULT_SNAPSHOT_ENTRIES
+    ):
+        """Initialize the manager (nothing is loaded until warm_up or start).
+
+        Args:
+            distance_service: DistanceService to warm up
+            path: Snapshot file. Defaults to the CACHE_SNAPSHOT_PATH env var,
+                  then data/cache_snapshot.json.gz.
+            top_lanes: Most frequent recent lanes to pre-resolve at boot
+            history_days: Age limit in days of the lanes considered recent
+            snapshot_interval: Seconds between periodic snapshots (0 disables)
+            snapshot_entries: Maximum rows per cache table in a snapshot
+        """
+        self.distance_service = distance_service
+        self.path = Path(path or os.environ.get('CACHE_SNAPSHOT_PATH') or self.DEFAULT_PATH)
+        self.top_lanes = top_lanes
+        self.history_days = history_days
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_entries = snapshot_entries
+
+        self.state = STATE_PENDING
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._save_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._status: Dict[str, Any] = {}
+
+    @property
+    def ready(self) -> bool:
+        """Whether warm-up has finished."""
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until warm-up has finished; returns ``ready``."""
+        return self._ready.wait(timeout)
+
+    def save(self) -> Optional[Dict[str, int]]:
+        """Write a snapshot of the cache and road estimator calibration.
+
+        The file is written to a temporary name and renamed, so readers never
+        see a partial snapshot.
+
+        Returns:
+            Rows written per table, or None if there is nothing to snapshot
+        """
+        cache = self.distance_service.cache
+        estimator = self.distance_service.road_estimator
+        if cache is None and estimator is None:
+            return None
+
+        with self._save_lock:
+            snapshot: Dict[str, Any] = {'version': SNAPSHOT_VERSION, 'created_at': time.time()}
+            if cache is not None:
+                snapshot['cache'] = cache.export_entries(self.snapshot_entries)
+            if estimator is not None and estimator.is_calibrated:
+                snapshot['road_estimator'] = estimator.export_state()
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f'{self.path.name}.{os.getpid()}.tmp')
+            with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+                json.dump(snapshot, f)
+            os.replace(tmp, self.path)
+
+        written = {table: len(rows) for table, rows in snapshot.get('cache', {}).items()}
+        self._status['last_snapshot_at'] = snapshot['created_at']
+        return written
+
+    def _read_snapshot(self) -> Optional[Dict[str, Any]]:
+        """Read the snapshot file, or None if it is missing or unusable."""
+        if not self.path.exists():
+            return None
+        try:
+            with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable cache snapshot {self.path}: {e}")
+            return None
+        if snapshot.get('version') != SNAPSHOT_VERSION:
+            print(f"Ignoring cache snapshot {self.path}: unsupported version {snapshot.get('version')}")
+            return None
+        return snapshot
+
+    def load(self) -> Dict[str, Any]:
+        """Load the snapshot into the cache and road estimator.
+
+        Returns:
+            Dict with 'restored' rows per table and 'estimator_samples'
+            (restored or freshly calibrated)
+        """
+        service = self.distance_service
+        snapshot = self._read_snapshot() or {}
+        result: Dict[str, Any] = {'restored': {}, 'estimator_samples': 0}
+
+        if service.cache is not None and snapshot.get('cache'):
+            result['restored'] = service.cache.import_entries(snapshot['cache'])
+
+        if service.road_estimator is not None:
+            if snapshot.get('road_estimator'):
+                result['estimator_samples'] = service.road_estimator.load_state(snapshot['road_estimator'])
+                print(f"Road distance estimator restored from snapshot ({result['estimator_samples']} lanes)")
+            else:
+                result['estimator_samples'] = service.calibrate_road_estimator()
+        return result
+
+    def recent_lanes(self) -> List[Tuple[str, str]]:
+        """Most frequently used driving lanes of recent history."""
+        cache = self.distance_service.cache
+        if cache is None or self.top_lanes <= 0:
+            return []
+        since = time.time() - self.history_days * 24 * 3600
+        # Cache keys are lower-cased; send providers the canonical spelling
+        return [
+            (canonicalize_location(origin), canonicalize_location(destination))
+            for origin, destination in cache.top_lanes(PROVIDER_GOOGLE_DRIVING, self.top_lanes, since)
+        ]
+
+    def warm_up(self) -> Dict[str, Any]:
+        """Run the warm-up steps and mark the manager ready.
+
+        Returns:
+            Warm-up status (see status)
+        """
+        self.state = STATE_WARMING
+        start = time.monotonic()
+        self._status['started_at'] = time.time()
+        try:
+            self._status.update(self.load())
+
+            gazetteer = self.distance_service.gazetteer
+            if gazetteer is not None:
+                gazetteer.load()
+
+            lanes = self.recent_lanes()
+            if lanes:
+                with lookup_priority(PRIORITY_BULK):
+                    distances = self.distance_service.calculate_distances(lanes)
+                self._status['pre_resolved_lanes'] = sum(1 for miles in distances if miles is not None)
+        except Exception as e:
+            # A cold worker is still a working worker
+            print(f"Cache warm-up failed: {e}")
+            self._status['error'] = str(e)
+        finally:
+            self._status['warmup_seconds'] = round(time.monotonic() - start, 3)
+            self.state = STATE_READY
+            self._ready.set()
+        print(f"Cache warm-up finished in {self._status['warmup_seconds']:.1f}s")
+        return self.status()
+
+    def _run(self):
+        self.warm_up()
+        if self.snapshot_interval <= 0:
+            return
+        while not self._stop.wait(self.snapshot_interval):
+            try:
+                self.save()
+            except Exception as e:
+                print(f"Cache snapshot failed: {e}")
+
+    def start(self):
+        """Warm up in a background thread, then snapshot periodically and at exit."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='cache-warmup', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Stop periodic snapshots and write a final snapshot."""
+        self._stop.set()
+        if not self.ready:
+            # Never overwrite a good snapshot with a half-restored cache
+            return
+        try:
+            self.save()
+        except Exception as e:
+            print(f"Cache snapshot failed: {e}")
+
+    def status(self) -> Dict[str, Any]:
+        """Return warm-up state, timings and counts for /health."""
+        return {'state': self.state, 'ready': self.ready, 'snapshot_path': str(self.path), **self._status}
@@ -2,7 +2,13 @@
 // Handles file upload, validation, processing, and results display
 
 let currentFile = null;
+let currentFileHash = null;
+let currentJobId = null;
 let currentResults = null;
+let currentResultId = null;
+
+// Rows per page of columnar results
+const RESULTS_PAGE_SIZE = 1000;
 
 const uploadArea = document.getElementById('uploadArea');
 const fileInput = document.getElementById('fileInput');
@@ -64,6 +70,9 @@ function handleFileSelection(file) {
     }
     
     currentFile = file;
+    currentFileHash = null;
+    currentJobId = null;
+    currentResultId = null;
     
     // Show file info
     fileName.textContent = file.name;
@@ -82,6 +91,9 @@ function handleFileSelection(file) {
 
 function clearFile() {
     currentFile = null;
+    currentFileHash = null;
+    currentJobId = null;
+    currentResultId = null;
     fileInput.value = '';
     fileInfo.style.display = 'none';
     uploadArea.style.display = 'flex';
@@ -91,6 +103,11 @@ function clearFile() {
     hideError();
 }
 
+// Session storage key of the server-issued job id of a workbook
+function jobStorageKey(file) {
+    return 'bulkJob:' + file.name;
+}
+
 async function validateFile(file) {
     try {
         const formData = new FormData();
@@ -104,6 +121,11 @@ async function validateFile(file) {
         const data = await response.json();
         
         if (data.success && data.validation) {
+            // Lets /bulk/process reuse the parse done during validation
+            currentFileHash = data.validation.file_hash || null;
+            // Re-uploads of a workbook in this browser session continue the job the
+            // server issued for it; any other upload starts the new job issued here
+            currentJobId = sessionStorage.getItem(jobStorageKey(file)) || data.validation.job_id || null;
             displayValidationResults(data.validation);
         } else {
             showError(data.error || 'Validation failed');
@@ -177,6 +199,16 @@ async function processFile() {
     try {
         const formData = new FormData();
         formData.append('file', currentFile);
+        if (currentFileHash) {
+            formData.append('file_hash', currentFileHash);
+        }
+        // Re-uploads of the same workbook only reprice rows that changed
+        if (currentJobId) {
+            formData.append('job_id', currentJobId);
+        }
+        // Columnar results are far smaller to send and parse; later pages are fetched separately
+        formData.append('format', 'columnar');
+        formData.append('page_size', RESULTS_PAGE_SIZE);
         
         // Collect custom rate settings and add to form data
         const customRates = {
@@ -212,10 +244,17 @@ async function processFile() {
         const data = await response.json();
         
         if (data.success) {
+            if (data.job_id) {
+                sessionStorage.setItem(jobStorageKey(currentFile), data.job_id);
+            }
+            const totalRows = data.results.total_rows;
+            data.results = decodeColumnar(data.results);
+            currentResultId = data.result_id || null;
             updateProgress(100, 'Complete!');
             setTimeout(() => {
                 progressSection.style.display = 'none';
                 displayResults(data);
+                loadRemainingResults(totalRows);
             }, 500);
         } else {
             progressSection.style.display = 'none';
@@ -236,13 +275,99 @@ function updateProgress(percent, text) {
     document.getElementById('progressText').textContent = text + ` (${percent}%)`;
 }
 
+// Rebuild result objects from a columnar page (one header, one array per field;
+// see calculator/columnar.py)
+function decodeColumnar(page) {
+    const rowCount = page.rows;
+    const rows = [];
+    for (let i = 0; i < rowCount; i++) {
+        rows.push({});
+    }
+    const columnIndex = {};
+    page.columns.forEach((name, column) => {
+        columnIndex[name] = column;
+    });
+    page.columns.forEach(name => {
+        // Aliased columns share the values (and dictionary) of another column
+        const source = name in page.aliases ? page.aliases[name] : name;
+        const values = page.data[columnIndex[source]];
+        const labels = page.dictionaries[source];
+        const constant = name in page.constants;
+        const dot = name.indexOf('.');
+        const key = dot === -1 ? name : name.slice(0, dot);
+        const field = dot === -1 ? null : name.slice(dot + 1);
+        for (let i = 0; i < rowCount; i++) {
+            let value = constant ? page.constants[name] : values[i];
+            if (value === null) continue;
+            if (labels && !constant) value = labels[value];
+            if (field === null) {
+                rows[i][key] = value;
+            } else {
+                (rows[i][key] = rows[i][key] || {})[field] = value;
+            }
+        }
+    });
+    return rows;
+}
+
+// Fetch the rows after the first page and append them to the table
+async function loadRemainingResults(totalRows) {
+    const resultId = currentResultId;
+    if (!resultId) return;
+    
+    for (let offset = currentResults.length; offset < totalRows; offset += RESULTS_PAGE_SIZE) {
+        const response = await fetch(`/bulk/results/${resultId}?offset=${offset}&limit=${RESULTS_PAGE_SIZE}`);
+        const data = await response.json();
+        // Stop if the results were replaced by another upload or expired
+        if (!data.success || resultId !== currentResultId) {
+            if (!data.success) showError(data.error || 'Could not load remaining results');
+            return;
+        }
+        const rows = decodeColumnar(data.results);
+        currentResults.push(...rows);
+        document.getElementById('resultsTableBody').insertAdjacentHTML('beforeend', rows.map(resultRowHTML).join(''));
+    }
+}
+
+function resultRowHTML(result) {
+    const statusClass = result.status === 'success' ? 'success' : 'failed';
+    const statusIcon = result.status === 'success' ? '✓' : '✗';
+    
+    if (result.status === 'failed') {
+        return `
+            <tr class="${statusClass}">
+                <td>${result.row_number}</td>
+                <td><span class="status-badge ${statusClass}">${statusIcon} FAILED</span></td>
+                <td>${result.origin}</td>
+                <td>${result.destination}</td>
+                <td>-</td>
+                <td>-</td>
+                <td>-</td>
+                <td class="error-cell">${result.error}</td>
+            </tr>
+        `;
+    }
+    return `
+        <tr class="${statusClass}">
+            <td>${result.row_number}</td>
+            <td><span class="status-badge ${statusClass}">${statusIcon} SUCCESS</span></td>
+            <td>${result.origin}</td>
+            <td>${result.destination}</td>
+            <td>${result.distance_miles.toLocaleString()} mi</td>
+            <td>${result.weight_pounds.toLocaleString()} lbs</td>
+            <td class="cost-cell">$${result.total_should_cost.toLocaleString('en-US', {minimumFractionDigits: 2, maximumFractionDigits: 2})}</td>
+            <td><button onclick="showRowDetails(${result.row_number})" class="details-btn">View</button></td>
+        </tr>
+    `;
+}
+
 function displayResults(data) {
     currentResults = data.results;
     const summary = data.summary;
     const errors = data.errors || [];
     
     // Display summary stats
-    const summaryHTML = `
+    let summaryHTML = `
         <div class="stat-card">
             <div class="stat-label">Total Rows</div>
             <div class="stat-value">${summary.total_rows}</div>
@@ -260,6 +385,15 @@ function displayResults(data) {
             <div class="stat-value">${summary.success_rate}</div>
         </div>
     `;
+    const diff = data.diff;
+    if (diff && diff.has_previous_run) {
+        summaryHTML += `
+        <div class="stat-card">
+            <div class="stat-label">Changed Since Last Upload</div>
+            <div class="stat-value">${diff.new_rows.length + diff.changed_rows.length}</div>
+        </div>
+        `;
+    }
     document.getElementById('summaryStats').innerHTML = summaryHTML;
     
     // Display errors if any
@@ -276,39 +410,7 @@ function displayResults(data) {
     }
     
     // Display results table
-    let tableHTML = '';
-    currentResults.forEach(result => {
-        const statusClass = result.status === 'success' ? 'success' : 'failed';
-        const statusIcon = result.status === 'success' ? '✓' : '✗';
-        
-        if (result.status === 'failed') {
-            tableHTML += `
-                <tr class="${statusClass}">
-                    <td>${result.row_number}</td>
-                    <td><span class="status-badge ${statusClass}">${statusIcon} FAILED</span></td>
-                    <td>${result.origin}</td>
-                    <td>${result.destination}</td>
-                    <td>-</td>
-                    <td>-</td>
-                    <td>-</td>
-                    <td class="error-cell">${result.error}</td>
-                </tr>
-            `;
-        } else {
-            tableHTML += `
-                <tr class="${statusClass}">
-                    <td>${result.row_number}</td>
-                    <td><span class="status-badge ${statusClass}">${statusIcon} SUCCESS</span></td>
-                    <td>${result.origin}</td>
-                    <td>${result.destination}</td>
-                    <td>${result.distance_miles.toLocaleString()} mi</td>
-                    <td>${result.weight_pounds.toLocaleString()} lbs</td>
-                    <td class="cost-cell">$${result.total_should_cost.toLocaleString('en-US', {minimumFractionDigits: 2, maximumFractionDigits: 2})}</td>
-                    <td><button onclick="showRowDetails(${result.row_number})" class="details-btn">View</button></td>
-                </tr>
-            `;
-        }
-    });
+    const tableHTML = currentResults.map(resultRowHTML).join('');
     
     document.getElementById('resultsTableBody').innerHTML = tableHTML;
     
@@ -402,10 +504,11 @@ function downloadResults() {
     form.action = '/bulk/download/excel';
     form.target = '_blank';
     
+    // Stored results are downloaded by id rather than sending every row back
     const input = document.createElement('input');
     input.type = 'hidden';
-    input.name = 'results';
-    input.value = JSON.stringify(currentResults);
+    input.name = currentResultId ? 'result_id' : 'results';
+    input.value = currentResultId || JSON.stringify(currentResults);
     
     form.appendChild(input);
     document.body.appendChild(form);
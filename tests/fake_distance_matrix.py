@@ -0,0 +1,162 @@
+"""Local stand-ins for the Google Distance Matrix and Nominatim APIs used by tests."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+MILES_TO_METERS = 1609.344
+
+
+class _Server(ThreadingHTTPServer):
+    # The default backlog of 5 drops bursts of concurrent connects
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class FakeDistanceMatrixServer:
+    """Serve Distance Matrix style JSON responses from a lookup table.
+
+    Distances are looked up in ``distances`` keyed by (origin, destination)
+    in miles; unknown pairs come back with element status ``NOT_FOUND``.
+    Setting ``status`` makes every request fail with that top-level status,
+    and ``latency`` adds a fixed delay (seconds) to every response.
+
+    The same server answers Nominatim ``/search`` queries from ``geocodes``
+    (location -> (lat, lon)), so geocoding can be exercised offline too.
+
+    Connections are kept alive (HTTP/1.1). HTTP status codes appended to
+    ``http_errors`` are returned, one per request, before normal responses.
+    """
+
+    def __init__(self, distances=None, status='OK', latency=0.0, geocodes=None):
+        self.distances = distances or {}
+        self.geocodes = geocodes or {}
+        self.status = status
+        self.latency = latency
+        self.requests = []
+        self.geocode_requests = []
+        self.http_errors = []
+        self.attempts = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = _Server(('127.0.0.1', 0), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}/maps/api/distancematrix/json'
+
+    @property
+    def nominatim_domain(self):
+        host, port = self._server.server_address
+        return f'{host}:{port}'
+
+    @property
+    def element_count(self):
+        with self._lock:
+            return sum(len(o) * len(d) for o, d in self.requests)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def build_response(self, origins, destinations):
+        if self.status != 'OK':
+            return {'status': self.status, 'rows': []}
+
+        rows = []
+        for origin in origins:
+            elements = []
+            for destination in destinations:
+                miles = self.distances.get((origin, destination))
+                if miles is None:
+                    elements.append({'status': 'NOT_FOUND'})
+                else:
+                    meters = int(round(miles * MILES_TO_METERS))
+                    elements.append({
+                        'status': 'OK',
+                        'distance': {'text': f'{miles:,.0f} mi', 'value': meters},
+                        'duration': {'text': '1 hour', 'value': 3600}
+                    })
+            rows.append({'elements': elements})
+
+        return {
+            'status': 'OK',
+            'origin_addresses': origins,
+            'destination_addresses': destinations,
+            'rows': rows
+        }
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body are separate writes; avoid delayed-ACK stalls on keep-alive
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with fake._lock:
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                try:
+                    self._handle()
+                finally:
+                    with fake._lock:
+                        fake.in_flight -= 1
+
+            def _handle(self):
+                with fake._lock:
+                    fake.attempts += 1
+                    error = fake.http_errors.pop(0) if fake.http_errors else None
+                if error is not None:
+                    self.send_response(error)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                if url.path.endswith('/search'):
+                    location = query.get('q', [''])[0]
+                    with fake._lock:
+                        fake.geocode_requests.append(location)
+                    coords = fake.geocodes.get(location)
+                    payload = [] if coords is None else [{
+                        'lat': str(coords[0]), 'lon': str(coords[1]), 'display_name': location
+                    }]
+                else:
+                    origins = query.get('origins', [''])[0].split('|')
+                    destinations = query.get('destinations', [''])[0].split('|')
+                    with fake._lock:
+                        fake.requests.append((origins, destinations))
+                    payload = fake.build_response(origins, destinations)
+
+                if fake.latency:
+                    time.sleep(fake.latency)
+
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,134 @@
+"""Unit tests and throughput harness for the async distance service."""
+
+import unittest
+import asyncio
+import time
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from calculator.distance_service import DistanceService
+from calculator.async_distance_service import AsyncDistanceService, SyncDistanceFacade
+from tests.fake_distance_matrix import FakeDistanceMatrixServer
+
+
+LATENCY = 0.1
+LANES = [(f'Origin {i}', f'Destination {i}') for i in range(12)]
+
+
+def make_service(server, **kwargs):
+    """DistanceService pointed at the stand-in server for both APIs."""
+    return DistanceService(
+        google_api_key=kwargs.pop('google_api_key', 'test-key'),
+        google_api_url=server.url,
+        nominatim_domain=server.nominatim_domain,
+        nominatim_scheme='http',
+        use_gazetteer=False,
+        **kwargs
+    )
+
+
+class TestAsyncDistanceService(unittest.TestCase):
+    """Test cases for AsyncDistanceService against a latency-injecting stand-in."""
+
+    def setUp(self):
+        """Start a stand-in server that answers slowly."""
+        distances = {lane: 100.0 + i for i, lane in enumerate(LANES)}
+        geocodes = {
+            'Austin, TX': (30.2672, -97.7431),
+            'Dallas, TX': (32.7767, -96.7970),
+            'Houston, TX': (29.7604, -95.3698),
+        }
+        self.server = FakeDistanceMatrixServer(distances, latency=LATENCY, geocodes=geocodes).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def run_async(self, service, coroutine_factory):
+        async def runner():
+            async with service:
+                return await coroutine_factory(service)
+        return asyncio.run(runner())
+
+    def test_results_match_sync_service(self):
+        """Test that async and sync services agree."""
+        sync_service = make_service(self.server)
+        expected = [sync_service.calculate_distance(o, d) for o, d in LANES[:3]]
+
+        service = AsyncDistanceService(make_service(self.server))
+        actual = self.run_async(service, lambda s: asyncio.gather(*(
+            s.calculate_distance(o, d) for o, d in LANES[:3]
+        )))
+
+        self.assertEqual(actual, expected)
+
+    def test_concurrent_lookups_throughput(self):
+        """Measure the throughput gain of concurrent over sequential lookups."""
+        sync_service = make_service(self.server)
+        start = time.perf_counter()
+        for origin, destination in LANES:
+            sync_service.calculate_distance(origin, destination)
+        sequential = time.perf_counter() - start
+
+        service = AsyncDistanceService(make_service(self.server), max_concurrency=len(LANES))
+        start = time.perf_counter()
+        self.run_async(service, lambda s: asyncio.gather(*(
+            s.calculate_distance(o, d) for o, d in LANES
+        )))
+        concurrent = time.perf_counter() - start
+
+        print(f"\n{len(LANES)} lookups at {LATENCY * 1000:.0f} ms latency: "
+              f"sequential {sequential:.2f}s, concurrent {concurrent:.2f}s "
+              f"({sequential / concurrent:.1f}x)")
+        self.assertGreater(sequential / concurrent, 4)
+
+    def test_concurrency_limit(self):
+        """Test that no more than max_concurrency requests are in flight."""
+        service = AsyncDistanceService(make_service(self.server), max_concurrency=3)
+        self.run_async(service, lambda s: asyncio.gather(*(
+            s.calculate_distance(o, d) for o, d in LANES
+        )))
+
+        self.assertLessEqual(self.server.max_in_flight, 3)
+        self.assertEqual(len(self.server.requests), len(LANES))
+
+    def test_geocoding_fallback_runs_concurrently(self):
+        """Test that geodesic fallback geocodes all locations concurrently."""
+        service = AsyncDistanceService(make_service(self.server, google_api_key=None), max_concurrency=8)
+        service.service.google_api_key = None
+        service.service.use_google_maps = False
+
+        start = time.perf_counter()
+        distances = self.run_async(service, lambda s: s.calculate_distances([
+            ('Austin, TX', 'Dallas, TX'),
+            ('Austin, TX', 'Houston, TX'),
+            ('Dallas, TX', 'Atlantis'),
+        ]))
+        elapsed = time.perf_counter() - start
+
+        self.assertGreater(distances[0], 150)
+        self.assertGreater(distances[1], 100)
+        self.assertIsNone(distances[2])
+        self.assertEqual(len(self.server.geocode_requests), 4)
+        self.assertLess(elapsed, LATENCY * 3)
+
+
+class TestSyncDistanceFacade(unittest.TestCase):
+    """Test cases for the blocking facade."""
+
+    def test_facade_keeps_blocking_api(self):
+        """Test that the facade behaves like a DistanceService."""
+        with FakeDistanceMatrixServer({('Austin, TX', 'Dallas, TX'): 195.4}) as server:
+            facade = SyncDistanceFacade(AsyncDistanceService(make_service(server)))
+            try:
+                self.assertTrue(facade.use_google_maps)
+                self.assertAlmostEqual(facade.calculate_distance('Austin, TX', 'Dallas, TX'), 195.4, places=1)
+                self.assertEqual(len(facade.calculate_distances([('Austin, TX', 'Dallas, TX')] * 3)), 3)
+            finally:
+                facade.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
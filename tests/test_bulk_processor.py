@@ -0,0 +1,570 @@
+"""Unit tests for bulk upload processing."""
+
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+import sys
+
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from calculator.bulk_processor import BulkProcessor
+from calculator.columnar import decode_results
+from calculator.cost_engine import HouseholdGoodsCostCalculator
+from calculator.distance_service import DistanceService
+from calculator.shared_cache import MISS
+from calculator.upload_cache import UploadCache
+from tests.fake_distance_matrix import FakeDistanceMatrixServer
+
+
+def excel_stream(frame: pd.DataFrame) -> io.BytesIO:
+    """Serialize a frame as an uploaded workbook."""
+    stream = io.BytesIO()
+    frame.to_excel(stream, index=False)
+    stream.seek(0)
+    return stream
+
+
+class TestRowMemoization(unittest.TestCase):
+    """Test cases for pricing duplicate rows once."""
+
+    def setUp(self):
+        self.processor = BulkProcessor(distance_service=DistanceService(google_api_key=None))
+        self.calls = 0
+        calculate = self.processor.calculator.calculate_should_cost
+
+        def counting(*args, **kwargs):
+            self.calls += 1
+            return calculate(*args, **kwargs)
+
+        self.processor.calculator.calculate_should_cost = counting
+
+    def test_duplicate_rows_priced_once(self):
+        """Test that identical inputs share one calculation but keep their own row numbers."""
+        frame = pd.DataFrame({
+            'origin': ['Austin, TX', 'austin tx', 'Austin, TX', 'Austin, TX'],
+            'destination': ['Dallas, TX', 'Dallas, TX', 'Dallas, TX', 'Dallas, TX'],
+            'weight': [5000, 5000, 5000, 6000],
+            'distance_miles': [195, 195, 195, 195],
+            'packing_service': ['self_pack', 'Self_Pack ', 'self_pack', 'self_pack'],
+        })
+
+        result = self.processor.process_bulk_calculations(excel_stream(frame))
+
+        self.assertEqual(self.calls, 2)
+        self.assertEqual([row['row_number'] for row in result['results']], [2, 3, 4, 5])
+        totals = [row['total_should_cost'] for row in result['results']]
+        self.assertEqual(totals[0], totals[1])
+        self.assertEqual(totals[0], totals[2])
+        self.assertNotEqual(totals[0], totals[3])
+        self.assertEqual(result['summary']['unique_inputs'], 2)
+        self.assertEqual(result['summary']['unique_to_total_ratio'], 0.5)
+
+    def test_uncertainty_bands_on_every_row(self):
+        """Test that an uncertainty spec adds bands to each priced row, simulated once per input."""
+        frame = pd.DataFrame({
+            'origin': ['Austin, TX', 'Austin, TX', 'Denver, CO'],
+            'destination': ['Dallas, TX', 'Dallas, TX', 'Boulder, CO'],
+            'weight': [5000, 5000, 3000],
+            'distance_miles': [195, 195, 30],
+        })
+
+        result = self.processor.process_bulk_calculations(
+            excel_stream(frame), uncertainty={'weight': 0.1, 'samples': 500, 'seed': 5}
+        )
+
+        bands = [row['uncertainty'] for row in result['results']]
+        self.assertEqual(self.calls, 2)
+        self.assertIs(bands[0], bands[1])
+        self.assertTrue(all(band['p10'] <= band['p50'] <= band['p90'] for band in bands))
+        self.assertEqual(bands[2]['distance']['relative_error'], 0.0)
+        self.assertIn('P90 Cost', pd.read_excel(io.BytesIO(self.processor.generate_results_excel(result['results']))).columns)
+
+    def test_failed_rows_reported_individually(self):
+        """Test that invalid rows still fail with their own row number."""
+        frame = pd.DataFrame({
+            'origin': ['Austin, TX', 'Austin, TX', 'Austin, TX'],
+            'destination': ['Dallas, TX', 'Dallas, TX', 'Dallas, TX'],
+            'weight': [5000, -1, 5000],
+            'distance_miles': [195, 195, 195],
+        })
+
+        result = self.processor.process_bulk_calculations(excel_stream(frame))
+
+        self.assertEqual([row['status'] for row in result['results']], ['success', 'failed', 'success'])
+        self.assertEqual(result['results'][1]['origin'], 'Austin, TX')
+        self.assertEqual(result['summary']['successful'], 2)
+        self.assertEqual(result['summary']['unique_inputs'], 1)
+
+
+class TestUploadCache(unittest.TestCase):
+    """Test cases for reusing parsed uploads and priced results."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.cache = UploadCache(os.path.join(self.tmpdir.name, 'uploads'))
+        self.processor = BulkProcessor(
+            distance_service=DistanceService(google_api_key=None),
+            upload_cache=self.cache
+        )
+        self.workbook = excel_stream(pd.DataFrame({
+            'origin': ['Austin, TX', 'Denver, CO'],
+            'destination': ['Dallas, TX', 'Boulder, CO'],
+            'weight': [5000, 3000],
+            'distance_miles': [195, 30],
+        })).getvalue()
+
+    def test_process_reuses_validation_parse(self):
+        """Test that /bulk/process can run from the hash returned by validation."""
+        validation = self.processor.validate_excel_file(io.BytesIO(self.workbook))
+
+        result = self.processor.process_bulk_calculations(None, file_hash=validation['file_hash'])
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['summary']['successful'], 2)
+        self.assertEqual(result['summary']['file_hash'], UploadCache.content_hash(self.workbook))
+        self.assertEqual(self.cache.stats()['local_hits'], 1)
+
+    def test_resubmitted_workbook_served_from_cache(self):
+        """Test that identical bytes with identical rates are not recomputed."""
+        first = self.processor.process_bulk_calculations(io.BytesIO(self.workbook))
+        second = self.processor.process_bulk_calculations(io.BytesIO(self.workbook))
+
+        self.assertFalse(first['summary']['from_cache'])
+        self.assertTrue(second['summary']['from_cache'])
+        self.assertEqual(second['results'], first['results'])
+
+        repriced = self.processor.process_bulk_calculations(io.BytesIO(self.workbook), {'discount': 0.1})
+        self.assertFalse(repriced['summary']['from_cache'])
+        self.assertLess(repriced['results'][0]['total_should_cost'], first['results'][0]['total_should_cost'])
+
+    def test_shared_through_disk(self):
+        """Test that another worker process on the host finds the parsed upload."""
+        digest = self.processor.validate_excel_file(io.BytesIO(self.workbook))['file_hash']
+        sibling = UploadCache(self.cache.directory)
+
+        df, canonicalization = sibling.get(f'{digest}.frame')
+
+        self.assertEqual(len(df), 2)
+        self.assertEqual(sibling.stats()['disk_hits'], 1)
+
+    def test_unknown_hash_without_file(self):
+        """Test that an expired hash without a file is reported as an error."""
+        result = self.processor.process_bulk_calculations(None, file_hash='0' * 64)
+
+        self.assertFalse(result['success'])
+        self.assertIn('upload it again', result['errors'][0])
+
+    def test_malformed_hash_rejected(self):
+        """Test that a hash that is not a SHA-256 hex digest never reaches the cache."""
+        for file_hash in ('../../x', 'ABC', '0' * 63):
+            result = self.processor.process_bulk_calculations(None, file_hash=file_hash)
+            self.assertFalse(result['success'])
+            self.assertIn('Invalid file hash', result['errors'][0])
+
+        with self.assertRaises(ValueError):
+            self.cache.get('../../x.frame')
+        with self.assertRaises(ValueError):
+            self.cache.put('a/b', 1)
+
+    def test_uploaded_bytes_win_over_mismatched_hash(self):
+        """Test that an uploaded file is priced from its own bytes, not a stale hash."""
+        validation = self.processor.validate_excel_file(io.BytesIO(self.workbook))
+        other = excel_stream(pd.DataFrame({
+            'origin': ['Miami, FL'],
+            'destination': ['Orlando, FL'],
+            'weight': [4000],
+            'distance_miles': [235],
+        })).getvalue()
+
+        result = self.processor.process_bulk_calculations(io.BytesIO(other), file_hash=validation['file_hash'])
+
+        self.assertEqual(result['summary']['file_hash'], UploadCache.content_hash(other))
+        self.assertEqual([row['origin'] for row in result['results']], ['Miami, FL'])
+
+    def test_concurrent_writers_of_one_entry(self):
+        """Test that threads writing the same entry never leave a torn file."""
+        values = [list(range(i, i + 200000)) for i in range(4)]
+        threads = [threading.Thread(target=self.cache.put, args=('shared.frame', value)) for value in values]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        fresh = UploadCache(self.cache.directory, local_entries=0)
+        self.assertIn(fresh.get('shared.frame'), values)
+        self.assertEqual(list(self.cache.directory.glob('*.tmp')), [])
+
+    def test_corrupt_entry_is_a_miss(self):
+        """Test that an unreadable entry is removed and reported as a miss."""
+        self.cache.put('broken.frame', {'rows': 2})
+        with open(self.cache._path('broken.frame'), 'r+b') as f:
+            f.truncate(5)
+        fresh = UploadCache(self.cache.directory, local_entries=0)
+
+        self.assertIs(fresh.get('broken.frame'), MISS)
+        self.assertFalse(self.cache._path('broken.frame').exists())
+
+    def test_size_bound(self):
+        """Test that the least recently used files are removed past max_bytes."""
+        cache = UploadCache(os.path.join(self.tmpdir.name, 'small'), max_bytes=3000, local_entries=0)
+        for i in range(5):
+            cache.put(f'entry{i}', 'x' * 1000)
+            os.utime(cache._path(f'entry{i}'), (i, i))
+
+        self.assertLessEqual(cache.stats()['bytes'], 3000)
+        self.assertIs(cache.get('entry0'), MISS)
+        self.assertEqual(cache.get('entry4'), 'x' * 1000)
+
+
+class TestIncrementalReupload(unittest.TestCase):
+    """Test cases for repricing only changed rows of a re-uploaded job."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.processor = BulkProcessor(
+            distance_service=DistanceService(google_api_key=None),
+            upload_cache=UploadCache(os.path.join(self.tmpdir.name, 'uploads'))
+        )
+        self.job_id = BulkProcessor.new_job_id()
+        self.calls = 0
+        calculate = self.processor.calculator.calculate_should_cost
+
+        def counting(*args, **kwargs):
+            self.calls += 1
+            return calculate(*args, **kwargs)
+
+        self.processor.calculator.calculate_should_cost = counting
+        self.frame = pd.DataFrame({
+            'origin': ['Austin, TX', 'Denver, CO', 'Miami, FL'],
+            'destination': ['Dallas, TX', 'Boulder, CO', 'Orlando, FL'],
+            'weight': [5000, 3000, 4000],
+            'distance_miles': [195, 30, 235],
+        })
+
+    def test_only_changed_rows_repriced(self):
+        """Test that a re-upload reprices new and changed rows and reports the diff."""
+        first = self.processor.process_bulk_calculations(excel_stream(self.frame), job_id=self.job_id)
+        self.assertFalse(first['diff']['has_previous_run'])
+        self.assertEqual(first['diff']['new_rows'], [2, 3, 4])
+
+        edited = self.frame.copy()
+        edited.loc[1, 'weight'] = 3500
+        edited = pd.concat([edited, pd.DataFrame({
+            'origin': ['Reno, NV'], 'destination': ['Las Vegas, NV'], 'weight': [2000], 'distance_miles': [440],
+        })], ignore_index=True)
+        self.calls = 0
+        second = self.processor.process_bulk_calculations(excel_stream(edited), job_id=self.job_id)
+
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(len(second['results']), 4)
+        self.assertEqual(second['results'][0], first['results'][0])
+        self.assertNotEqual(second['results'][1]['total_should_cost'], first['results'][1]['total_should_cost'])
+        self.assertEqual(second['diff']['changed_rows'], [3])
+        self.assertEqual(second['diff']['new_rows'], [5])
+        self.assertEqual(second['diff']['removed_rows'], [])
+        self.assertEqual(second['diff']['unchanged'], 2)
+        self.assertEqual(second['diff']['reused'], 2)
+        self.assertEqual(second['diff']['recomputed'], 2)
+
+        trimmed = self.processor.process_bulk_calculations(excel_stream(edited.head(2)), job_id=self.job_id)
+        self.assertEqual(trimmed['diff']['removed_rows'], [4, 5])
+
+    def test_stale_resolved_distances_repriced(self):
+        """Test that rows priced on an auto-resolved distance are repriced once stale."""
+        frame = self.frame.drop(columns=['distance_miles'])
+        frame['distance_miles'] = [None, 30, 235]
+        self.processor.process_bulk_calculations(excel_stream(frame), job_id=self.job_id)
+        self.processor.STALE_DISTANCE_SECONDS = 0
+        self.calls = 0
+
+        result = self.processor.process_bulk_calculations(excel_stream(frame), job_id=self.job_id)
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(result['diff']['unchanged'], 3)
+        self.assertEqual(result['diff']['reused'], 2)
+
+    def test_rate_change_reprices_every_row(self):
+        """Test that different custom rates never reuse the previous results."""
+        self.processor.process_bulk_calculations(excel_stream(self.frame), job_id=self.job_id)
+        self.calls = 0
+
+        result = self.processor.process_bulk_calculations(excel_stream(self.frame), {'discount': 0.1}, job_id=self.job_id)
+
+        self.assertEqual(self.calls, 3)
+        self.assertTrue(result['diff']['has_previous_run'])
+        self.assertEqual(result['diff']['unchanged'], 3)
+        self.assertEqual(result['diff']['reused'], 0)
+
+    def test_jobs_are_issued_by_the_server(self):
+        """Test that validation issues fresh job ids and other ids are rejected."""
+        stream = excel_stream(self.frame)
+        first_id = self.processor.validate_excel_file(stream)['job_id']
+        second_id = self.processor.validate_excel_file(excel_stream(self.frame))['job_id']
+        self.assertNotEqual(first_id, second_id)
+
+        first = self.processor.process_bulk_calculations(excel_stream(self.frame), job_id=first_id)
+        self.assertEqual(first['job_id'], first_id)
+        other = self.processor.process_bulk_calculations(excel_stream(self.frame), job_id=second_id)
+        self.assertFalse(other['diff']['has_previous_run'])
+
+        named = self.processor.process_bulk_calculations(excel_stream(self.frame), job_id='moves.xlsx')
+        self.assertFalse(named['success'])
+        self.assertIn('Invalid job id', named['errors'][0])
+        self.assertFalse(self.processor.reprice_job('moves.xlsx')['success'])
+
+
+class TestRateCardRepricing(unittest.TestCase):
+    """Test cases for repricing only the quotes a rate card change affects."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.matrix_file = os.path.join(self.tmpdir.name, 'matrix.json')
+        with open(HouseholdGoodsCostCalculator().matrix_file) as f:
+            self.matrix = json.load(f)
+        self.write_matrix()
+        self.processor = BulkProcessor(
+            distance_service=DistanceService(google_api_key=None),
+            upload_cache=UploadCache(os.path.join(self.tmpdir.name, 'uploads'))
+        )
+        self.job_id = BulkProcessor.new_job_id()
+        self.processor.calculator = HouseholdGoodsCostCalculator(self.matrix_file)
+        self.workbook = excel_stream(pd.DataFrame({
+            'origin': ['Austin, TX', 'Denver, CO', 'Miami, FL', 'Tampa, FL'],
+            'destination': ['Dallas, TX', 'Boulder, CO', 'Orlando, FL', 'Orlando, FL'],
+            'weight': [5000, 3000, 4000, 4000],
+            'distance_miles': [195, 30, 235, 85],
+        })).getvalue()
+        self.first = self.processor.process_bulk_calculations(io.BytesIO(self.workbook), job_id=self.job_id)
+
+    def write_matrix(self):
+        with open(self.matrix_file, 'w') as f:
+            json.dump(self.matrix, f)
+
+    def change_rates(self):
+        """Raise the Florida sales tax and reload the matrix."""
+        self.matrix['tariffs']['state_specific_taxes']['FL'] += 0.01
+        self.write_matrix()
+        self.processor.calculator.load_matrix()
+
+    def test_reupload_reprices_only_affected_rows(self):
+        """Test that a changed state tax only reprices rows into that state."""
+        self.change_rates()
+        calls = []
+        calculate = self.processor.calculator.calculate_should_cost
+        self.processor.calculator.calculate_should_cost = lambda *args, **kwargs: calls.append(args) or calculate(*args, **kwargs)
+
+        result = self.processor.process_bulk_calculations(io.BytesIO(self.workbook), job_id=self.job_id)
+
+        self.assertEqual(sorted(args[0] for args in calls), ['Miami, FL', 'Tampa, FL'])
+        self.assertEqual(result['diff']['reused'], 2)
+        self.assertEqual(result['results'][0], self.first['results'][0])
+        self.assertGreater(result['results'][2]['total_should_cost'], self.first['results'][2]['total_should_cost'])
+
+    def test_reprice_job_reports_impact(self):
+        """Test that the impact report counts the moved quotes and their deltas."""
+        self.change_rates()
+
+        report = self.processor.reprice_job(self.job_id)
+
+        self.assertTrue(report['success'])
+        self.assertEqual(report['changed_elements'], ['tariffs.state_specific_taxes.FL'])
+        self.assertEqual(report['quotes'], 4)
+        self.assertEqual(report['repriced'], 2)
+        self.assertEqual(report['quotes_moved'], 2)
+        self.assertGreater(report['total_delta'], 0)
+        self.assertEqual(report['max_decrease'], 0.0)
+        self.assertEqual(sorted(move['rows'][0] for move in report['largest_moves']), [4, 5])
+
+        again = self.processor.reprice_job(self.job_id)
+        self.assertEqual(again['changed_elements'], [])
+        self.assertEqual(again['repriced'], 0)
+
+    def test_unknown_job(self):
+        """Test that repricing a job that was never processed fails cleanly."""
+        self.assertFalse(self.processor.reprice_job(BulkProcessor.new_job_id())['success'])
+        self.assertFalse(self.processor.reprice_job('other.xlsx')['success'])
+
+
+class TestDistanceSources(unittest.TestCase):
+    """Test cases for uncertainty bands following where each distance came from."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.server = FakeDistanceMatrixServer({('Austin, TX', 'Dallas, TX'): 195.4}).start()
+        self.addCleanup(self.server.stop)
+        self.matrix_file = os.path.join(self.tmpdir.name, 'matrix.json')
+        with open(HouseholdGoodsCostCalculator().matrix_file) as f:
+            self.matrix = json.load(f)
+        with open(self.matrix_file, 'w') as f:
+            json.dump(self.matrix, f)
+        self.processor = BulkProcessor(
+            distance_service=DistanceService(google_api_key='test-key', google_api_url=self.server.url),
+            upload_cache=UploadCache(os.path.join(self.tmpdir.name, 'uploads'))
+        )
+        self.processor.calculator = HouseholdGoodsCostCalculator(self.matrix_file)
+        self.job_id = BulkProcessor.new_job_id()
+        self.uncertainty = {'weight': 0.1, 'samples': 200, 'seed': 3}
+        self.result = self.processor.process_bulk_calculations(excel_stream(pd.DataFrame({
+            'origin': ['Austin, TX', 'Denver, CO'],
+            'destination': ['Dallas, TX', 'Boulder, CO'],
+            'weight': [5000, 3000],
+            'distance_miles': [None, 30],
+        })), job_id=self.job_id, uncertainty=self.uncertainty)
+
+    def test_resolved_distances_keep_their_source(self):
+        """Test that a Google distance is simulated with the Google error, not the estimate error."""
+        errors = [row['uncertainty']['distance']['relative_error'] for row in self.result['results']]
+
+        self.assertEqual(errors, [0.02, 0.0])
+
+    def test_reprice_job_keeps_sources(self):
+        """Test that repriced quotes reuse the stored distance source."""
+        self.matrix['tariffs']['state_specific_taxes']['TX'] = self.matrix['tariffs']['state_specific_taxes'].get('TX', 0) + 0.01
+        self.matrix['tariffs']['state_specific_taxes']['CO'] = self.matrix['tariffs']['state_specific_taxes'].get('CO', 0) + 0.01
+        with open(self.matrix_file, 'w') as f:
+            json.dump(self.matrix, f)
+        self.processor.calculator.load_matrix()
+
+        self.assertEqual(self.processor.reprice_job(self.job_id)['repriced'], 2)
+
+        state = self.processor.upload_cache.get(f'job.{self.processor._job_key(self.job_id)}')
+        errors = sorted(
+            entry['result']['uncertainty']['distance']['relative_error'] for entry in state['results'].values()
+        )
+        self.assertEqual(errors, [0.0, 0.02])
+
+
+class TestRateCardComparison(unittest.TestCase):
+    """Test cases for pricing a batch under two rate cards side by side."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.processor = BulkProcessor(
+            distance_service=DistanceService(google_api_key=None),
+            upload_cache=UploadCache(os.path.join(self.tmpdir.name, 'uploads'))
+        )
+        self.job_id = BulkProcessor.new_job_id()
+        self.workbook = excel_stream(pd.DataFrame({
+            'origin': ['Austin, TX', 'Miami, FL', 'Tampa, FL', 'Reno, NV'],
+            'destination': ['Dallas, TX', 'Orlando, FL', 'Orlando, FL', 'Las Vegas, NV'],
+            'weight': [5000, 4000, 4000, -1],
+            'distance_miles': [195, 235, 85, 440],
+        })).getvalue()
+        self.candidate = json.loads(json.dumps(self.processor.calculator.matrix))
+        self.candidate['tariffs']['state_specific_taxes']['FL'] += 0.01
+
+    def test_upload_compared_under_two_matrices(self):
+        """Test per-row deltas and aggregates against the scalar calculation."""
+        result = self.processor.compare_rate_cards(None, {'matrix': self.candidate}, io.BytesIO(self.workbook))
+
+        self.assertTrue(result['success'])
+        self.assertEqual([row['row_number'] for row in result['rows']], [2, 3, 4])
+        self.assertEqual(len(result['errors']), 1)
+        self.assertEqual([row['delta'] > 0 for row in result['rows']], [False, True, True])
+        expected = self.processor.calculator.calculate_should_cost('Miami, FL', 'Orlando, FL', 235.0, 4000.0)
+        self.assertEqual(result['rows'][1]['baseline'], expected['total_should_cost'])
+        self.assertEqual(result['summary']['rows_up'], 2)
+        self.assertAlmostEqual(result['summary']['delta'], sum(row['delta'] for row in result['rows']), places=2)
+        self.assertEqual(result['by_lane'][-1]['lane'], 'Austin, TX → Dallas, TX')
+        self.assertEqual(sum(group['moves'] for group in result['by_bracket']), 3)
+        self.assertEqual(sum(group['moves'] for group in result['by_region']), 3)
+
+    def test_stored_job_compared_with_custom_rates(self):
+        """Test that a stored job is compared without its workbook."""
+        self.processor.process_bulk_calculations(io.BytesIO(self.workbook), job_id=self.job_id)
+
+        result = self.processor.compare_rate_cards(None, {'custom_rates': {'discount': 0.1}}, job_id=self.job_id)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['summary']['rows'], 3)
+        self.assertEqual(result['summary']['rows_down'], 3)
+        self.assertEqual(result['candidate']['custom_rates'], {'discount': 0.1})
+
+    def test_unknown_rate_card_version(self):
+        """Test that an unknown rate card version is reported as an error."""
+        result = self.processor.compare_rate_cards({'rate_card': 'f' * 16}, None, io.BytesIO(self.workbook))
+
+        self.assertFalse(result['success'])
+        self.assertIn('Unknown rate card version', result['errors'][0])
+
+
+
+class TestColumnarResponse(unittest.TestCase):
+    """Test cases for columnar bulk responses fetched page by page."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.processor = BulkProcessor(
+            distance_service=DistanceService(google_api_key=None),
+            upload_cache=UploadCache(os.path.join(self.tmpdir.name, 'uploads'))
+        )
+        self.frame = pd.DataFrame({
+            'origin': ['Austin, TX', 'Miami, FL', 'Tampa, FL', 'Reno, NV', 'Austin, TX'],
+            'destination': ['Dallas, TX', 'Orlando, FL', 'Orlando, FL', 'Las Vegas, NV', 'Dallas, TX'],
+            'weight': [5000, 4000, 4000, -1, 6000],
+            'distance_miles': [195, 235, 85, 440, 195],
+        })
+        self.response = self.processor.process_batch(excel_stream(self.frame))
+        self.rows = self.processor.process_bulk_calculations(excel_stream(self.frame))['results']
+
+    def test_first_page_and_remaining_pages(self):
+        """Test the response carries the first page and later pages are fetched by id."""
+        columnar = self.processor.to_columnar(self.response, page_size=2)
+
+        self.assertEqual(columnar['summary'], self.response['summary'])
+        self.assertEqual(columnar['results']['rows'], 2)
+        self.assertEqual(columnar['results']['total_rows'], 5)
+
+        rows = decode_results(columnar['results'])
+        for offset in (2, 4):
+            rows += decode_results(self.processor.results_page(columnar['result_id'], offset, 2))
+        self.assertEqual(rows, self.rows)
+        self.assertEqual(self.processor.stored_batch(columnar['result_id']).result_rows(), self.rows)
+
+    def test_unknown_result_id(self):
+        """Test unknown or malformed result ids are not found."""
+        self.assertIsNone(self.processor.results_page('0' * 32))
+        self.assertIsNone(self.processor.results_page('../uploads'))
+
+    def test_without_upload_cache_all_rows_in_one_page(self):
+        """Test a processor without a cache returns every row at once."""
+        processor = BulkProcessor(distance_service=DistanceService(google_api_key=None))
+
+        columnar = processor.to_columnar(self.response, page_size=2)
+
+        self.assertIsNone(columnar['result_id'])
+        self.assertEqual(decode_results(columnar['results']), self.rows)
+
+    def test_batch_holds_results_as_columns(self):
+        """Test priced rows point at shared quotes and failed rows keep their error."""
+        batch = self.response['batch']
+
+        self.assertEqual(batch.quote_index.tolist(), [0, 1, 2, -1, 3])
+        self.assertEqual(len(batch.quotes), 4)
+        self.assertIn('Weight must be greater than 0', batch.errors[3])
+        self.assertNotIn('batch', self.processor.process_bulk_calculations(excel_stream(self.frame)))
+
+    def test_excel_export_reads_the_batch(self):
+        """Test exporting the batch matches exporting its row dicts."""
+        exported = pd.read_excel(io.BytesIO(self.processor.generate_results_excel(self.response['batch'])))
+        expected = pd.read_excel(io.BytesIO(self.processor.generate_results_excel(self.rows)))
+
+        pd.testing.assert_frame_equal(exported, expected)
+        self.assertEqual(exported['Status'].tolist(), ['SUCCESS', 'SUCCESS', 'SUCCESS', 'FAILED', 'SUCCESS'])
+
+
+if __name__ == '__main__':
+    unittest.main()
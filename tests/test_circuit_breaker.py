@@ -0,0 +1,130 @@
+"""Unit tests for the Google Maps circuit breaker."""
+
+import time
+import unittest
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from calculator.circuit_breaker import CircuitBreaker, STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN
+from calculator.distance_service import DistanceService
+from tests.fake_distance_matrix import FakeDistanceMatrixServer
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Test cases for breaker state transitions."""
+
+    def setUp(self):
+        self.breaker = CircuitBreaker('test', failure_threshold=3, cooldown_seconds=0.1)
+
+    def test_trips_after_consecutive_failures(self):
+        """Test that the breaker opens after the failure threshold."""
+        self.breaker.record_failure('UNKNOWN_ERROR')
+        self.breaker.record_failure('UNKNOWN_ERROR')
+        self.assertEqual(self.breaker.state, STATE_CLOSED)
+
+        self.breaker.record_failure('UNKNOWN_ERROR')
+        self.assertEqual(self.breaker.state, STATE_OPEN)
+        self.assertFalse(self.breaker.allow_request())
+
+    def test_success_resets_failure_count(self):
+        """Test that failures must be consecutive to trip."""
+        for _ in range(2):
+            self.breaker.record_failure('REQUEST_FAILED')
+            self.breaker.record_failure('REQUEST_FAILED')
+            self.breaker.record_success()
+        self.assertEqual(self.breaker.state, STATE_CLOSED)
+
+    def test_quota_status_trips_immediately(self):
+        """Test that OVER_QUERY_LIMIT opens the breaker on the first occurrence."""
+        self.breaker.record_failure('OVER_QUERY_LIMIT')
+
+        stats = self.breaker.stats()
+        self.assertEqual(stats['state'], STATE_OPEN)
+        self.assertEqual(stats['trips'], 1)
+        self.assertEqual(stats['events'][-1]['reason'], 'OVER_QUERY_LIMIT')
+
+    def test_single_probe_after_cooldown(self):
+        """Test that exactly one probe is let through once the cool-down passes."""
+        self.breaker.record_failure('OVER_QUERY_LIMIT')
+        time.sleep(0.12)
+
+        self.assertTrue(self.breaker.allow_request())
+        self.assertEqual(self.breaker.state, STATE_HALF_OPEN)
+        self.assertFalse(self.breaker.allow_request())
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, STATE_CLOSED)
+        self.assertEqual(self.breaker.stats()['recoveries'], 1)
+
+    def test_failed_probe_reopens(self):
+        """Test that a failed probe starts another cool-down."""
+        self.breaker.record_failure('OVER_QUERY_LIMIT')
+        time.sleep(0.12)
+        self.breaker.allow_request()
+        self.breaker.record_failure('REQUEST_FAILED')
+
+        self.assertEqual(self.breaker.state, STATE_OPEN)
+        self.assertEqual(self.breaker.trips, 2)
+
+    def test_cancelled_probe_frees_slot(self):
+        """Test that a probe that was never sent can be retried."""
+        self.breaker.record_failure('OVER_QUERY_LIMIT')
+        time.sleep(0.12)
+        self.assertTrue(self.breaker.allow_request())
+        self.breaker.cancel_request()
+        self.assertTrue(self.breaker.allow_request())
+
+
+class TestDistanceServiceBreaker(unittest.TestCase):
+    """Test cases for breaker-guarded Google lookups."""
+
+    def setUp(self):
+        """Start a Distance Matrix stand-in that is over quota."""
+        self.server = FakeDistanceMatrixServer(
+            {('Austin, TX', 'Dallas, TX'): 195.4}, status='OVER_QUERY_LIMIT'
+        ).start()
+        self.service = DistanceService(
+            google_api_key='test-key',
+            google_api_url=self.server.url,
+            google_breaker=CircuitBreaker('Google Maps', cooldown_seconds=0.2)
+        )
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_open_breaker_skips_google(self):
+        """Test that lookups fall back without calling Google once tripped."""
+        self.service.google_breaker.cooldown_seconds = 60
+        for _ in range(5):
+            distance = self.service.calculate_distance('Austin, TX', 'Dallas, TX')
+            self.assertGreater(distance, 100)
+
+        self.assertEqual(len(self.server.requests), 1)
+        breaker = self.service.metrics()['circuit_breakers']['google']
+        self.assertEqual(breaker['state'], STATE_OPEN)
+        self.assertEqual(breaker['short_circuited'], 4)
+
+    def test_batch_reports_circuit_open(self):
+        """Test that batch results carry the CIRCUIT_OPEN status while open."""
+        self.service.calculate_distances_batch([('Austin, TX', 'Dallas, TX')])
+        results = self.service.calculate_distances_batch([('Austin, TX', 'Dallas, TX')])
+
+        self.assertEqual(results[0]['status'], 'CIRCUIT_OPEN')
+
+    def test_recovers_after_cooldown(self):
+        """Test that a successful probe closes the breaker."""
+        self.service.calculate_distances_batch([('Austin, TX', 'Dallas, TX')])
+        self.server.status = 'OK'
+        time.sleep(0.25)
+
+        results = self.service.calculate_distances_batch([('Austin, TX', 'Dallas, TX')])
+
+        self.assertEqual(results[0]['status'], 'OK')
+        self.assertEqual(self.service.google_breaker.state, STATE_CLOSED)
+
+
+if __name__ == '__main__':
+    unittest.main()
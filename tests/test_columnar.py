@@ -0,0 +1,110 @@
+"""Unit tests for the columnar bulk results encoding."""
+
+import json
+import unittest
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from calculator.columnar import decode_results, encode_batch, encode_results
+from calculator.cost_engine import HouseholdGoodsCostCalculator
+from calculator.move_batch import MoveBatch
+
+
+class TestColumnarResults(unittest.TestCase):
+    """Test cases for encoding bulk results as one array per field."""
+
+    def setUp(self):
+        calculator = HouseholdGoodsCostCalculator()
+        moves = [
+            ('Austin, TX', 'Dallas, TX', 195, 5000, 'self_pack', 'no_storage', True),
+            ('Austin, TX', 'Seattle, WA', 2100, 8000, 'full_pack', 'no_storage', False),
+            ('Miami, FL', 'Orlando, FL', 235, 400, 'self_pack', 'storage_30days', True),
+        ]
+        self.results = []
+        for row_number, move in enumerate(moves * 4, start=2):
+            result = calculator.calculate_should_cost(*move)
+            self.results.append({**result, 'row_number': row_number, 'status': 'success'})
+        self.results.append({
+            'row_number': 14,
+            'status': 'failed',
+            'error': 'Weight must be greater than 0, got 0.0',
+            'origin': 'Reno, NV',
+            'destination': 'Las Vegas, NV',
+            'total_should_cost': 0
+        })
+
+    def test_round_trip(self):
+        """Test results decode to the original dicts after a JSON round trip."""
+        payload = json.loads(json.dumps(encode_results(self.results)))
+
+        self.assertEqual(payload['rows'], len(self.results))
+        self.assertEqual(decode_results(payload), self.results)
+
+    def test_batch_encodes_like_its_rows(self):
+        """Test a priced batch pages to the same rows as its result dicts."""
+        batch = MoveBatch.from_results(self.results)
+
+        for offset, limit in ((0, None), (0, 5), (10, 5)):
+            payload = json.loads(json.dumps(encode_batch(batch, offset, limit)))
+            self.assertEqual(payload['total_rows'], len(self.results))
+            self.assertEqual(decode_results(payload), decode_results(encode_results(self.results, offset, limit)))
+
+    def test_labels_are_dictionary_encoded(self):
+        """Test label columns hold codes and repeated columns are not sent twice."""
+        payload = encode_results(self.results)
+        columns = dict(zip(payload['columns'], payload['data']))
+
+        brackets = payload['dictionaries']['breakdown.transportation_weight_bracket']
+        self.assertEqual(len(brackets), 3)
+        self.assertTrue(all(isinstance(code, int) for code in columns['breakdown.transportation_weight_bracket'][:12]))
+        self.assertIsNone(columns['breakdown.transportation_weight_bracket'][12])
+        self.assertIn('breakdown.origin_region', payload['dictionaries'])
+        self.assertEqual(payload['aliases']['breakdown.state_tax'], 'breakdown.state_sales_tax')
+        self.assertIsNone(columns['breakdown.state_tax'])
+
+
+        many = [{**result, 'row_number': row_number} for row_number, result in enumerate(self.results * 20, start=2)]
+        self.assertLess(len(json.dumps(encode_results(many))), len(json.dumps(many)) / 5)
+
+    def test_constants_and_types(self):
+        """Test constant columns are sent once and equal values of other types stay apart."""
+        results = [
+            {'row_number': 2, 'status': 'success', 'flag': True, 'count': 1, 'rate': 1.0},
+            {'row_number': 3, 'status': 'success', 'flag': True, 'count': 1, 'rate': 1.0},
+        ]
+
+        payload = json.loads(json.dumps(encode_results(results)))
+
+        self.assertEqual(payload['constants'], {'status': 'success', 'flag': True, 'count': 1, 'rate': 1.0})
+        decoded = decode_results(payload)
+        self.assertEqual(decoded, results)
+        self.assertIs(decoded[0]['flag'], True)
+        self.assertIsInstance(decoded[0]['rate'], float)
+
+    def test_pages(self):
+        """Test pages are self-contained and cover every row once."""
+        pages = [encode_results(self.results, offset, 5) for offset in range(0, len(self.results), 5)]
+
+        self.assertEqual([page['rows'] for page in pages], [5, 5, 3])
+        self.assertEqual([page['total_rows'] for page in pages], [13] * 3)
+        self.assertEqual([row for page in pages for row in decode_results(page)], self.results)
+        self.assertEqual(encode_results(self.results, 20, 5)['rows'], 0)
+
+    def test_nested_values_pass_through(self):
+        """Test nested objects below the first level are sent as they are."""
+        results = [
+            {'row_number': 2, 'uncertainty': {'p10': 900.0, 'bracket_crossing': {'weight': 0.1}}},
+            {'row_number': 3, 'uncertainty': {'p10': 950.0, 'bracket_crossing': {'weight': 0.2}}},
+        ]
+
+        payload = encode_results(results)
+
+        self.assertIn('uncertainty.bracket_crossing', payload['columns'])
+        self.assertEqual(decode_results(payload), results)
+
+
+if __name__ == '__main__':
+    unittest.main()
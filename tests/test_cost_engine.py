@@ -1,5 +1,6 @@
 """Unit tests for the cost calculation engine."""
 
+import copy
 import unittest
 import json
 from pathlib import Path
@@ -8,7 +9,8 @@ import sys
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from calculator.cost_engine import HouseholdGoodsCostCalculator
+from calculator.cost_engine import HouseholdGoodsCostCalculator, changed_rate_paths, format_rate_path
+from calculator.rate_index import RateDependencyIndex
 
 
 class TestHouseholdGoodsCostCalculator(unittest.TestCase):
@@ -327,5 +329,53 @@ class TestHouseholdGoodsCostCalculator(unittest.TestCase):
         self.assertEqual(result['breakdown']['destination_state'], 'CA')
 
 
+class TestRateDependencies(unittest.TestCase):
+    """Test cases for tracking which rate card elements a quote depends on."""
+
+    def setUp(self):
+        self.calculator = HouseholdGoodsCostCalculator()
+
+    def test_changed_rate_paths(self):
+        """Test that only the changed cells are reported."""
+        new = copy.deepcopy(self.calculator.matrix)
+        new['transportation_matrix']['rates'][2][1] += 50
+        new['tariffs']['state_specific_taxes']['CA'] = 0.08
+        new['weight_tiers'].append({'max_pounds': 2000000, 'rate_adjustment': 0.75})
+
+        changed = changed_rate_paths(self.calculator.matrix, new)
+
+        self.assertEqual(sorted(map(format_rate_path, changed)), [
+            'tariffs.state_specific_taxes.CA',
+            'transportation_matrix.rates[2][1]',
+            'weight_tiers',
+        ])
+
+    def test_elements_follow_inputs_and_overrides(self):
+        """Test that a quote depends on its own bracket cell and destination tax only."""
+        elements = self.calculator.rate_elements('Miami, FL', 'Orlando, FL', 235, 4000, 'full_pack')
+
+        self.assertIn(('transportation_matrix', 'rates', 2, 1), elements)
+        self.assertIn(('tariffs', 'state_specific_taxes', 'FL'), elements)
+        self.assertIn(('service_multipliers', 'full_pack'), elements)
+        self.assertNotIn(('tariffs', 'state_specific_taxes', 'CA'), elements)
+
+        overridden = self.calculator.rate_elements(
+            'Miami, FL', 'Orlando, FL', 235, 4000, 'full_pack', custom_rates={'full_pack': 1.5}
+        )
+        self.assertNotIn(('service_multipliers', 'full_pack'), overridden)
+
+    def test_index_finds_affected_quotes(self):
+        """Test that changed cells and replaced sections map to their dependents."""
+        index = RateDependencyIndex()
+        index.add('fl', self.calculator.rate_elements('Miami, FL', 'Orlando, FL', 235, 4000))
+        index.add('ca', self.calculator.rate_elements('Fresno, CA', 'San Diego, CA', 330, 8000))
+
+        self.assertEqual(index.affected({('tariffs', 'state_specific_taxes', 'FL')}), {'fl'})
+        self.assertEqual(index.affected({('transportation_matrix', 'rates', 2, 1)}), {'fl'})
+        self.assertEqual(index.affected({('tariffs',)}), {'fl', 'ca'})
+        self.assertEqual(index.affected({('fuel_surcharge',)}), {'fl', 'ca'})
+        self.assertEqual(index.affected(set()), set())
+
+
 if __name__ == '__main__':
     unittest.main()
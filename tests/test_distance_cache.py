@@ -0,0 +1,229 @@
+"""Unit tests for the persistent distance cache."""
+
+import unittest
+import tempfile
+import threading
+import multiprocessing
+import sqlite3
+import time
+import os
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from calculator.distance_cache import DistanceCache, CACHE_MISS
+from calculator.distance_service import DistanceService, PROVIDER_GOOGLE_DRIVING, PROVIDER_GEODESIC
+from calculator.shared_cache import SQLiteSharedStore
+from tests.fake_distance_matrix import FakeDistanceMatrixServer
+
+
+def _write_lanes(path, worker_id, count):
+    """Write lanes from a separate process (module level for pickling)."""
+    cache = DistanceCache(path)
+    for i in range(count):
+        cache.set_distance(f'Origin {worker_id}', f'Destination {i}', PROVIDER_GEODESIC, float(i))
+
+
+class TestDistanceCache(unittest.TestCase):
+    """Test cases for DistanceCache."""
+
+    def setUp(self):
+        """Create a cache in a temporary directory."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'cache.sqlite3')
+        self.cache = DistanceCache(self.path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_geocode_round_trip(self):
+        """Test storing and reading coordinates."""
+        self.assertIs(self.cache.get_geocode('Austin, TX'), CACHE_MISS)
+        self.cache.set_geocode('Austin, TX', (30.2672, -97.7431))
+
+        self.assertEqual(self.cache.get_geocode('austin,  tx'), (30.2672, -97.7431))
+        stats = self.cache.stats()
+        self.assertEqual(stats['geocode_hits'], 1)
+        self.assertEqual(stats['geocode_misses'], 1)
+
+    def test_negative_caching(self):
+        """Test that failed lookups are cached as None."""
+        self.cache.set_geocode('Atlantis', None)
+        self.cache.set_distance('Austin, TX', 'Atlantis', PROVIDER_GOOGLE_DRIVING, None)
+
+        self.assertIsNone(self.cache.get_geocode('Atlantis'))
+        self.assertIsNone(self.cache.get_distance('Austin, TX', 'Atlantis', PROVIDER_GOOGLE_DRIVING))
+        self.assertEqual(self.cache.stats()['geocode_negative_hits'], 1)
+        self.assertEqual(self.cache.stats()['distance_negative_hits'], 1)
+
+    def test_distance_keyed_by_provider(self):
+        """Test that providers do not share lane entries."""
+        self.cache.set_distance('Austin, TX', 'Dallas, TX', PROVIDER_GOOGLE_DRIVING, 195.4)
+
+        self.assertEqual(self.cache.get_distance('Austin, TX', 'Dallas, TX', PROVIDER_GOOGLE_DRIVING), 195.4)
+        self.assertIs(self.cache.get_distance('Austin, TX', 'Dallas, TX', PROVIDER_GEODESIC), CACHE_MISS)
+
+    def test_ttl_expiry(self):
+        """Test that expired entries are treated as misses."""
+        cache = DistanceCache(self.path, ttl_seconds=0.05, negative_ttl_seconds=0.05)
+        cache.set_geocode('Austin, TX', (30.2672, -97.7431))
+        time.sleep(0.1)
+
+        self.assertIs(cache.get_geocode('Austin, TX'), CACHE_MISS)
+
+    def test_size_bounded_eviction(self):
+        """Test that least recently used rows are evicted past max_entries."""
+        cache = DistanceCache(self.path, max_entries=5)
+        for i in range(10):
+            cache.set_geocode(f'City {i}', (float(i), float(i)))
+        cache.evict()
+
+        stats = cache.stats()
+        self.assertEqual(stats['geocode_entries'], 5)
+        self.assertGreaterEqual(stats['evictions'], 5)
+        self.assertEqual(cache.get_geocode('City 9'), (9.0, 9.0))
+        self.assertIs(cache.get_geocode('City 0'), CACHE_MISS)
+
+    def test_concurrent_threads(self):
+        """Test that many threads can read and write concurrently."""
+        errors = []
+
+        def worker(n):
+            try:
+                for i in range(25):
+                    self.cache.set_distance(f'Origin {n}', f'Destination {i}', PROVIDER_GEODESIC, float(i))
+                    self.assertEqual(
+                        self.cache.get_distance(f'Origin {n}', f'Destination {i}', PROVIDER_GEODESIC),
+                        float(i)
+                    )
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(self.cache.stats()['distance_entries'], 200)
+
+    def test_concurrent_processes(self):
+        """Test that separate worker processes share the same cache file."""
+        processes = [
+            multiprocessing.Process(target=_write_lanes, args=(self.path, n, 20))
+            for n in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        self.assertTrue(all(p.exitcode == 0 for p in processes))
+        self.assertEqual(self.cache.stats()['distance_entries'], 80)
+        self.assertEqual(self.cache.get_distance('Origin 3', 'Destination 19', PROVIDER_GEODESIC), 19.0)
+
+    def test_in_process_tier(self):
+        """Test that repeat reads skip SQLite and still count towards lane popularity."""
+        sibling = DistanceCache(self.path)
+        self.cache.set_distance('Austin, TX', 'Dallas, TX', PROVIDER_GEODESIC, 182.0)
+
+        self.assertEqual(sibling.get_distance('Austin, TX', 'Dallas, TX', PROVIDER_GEODESIC), 182.0)
+        for _ in range(3):
+            self.assertEqual(sibling.get_distance('Austin, TX', 'Dallas, TX', PROVIDER_GEODESIC), 182.0)
+
+        tiers = sibling.stats()['tiers']
+        self.assertEqual(tiers['in_process']['hits'], 3)
+        self.assertEqual(tiers['shared']['hits'], 1)
+        self.assertEqual(sibling.top_lanes(PROVIDER_GEODESIC, 1), [('austin, tx', 'dallas, tx')])
+        hits = sqlite3.connect(self.path).execute('SELECT hits FROM distances').fetchone()[0]
+        self.assertEqual(hits, 4)
+
+    def test_in_process_tier_disabled(self):
+        """Test that local_entries=0 reads every lookup from the shared database."""
+        cache = DistanceCache(self.path, local_entries=0)
+        cache.set_geocode('Austin, TX', (30.2672, -97.7431))
+        cache.get_geocode('Austin, TX')
+
+        self.assertEqual(cache.stats()['tiers']['in_process'], {'hits': 0, 'entries': 0})
+
+
+class TestDistanceServiceCaching(unittest.TestCase):
+    """Test cases for DistanceService cache integration."""
+
+    def setUp(self):
+        """Create a cache and a Distance Matrix stand-in."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = DistanceCache(os.path.join(self.tmpdir.name, 'cache.sqlite3'))
+        self.server = FakeDistanceMatrixServer({('Austin, TX', 'Dallas, TX'): 195.4}).start()
+        self.service = DistanceService(
+            google_api_key='test-key',
+            google_api_url=self.server.url,
+            cache=self.cache
+        )
+
+    def tearDown(self):
+        self.server.stop()
+        self.tmpdir.cleanup()
+
+    def test_google_distance_cached(self):
+        """Test that repeated lanes do not go back to the network."""
+        first = self.service.calculate_distance('Austin, TX', 'Dallas, TX')
+        second = self.service.calculate_distance('Austin, TX', 'Dallas, TX')
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_not_found_route_negative_cached(self):
+        """Test that NOT_FOUND routes are cached without retrying Google."""
+        self.service._calculate_google_maps_distance('Austin, TX', 'Atlantis')
+        self.service._calculate_google_maps_distance('Austin, TX', 'Atlantis')
+
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_batch_uses_cache(self):
+        """Test that batch lookups only request uncached pairs."""
+        self.service.calculate_distances_batch([('Austin, TX', 'Dallas, TX')])
+        results = self.service.calculate_distances_batch([('Austin, TX', 'Dallas, TX')])
+
+        self.assertEqual(results[0]['status'], 'OK')
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_geocode_cached(self):
+        """Test that geocodes are served from the cache."""
+        self.cache.set_geocode('Austin, TX', (30.2672, -97.7431))
+        self.cache.set_geocode('Dallas, TX', (32.7767, -96.7970))
+
+        service = DistanceService(google_api_key='test-key', cache=self.cache, use_gazetteer=False)
+        distance = service._calculate_geodesic_distance('Austin, TX', 'Dallas, TX')
+
+        self.assertGreater(distance, 150)
+        self.assertLess(distance, 200)
+        self.assertEqual(self.cache.stats()['geocode_hits'], 2)
+
+    def test_distance_shared_through_store(self):
+        """Test that a lane resolved by one host is a hit for another through the shared store."""
+        store = SQLiteSharedStore(os.path.join(self.tmpdir.name, 'shared.sqlite3'))
+        first = DistanceService(
+            google_api_key='test-key',
+            google_api_url=self.server.url,
+            cache=DistanceCache(os.path.join(self.tmpdir.name, 'host1.sqlite3'), store=store)
+        )
+        # Another host: its own database and a provider it must not need
+        other_cache = DistanceCache(os.path.join(self.tmpdir.name, 'host2.sqlite3'), store=store)
+        second = DistanceService(google_api_key='test-key', google_api_url=self.server.url, cache=other_cache)
+
+        distance = first.calculate_distance('Austin, TX', 'Dallas, TX')
+
+        self.assertEqual(second.calculate_distance('austin tx', 'Dallas, Texas'), distance)
+        self.assertEqual(len(self.server.requests), 1)
+        stats = other_cache.stats()
+        self.assertEqual(stats['distance_store_hits'], 1)
+        self.assertEqual(stats['tiers']['shared_store'], {'hits': 1, 'errors': 0})
+        self.assertEqual(stats['distance_entries'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
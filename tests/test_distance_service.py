@@ -0,0 +1,391 @@
+"""Unit tests for the distance service."""
+
+import threading
+import unittest
+from unittest import mock
+import time
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from calculator.distance_service import DistanceService
+from calculator.gazetteer import get_default_gazetteer
+from tests.fake_distance_matrix import FakeDistanceMatrixServer
+
+
+class TestBatchDistanceMatrix(unittest.TestCase):
+    """Test cases for batched Google Distance Matrix requests."""
+
+    def setUp(self):
+        """Start a local Distance Matrix stand-in."""
+        self.server = FakeDistanceMatrixServer({
+            ('Austin, TX', 'Dallas, TX'): 195.4,
+            ('Austin, TX', 'Houston, TX'): 165.2,
+            ('Dallas, TX', 'Houston, TX'): 239.0,
+        }).start()
+        self.service = DistanceService(google_api_key='test-key', google_api_url=self.server.url)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_batch_returns_results_in_pair_order(self):
+        """Test that results line up with the requested pairs."""
+        pairs = [
+            ('Dallas, TX', 'Houston, TX'),
+            ('Austin, TX', 'Dallas, TX'),
+            ('Austin, TX', 'Houston, TX'),
+        ]
+        results = self.service.calculate_distances_batch(pairs)
+
+        self.assertEqual([(r['origin'], r['destination']) for r in results], pairs)
+        self.assertEqual([r['status'] for r in results], ['OK', 'OK', 'OK'])
+        self.assertAlmostEqual(results[0]['distance_miles'], 239.0, places=1)
+        self.assertAlmostEqual(results[1]['distance_miles'], 195.4, places=1)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_per_element_status(self):
+        """Test that a failed element does not fail the rest of the grid."""
+        results = self.service.calculate_distances_batch([
+            ('Austin, TX', 'Dallas, TX'),
+            ('Austin, TX', 'Atlantis'),
+        ])
+
+        self.assertEqual(results[0]['status'], 'OK')
+        self.assertEqual(results[1]['status'], 'NOT_FOUND')
+        self.assertIsNone(results[1]['distance_miles'])
+
+    def test_request_level_error_applies_to_all_pairs(self):
+        """Test that a top-level API error is reported on every pair."""
+        self.server.status = 'OVER_QUERY_LIMIT'
+        results = self.service.calculate_distances_batch([
+            ('Austin, TX', 'Dallas, TX'),
+            ('Austin, TX', 'Houston, TX'),
+        ])
+
+        for result in results:
+            self.assertEqual(result['status'], 'OVER_QUERY_LIMIT')
+            self.assertIsNone(result['distance_miles'])
+
+    def test_duplicate_pairs_requested_once(self):
+        """Test that duplicate pairs share one element."""
+        pairs = [('Austin, TX', 'Dallas, TX')] * 5
+        results = self.service.calculate_distances_batch(pairs)
+
+        self.assertEqual(len(results), 5)
+        self.assertEqual(self.server.element_count, 1)
+
+    def test_requests_respect_matrix_limits(self):
+        """Test that large batches are split within the API limits."""
+        origins = [f'Origin {i}' for i in range(30)]
+        destinations = [f'Destination {j}' for j in range(30)]
+        pairs = [(o, d) for o in origins for d in destinations]
+
+        results = self.service.calculate_distances_batch(pairs)
+
+        self.assertEqual(len(results), len(pairs))
+        for sent_origins, sent_destinations in self.server.requests:
+            self.assertLessEqual(len(sent_origins), DistanceService.MAX_MATRIX_ORIGINS)
+            self.assertLessEqual(len(sent_destinations), DistanceService.MAX_MATRIX_DESTINATIONS)
+            self.assertLessEqual(
+                len(sent_origins) * len(sent_destinations),
+                DistanceService.MAX_MATRIX_ELEMENTS
+            )
+        # Every requested pair is covered by some request
+        covered = {(o, d) for so, sd in self.server.requests for o in so for d in sd}
+        self.assertTrue(set(pairs) <= covered)
+
+    def test_shared_destinations_are_packed_together(self):
+        """Test that origins with common destinations share a request."""
+        destinations = ['Dallas, TX', 'Houston, TX']
+        pairs = [(f'Origin {i}', d) for i in range(10) for d in destinations]
+
+        self.service.calculate_distances_batch(pairs)
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.server.element_count, len(pairs))
+
+    def test_disjoint_lanes_are_not_padded(self):
+        """Test that lanes without common endpoints are billed one element each."""
+        pairs = [(f'Origin {i}', f'Destination {i}') for i in range(100)]
+
+        results = self.service.calculate_distances_batch(pairs)
+
+        self.assertEqual(len(results), len(pairs))
+        self.assertEqual(self.server.element_count, len(pairs))
+
+    def test_packing_caps_unrequested_elements(self):
+        """Test that partly overlapping origins are packed within the waste cap."""
+        pairs = [(f'Origin {i}', f'Destination {j}') for i in range(40) for j in (i % 7, i % 7 + 1, 50 + i)]
+
+        blocks = self.service._pack_matrix_requests(pairs)
+
+        for origins, destinations in blocks:
+            requested = sum(1 for pair in pairs if pair[0] in origins and pair[1] in destinations)
+            self.assertLessEqual(
+                len(origins) * len(destinations) - requested,
+                DistanceService.MAX_WASTED_ELEMENT_SHARE * requested
+            )
+        covered = {(o, d) for origins, destinations in blocks for o in origins for d in destinations}
+        self.assertTrue(set(pairs) <= covered)
+
+    def test_no_api_key(self):
+        """Test that batches without an API key report the missing key."""
+        service = DistanceService(google_api_key=None)
+        service.google_api_key = None
+        results = service.calculate_distances_batch([('Austin, TX', 'Dallas, TX')])
+
+        self.assertEqual(results[0]['status'], 'NO_API_KEY')
+        self.assertEqual(self.server.requests, [])
+
+
+class TestConcurrentGeocoding(unittest.TestCase):
+    """Test cases for concurrent origin/destination geocoding."""
+
+    LATENCY = 0.2
+
+    def setUp(self):
+        """Start a slow Nominatim stand-in."""
+        self.server = FakeDistanceMatrixServer(latency=self.LATENCY, geocodes={
+            'Austin, TX': (30.2672, -97.7431),
+            'Dallas, TX': (32.7767, -96.7970),
+        }).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def make_service(self, **kwargs):
+        service = DistanceService(
+            google_api_key=None,
+            nominatim_domain=self.server.nominatim_domain,
+            nominatim_scheme='http',
+            **kwargs
+        )
+        service.google_api_key = None
+        service.use_google_maps = False
+        return service
+
+    def test_both_ends_resolved_in_parallel(self):
+        """Test that a request costs one geocoding round trip, not two."""
+        service = self.make_service(use_gazetteer=False)
+
+        start = time.perf_counter()
+        distance = service._calculate_geodesic_distance('Austin, TX', 'Dallas, TX')
+        elapsed = time.perf_counter() - start
+
+        self.assertGreater(distance, 150)
+        self.assertEqual(sorted(self.server.geocode_requests), ['Austin, TX', 'Dallas, TX'])
+        self.assertLess(elapsed, self.LATENCY * 1.75)
+
+    def test_shared_deadline(self):
+        """Test that slow lookups are abandoned at the request deadline."""
+        service = self.make_service(use_gazetteer=False, geocode_deadline=0.05)
+
+        start = time.perf_counter()
+        self.assertIsNone(service._calculate_geodesic_distance('Austin, TX', 'Dallas, TX'))
+        self.assertLess(time.perf_counter() - start, self.LATENCY)
+
+    def test_latency_recorded(self):
+        """Test that each network lookup records its latency."""
+        service = self.make_service(use_gazetteer=False)
+        service._calculate_geodesic_distance('Austin, TX', 'Dallas, TX')
+
+        stats = service.latency_stats()['geocode']
+        self.assertEqual(stats['count'], 2)
+        self.assertGreaterEqual(stats['p50_ms'], self.LATENCY * 1000 * 0.9)
+        self.assertIn('latency', service.metrics())
+
+    def test_gazetteer_hits_skip_thread_pool(self):
+        """Test that locally known locations never reach the network."""
+        service = self.make_service()
+        service._calculate_geodesic_distance('Austin, TX', 'Dallas, TX')
+
+        self.assertEqual(self.server.geocode_requests, [])
+        self.assertEqual(service.latency_stats(), {})
+
+
+class TestConnectionPooling(unittest.TestCase):
+    """Test cases for the pooled keep-alive HTTP session."""
+
+    def setUp(self):
+        """Start a local Distance Matrix and Nominatim stand-in."""
+        self.server = FakeDistanceMatrixServer(
+            {('Austin, TX', 'Dallas, TX'): 195.4, ('Austin, TX', 'Houston, TX'): 165.2},
+            geocodes={'Austin, TX': (30.2672, -97.7431), 'Dallas, TX': (32.7767, -96.7970)}
+        ).start()
+        self.service = DistanceService(
+            google_api_key='test-key',
+            google_api_url=self.server.url,
+            use_gazetteer=False,
+            nominatim_domain=self.server.nominatim_domain,
+            nominatim_scheme='http'
+        )
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_google_connections_reused(self):
+        """Test that sequential API calls share one keep-alive connection."""
+        self.service._calculate_google_maps_distance('Austin, TX', 'Dallas, TX')
+        self.service._calculate_google_maps_distance('Austin, TX', 'Houston, TX')
+        self.service.calculate_distances_batch([('Austin, TX', 'Dallas, TX'), ('Austin, TX', 'San Antonio, TX')])
+
+        stats = self.service.connection_stats()['google']
+        self.assertEqual(stats['requests'], 3)
+        self.assertEqual(stats['connections'], 1)
+        self.assertEqual(stats['reused'], 2)
+
+    def test_nominatim_connections_reused(self):
+        """Test that geocoding reuses connections too."""
+        self.service._geocode_remote('Austin, TX')
+        self.service._geocode_remote('Dallas, TX')
+
+        stats = self.service.connection_stats()['nominatim']
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(stats['connections'], 1)
+
+    def test_retries_server_errors(self):
+        """Test that 5xx and 429 responses are retried."""
+        self.server.http_errors.extend([503, 429])
+        distance = self.service._calculate_google_maps_distance('Austin, TX', 'Dallas, TX')
+
+        self.assertAlmostEqual(distance, 195.4, places=1)
+        self.assertEqual(self.server.attempts, 3)
+
+    def test_gives_up_after_max_retries(self):
+        """Test that persistent failures fall through as a failed request."""
+        service = DistanceService(google_api_key='test-key', google_api_url=self.server.url, max_retries=1)
+        self.server.http_errors.extend([503, 503, 503])
+
+        results = service.calculate_distances_batch([('Austin, TX', 'Dallas, TX')])
+
+        self.assertEqual(results[0]['status'], 'REQUEST_FAILED')
+        self.assertEqual(self.server.attempts, 2)
+
+    def test_retries_pass_the_rate_limiter(self):
+        """Test that every retry takes a rate-limiter token like a new request."""
+        self.server.http_errors.extend([503, 429])
+        with mock.patch.object(self.service, '_throttle', wraps=self.service._throttle) as throttle:
+            self.service.calculate_distances_batch([('Austin, TX', 'Dallas, TX')])
+
+        self.assertEqual(throttle.call_count, 3)
+        self.assertEqual(self.service.google_breaker.stats()['state'], 'closed')
+
+    def test_other_server_errors_not_retried(self):
+        """Test that only 429 and 503 responses are retried."""
+        self.server.http_errors.append(500)
+
+        results = self.service.calculate_distances_batch([('Austin, TX', 'Dallas, TX')])
+
+        self.assertEqual(results[0]['status'], 'REQUEST_FAILED')
+        self.assertEqual(self.server.attempts, 1)
+
+    def test_read_timeout_not_retried(self):
+        """Test that a hung provider costs one timeout, not one per retry."""
+        self.server.latency = 1.0
+        self.service.HTTP_TIMEOUT_SECONDS = 0.3
+
+        start = time.monotonic()
+        results = self.service.calculate_distances_batch([('Austin, TX', 'Dallas, TX')])
+
+        self.assertEqual(results[0]['status'], 'REQUEST_FAILED')
+        self.assertLess(time.monotonic() - start, 0.9)
+        self.assertEqual(self.server.attempts, 1)
+
+    def test_metrics_include_connections(self):
+        """Test that connection reuse is reported in metrics."""
+        self.assertIn('connections', self.service.metrics())
+
+
+class TestHedgedResolution(unittest.TestCase):
+    """Test cases for latency-budgeted distance resolution."""
+
+    @classmethod
+    def setUpClass(cls):
+        # Load the gazetteer up front so it does not count against budgets
+        get_default_gazetteer().lookup('Austin, TX')
+
+    def setUp(self):
+        """Start a Distance Matrix stand-in."""
+        self.server = FakeDistanceMatrixServer({('Austin, TX', 'Dallas, TX'): 195.4}).start()
+        self.service = DistanceService(
+            google_api_key='test-key',
+            google_api_url=self.server.url,
+            hedge_delay=0.1
+        )
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_fast_primary_wins(self):
+        """Test that a responsive Google answer is used."""
+        result = self.service.resolve_distance('Austin, TX', 'Dallas, TX')
+
+        self.assertEqual(result['source'], 'google')
+        self.assertAlmostEqual(result['distance_miles'], 195.4, places=1)
+
+    def test_slow_primary_hedged(self):
+        """Test that the fallback answers when Google is slower than the hedge delay."""
+        self.server.latency = 1.0
+        result = self.service.resolve_distance('Austin, TX', 'Dallas, TX', budget=2.0)
+
+        self.assertEqual(result['source'], 'geodesic')
+        self.assertGreater(result['distance_miles'], 150)
+        self.assertLess(result['elapsed_ms'], 600)
+
+    def test_fallback_not_queued_behind_hung_attempts(self):
+        """Test that the fallback answers in time while every hedge thread is busy."""
+        self.server.latency = 1.0
+        self.service.HEDGE_WORKERS = 2
+        release = threading.Event()
+        self.addCleanup(release.set)
+        for _ in range(self.service.HEDGE_WORKERS):
+            self.service._hedge_pool().submit(release.wait, 5.0)
+
+        result = self.service.resolve_distance('Austin, TX', 'Dallas, TX', budget=2.0)
+
+        self.assertEqual(result['source'], 'geodesic')
+        self.assertLess(result['elapsed_ms'], 600)
+
+    def test_failed_primary_falls_back_immediately(self):
+        """Test that a Google failure starts the fallback without waiting."""
+        self.server.status = 'REQUEST_DENIED'
+        result = self.service.resolve_distance('Austin, TX', 'Dallas, TX', hedge_delay=5.0)
+
+        self.assertEqual(result['source'], 'geodesic')
+        self.assertLess(result['elapsed_ms'], 1000)
+
+    def test_budget_exhausted(self):
+        """Test that nothing is returned once the budget runs out."""
+        slow = FakeDistanceMatrixServer(latency=1.0, geocodes={'Somewhere': (31.0, -97.0)}).start()
+        self.addCleanup(slow.stop)
+        service = DistanceService(
+            google_api_key=None,
+            use_gazetteer=False,
+            nominatim_domain=slow.nominatim_domain,
+            nominatim_scheme='http'
+        )
+        service.use_google_maps = False
+
+        result = service.resolve_distance('Somewhere', 'Elsewhere', budget=0.2)
+
+        self.assertIsNone(result['distance_miles'])
+        self.assertIsNone(result['source'])
+        self.assertLess(result['elapsed_ms'], 500)
+        self.assertEqual(service.metrics()['resolution_sources'], {'unresolved': 1})
+
+    def test_calculate_distance_uses_budget(self):
+        """Test that a configured latency budget routes through hedged resolution."""
+        self.server.latency = 1.0
+        self.service.latency_budget = 2.0
+
+        start = time.perf_counter()
+        distance = self.service.calculate_distance('Austin, TX', 'Dallas, TX')
+
+        self.assertGreater(distance, 150)
+        self.assertLess(time.perf_counter() - start, 0.6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""Unit tests for the offline gazetteer."""
+
+import unittest
+import time
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from calculator.gazetteer import Gazetteer, get_default_gazetteer
+from calculator.distance_service import DistanceService
+
+
+class TestGazetteer(unittest.TestCase):
+    """Test cases for Gazetteer lookups."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Load the bundled gazetteer once."""
+        cls.gazetteer = get_default_gazetteer()
+
+    def assertNear(self, coords, latitude, longitude, tolerance=0.5):
+        self.assertIsNotNone(coords)
+        self.assertAlmostEqual(coords[0], latitude, delta=tolerance)
+        self.assertAlmostEqual(coords[1], longitude, delta=tolerance)
+
+    def test_zip_lookup(self):
+        """Test ZIP codes in several formats."""
+        self.assertNear(self.gazetteer.lookup('78701'), 30.27, -97.74)
+        self.assertNear(self.gazetteer.lookup('78701-1234'), 30.27, -97.74)
+        self.assertNear(self.gazetteer.lookup('Austin, TX 78701'), 30.27, -97.74)
+
+    def test_city_state_lookup(self):
+        """Test common city/state spellings."""
+        self.assertNear(self.gazetteer.lookup('Bentonville, AR'), 36.37, -94.21)
+        self.assertNear(self.gazetteer.lookup('austin tx'), 30.27, -97.74)
+        self.assertNear(self.gazetteer.lookup('Seattle, Washington'), 47.61, -122.33)
+        self.assertNear(self.gazetteer.lookup('New York, NY, USA'), 40.75, -73.99)
+
+    def test_saint_abbreviation(self):
+        """Test that St./Saint spellings resolve to the same entry."""
+        expected = self.gazetteer.lookup('Saint Louis MO')
+        self.assertIsNotNone(expected)
+        self.assertEqual(self.gazetteer.lookup('St. Louis, MO'), expected)
+        self.assertEqual(self.gazetteer.lookup('ST LOUIS,MO'), expected)
+
+    def test_state_names_and_codes(self):
+        """Test that multi-word state names are recognised."""
+        self.assertEqual(
+            self.gazetteer.lookup('Charleston, West Virginia'),
+            self.gazetteer.lookup('Charleston, WV')
+        )
+        self.assertNotEqual(
+            self.gazetteer.lookup('Charleston, WV'),
+            self.gazetteer.lookup('Charleston, SC')
+        )
+
+    def test_bare_state(self):
+        """Test that a bare state resolves to its centroid."""
+        self.assertNear(self.gazetteer.lookup('Texas'), 31.0, -97.5, tolerance=3)
+
+    def test_unknown_and_ambiguous(self):
+        """Test that unknown or ambiguous strings are left to Nominatim."""
+        self.assertIsNone(self.gazetteer.lookup('Atlantis'))
+        self.assertIsNone(self.gazetteer.lookup('Springfield'))
+        self.assertIsNone(self.gazetteer.lookup('1600 Unknown Road, Nowhere, ZZ'))
+
+    def test_lookup_speed(self):
+        """Test that lookups avoid any network-scale latency."""
+        start = time.perf_counter()
+        for _ in range(1000):
+            self.gazetteer.lookup('St. Louis, MO')
+        per_lookup = (time.perf_counter() - start) / 1000
+        self.assertLess(per_lookup, 0.001)
+
+
+class TestDistanceServiceGazetteer(unittest.TestCase):
+    """Test cases for DistanceService gazetteer integration."""
+
+    def test_geodesic_without_network(self):
+        """Test that known locations never reach Nominatim."""
+        service = DistanceService(google_api_key=None)
+        service.google_api_key = None
+        service.use_google_maps = False
+
+        def fail(*args, **kwargs):
+            raise AssertionError('Nominatim should not be called')
+        service.geolocator.geocode = fail
+
+        distance = service.calculate_distance('Austin, TX', 'Dallas, TX')
+
+        self.assertGreater(distance, 170)
+        self.assertLess(distance, 200)
+
+    def test_custom_gazetteer_path(self):
+        """Test that a gazetteer can be built from an explicit path."""
+        gazetteer = Gazetteer(Gazetteer.DEFAULT_PATH)
+        self.assertIsNotNone(gazetteer.lookup('72712'))
+
+
+if __name__ == '__main__':
+    unittest.main()
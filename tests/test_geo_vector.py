@@ -0,0 +1,109 @@
+"""Unit tests for the vectorized haversine distance engine."""
+
+import unittest
+import time
+from pathlib import Path
+import sys
+
+import numpy as np
+from geopy.distance import geodesic
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from calculator.geo_vector import (
+    haversine_miles,
+    pairwise_haversine_miles,
+    coordinate_pair_distances,
+    HAVERSINE_MAX_RELATIVE_ERROR_CONUS
+)
+from calculator.distance_service import DistanceService
+
+
+class TestHaversine(unittest.TestCase):
+    """Test cases for haversine_miles and helpers."""
+
+    def test_error_bound_versus_geodesic(self):
+        """Test the documented error bound on random continental US lanes."""
+        rng = np.random.default_rng(42)
+        lat1, lat2 = rng.uniform(25, 49, 500), rng.uniform(25, 49, 500)
+        lon1, lon2 = rng.uniform(-124, -67, 500), rng.uniform(-124, -67, 500)
+
+        fast = haversine_miles(lat1, lon1, lat2, lon2)
+        exact = np.array([
+            geodesic((a, b), (c, d)).miles
+            for a, b, c, d in zip(lat1, lon1, lat2, lon2)
+        ])
+
+        relative_error = np.abs(fast - exact) / exact
+        self.assertLessEqual(relative_error.max(), HAVERSINE_MAX_RELATIVE_ERROR_CONUS)
+
+    def test_one_to_many_broadcast(self):
+        """Test that a single origin broadcasts against many destinations."""
+        destinations = np.array([[32.7767, -96.7970], [29.7604, -95.3698]])
+        distances = haversine_miles(30.2672, -97.7431, destinations[:, 0], destinations[:, 1])
+
+        self.assertEqual(distances.shape, (2,))
+        np.testing.assert_allclose(
+            distances,
+            pairwise_haversine_miles([[30.2672, -97.7431]] * 2, destinations)
+        )
+
+    def test_zero_distance(self):
+        """Test that identical points are zero miles apart."""
+        self.assertAlmostEqual(float(haversine_miles(36.37, -94.21, 36.37, -94.21)), 0.0)
+
+    def test_missing_coordinates_are_nan(self):
+        """Test that gaps in coordinate lists produce NaN."""
+        distances = coordinate_pair_distances(
+            [(30.2672, -97.7431), None],
+            [(32.7767, -96.7970), (32.7767, -96.7970)]
+        )
+
+        self.assertFalse(np.isnan(distances[0]))
+        self.assertTrue(np.isnan(distances[1]))
+
+    def test_100k_lanes_in_milliseconds(self):
+        """Test throughput on 100k lanes."""
+        rng = np.random.default_rng(7)
+        coords = rng.uniform([25, -124, 25, -124], [49, -67, 49, -67], size=(100000, 4))
+
+        start = time.perf_counter()
+        distances = haversine_miles(coords[:, 0], coords[:, 1], coords[:, 2], coords[:, 3])
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(distances), 100000)
+        self.assertLess(elapsed, 0.1)
+
+
+class TestDistanceServiceBatchGeodesic(unittest.TestCase):
+    """Test cases for the batch geodesic path on DistanceService."""
+
+    def setUp(self):
+        self.service = DistanceService(google_api_key=None)
+        self.service.google_api_key = None
+        self.service.use_google_maps = False
+
+    def test_batch_matches_single_pair_geodesic(self):
+        """Test that batch distances agree with the per-pair geodesic path."""
+        pairs = [('Austin, TX', 'Dallas, TX'), ('Seattle, WA', 'Miami, FL')]
+        batch = self.service.geodesic_distances_batch(pairs)
+
+        for (origin, destination), distance in zip(pairs, batch):
+            single = self.service._calculate_geodesic_distance(origin, destination)
+            self.assertAlmostEqual(distance, single, delta=single * HAVERSINE_MAX_RELATIVE_ERROR_CONUS)
+
+    def test_one_to_many(self):
+        """Test distances from one origin to several destinations."""
+        distances = self.service.calculate_distances_from(
+            'Bentonville, AR',
+            ['Seattle, WA', 'Austin, TX', 'Bentonville, AR']
+        )
+
+        self.assertEqual(len(distances), 3)
+        self.assertGreater(distances[0], distances[1])
+        self.assertAlmostEqual(distances[2], 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+"""Unit tests for the memory-mapped lane distance table."""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from calculator.distance_service import DistanceService
+from calculator.lane_table import HEADER, LaneTable, build_lane_table, main
+from tests.fake_distance_matrix import FakeDistanceMatrixServer
+
+
+class TestLaneTable(unittest.TestCase):
+    """Test cases for importing and querying lane tables."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.csv = os.path.join(self.tmp.name, 'lanes.csv')
+        self.table_path = os.path.join(self.tmp.name, 'lanes.bin')
+        pd.DataFrame({
+            'origin': ['Boston, MA', 'Boston, MA', 'Austin, TX', 'Denver, CO', 'Boston, MA'],
+            'destination': ['New York, NY', 'Chicago, IL', 'Dallas, TX', 'Nowhere', 'New York, NY'],
+            'distance_miles': [215.0, 983.4, 195.4, None, 216.2],
+        }).to_csv(self.csv, index=False)
+
+    def test_build_and_lookup(self):
+        """Test that imported lanes are found by normalized key."""
+        count = build_lane_table(self.csv, self.table_path)
+        table = LaneTable(self.table_path)
+
+        self.assertEqual(count, 3)
+        self.assertEqual(len(table), 3)
+        self.assertAlmostEqual(table.lookup('Austin, TX', 'Dallas, TX'), 195.4, places=2)
+        self.assertAlmostEqual(table.lookup('  austin,   tx', 'DALLAS, TX'), 195.4, places=2)
+        self.assertIsNone(table.lookup('Dallas, TX', 'Austin, TX'))
+        self.assertIsNone(table.lookup('Denver, CO', 'Nowhere'))
+
+    def test_duplicate_lanes_keep_last_row(self):
+        """Test that the last row for a lane wins."""
+        build_lane_table(self.csv, self.table_path)
+        self.assertAlmostEqual(LaneTable(self.table_path).lookup('Boston, MA', 'New York, NY'), 216.2, places=2)
+
+    def test_symmetric_lookup(self):
+        """Test that symmetric tables answer the reverse direction."""
+        build_lane_table(self.csv, self.table_path)
+        table = LaneTable(self.table_path, symmetric=True)
+        self.assertAlmostEqual(table.lookup('Dallas, TX', 'Austin, TX'), 195.4, places=2)
+
+    def test_memory_mapped(self):
+        """Test that the table is mapped rather than loaded into Python objects."""
+        build_lane_table(self.csv, self.table_path)
+        table = LaneTable(self.table_path)
+        len(table)
+        self.assertIsInstance(table._keys, np.memmap)
+        self.assertIsInstance(table._miles, np.memmap)
+
+    def test_lookup_many_large_table(self):
+        """Test vectorized lookups against a larger table."""
+        count = 20000
+        pd.DataFrame({
+            'origin': [f'Office {i}' for i in range(count)],
+            'destination': [f'Office {i + 1}' for i in range(count)],
+            'distance_miles': np.arange(count, dtype=float) + 10,
+        }).to_csv(self.csv, index=False)
+        build_lane_table(self.csv, self.table_path)
+        table = LaneTable(self.table_path)
+
+        miles = table.lookup_many([('Office 5', 'Office 6'), ('Office 19999', 'Office 20000'), ('Office 1', 'Office 5')])
+
+        self.assertEqual(miles[0], 15.0)
+        self.assertEqual(miles[1], 20009.0)
+        self.assertTrue(np.isnan(miles[2]))
+        self.assertEqual(table.stats()['hits'], 2)
+
+    def test_cli(self):
+        """Test the import command line."""
+        self.assertEqual(main([self.csv, self.table_path]), 0)
+        self.assertEqual(len(LaneTable(self.table_path)), 3)
+
+    def test_rejects_foreign_file(self):
+        """Test that a file without the lane table header is refused."""
+        with open(self.table_path, 'wb') as f:
+            f.write(b'not a lane table')
+        with self.assertRaises(ValueError):
+            LaneTable(self.table_path).lookup('A', 'B')
+
+    def test_open_default_skips_outdated_table(self):
+        """Test that a version 1 table is ignored at startup instead of failing lookups."""
+        build_lane_table(self.csv, self.table_path)
+        with mock.patch.dict(os.environ, {'LANE_TABLE_PATH': self.table_path}):
+            self.assertIsNotNone(LaneTable.open_default())
+
+            with open(self.table_path, 'r+b') as f:
+                magic, _, flags, count = HEADER.unpack(f.read(HEADER.size))
+                f.seek(0)
+                f.write(HEADER.pack(magic, 1, flags, count))
+            table = LaneTable.open_default()
+
+        self.assertIsNone(table)
+        service = DistanceService(google_api_key=None, lane_table=table)
+        self.assertGreater(service.calculate_distance('Austin, TX', 'Dallas, TX'), 0)
+
+
+class TestDistanceServiceLaneTable(unittest.TestCase):
+    """Test cases for lane table lookups in DistanceService."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        csv = os.path.join(self.tmp.name, 'lanes.csv')
+        table_path = os.path.join(self.tmp.name, 'lanes.bin')
+        pd.DataFrame({
+            'origin': ['Austin, TX'], 'destination': ['Dallas, TX'], 'distance_miles': [190.0]
+        }).to_csv(csv, index=False)
+        build_lane_table(csv, table_path)
+
+        self.server = FakeDistanceMatrixServer({('Austin, TX', 'Houston, TX'): 165.2}).start()
+        self.addCleanup(self.server.stop)
+        self.service = DistanceService(
+            google_api_key='test-key',
+            google_api_url=self.server.url,
+            lane_table=LaneTable(table_path)
+        )
+
+    def test_table_consulted_before_network(self):
+        """Test that table lanes never reach Google."""
+        self.assertEqual(self.service.calculate_distance('Austin, TX', 'Dallas, TX'), 190.0)
+        self.assertEqual(self.service.resolve_distance('Austin, TX', 'Dallas, TX')['source'], 'lane_table')
+        self.assertEqual(self.server.requests, [])
+
+    def test_batch_only_requests_missing_lanes(self):
+        """Test that batch lookups send only lanes absent from the table."""
+        distances = self.service.calculate_distances([('Austin, TX', 'Dallas, TX'), ('Austin, TX', 'Houston, TX')])
+
+        self.assertEqual(distances[0], 190.0)
+        self.assertAlmostEqual(distances[1], 165.2, places=1)
+        self.assertEqual(self.server.element_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+"""Unit tests for location canonicalization."""
+
+import io
+import os
+import tempfile
+import unittest
+from pathlib import Path
+import sys
+
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from calculator.bulk_processor import BulkProcessor
+from calculator.distance_cache import DistanceCache, normalize_cache_key
+from calculator.distance_service import DistanceService
+from calculator.location_canonicalizer import LocationCanonicalizer
+
+
+class TestLocationCanonicalizer(unittest.TestCase):
+    """Test cases for canonical location spellings."""
+
+    def setUp(self):
+        self.canonicalizer = LocationCanonicalizer()
+
+    def test_city_state_variants_collapse(self):
+        """Test that case, punctuation and state-name variants collapse."""
+        variants = ['Austin, TX', 'austin tx', 'AUSTIN,TX', 'Austin, Texas', '  austin ,  texas ', 'Austin, TX, USA']
+        self.assertEqual({self.canonicalizer.canonicalize(v) for v in variants}, {'Austin, TX'})
+
+    def test_zip_normalized_and_kept(self):
+        """Test that ZIP+4 is trimmed and the ZIP stays part of the key."""
+        self.assertEqual(self.canonicalizer.canonicalize('Austin, Texas 78701-1234'), 'Austin, TX 78701')
+        self.assertEqual(self.canonicalizer.canonicalize('78701'), '78701')
+
+    def test_abbreviations_expanded(self):
+        """Test that St./Ft./Mt. city prefixes are spelled out."""
+        self.assertEqual(self.canonicalizer.canonicalize('St. Louis, MO'), 'Saint Louis, MO')
+        self.assertEqual(self.canonicalizer.canonicalize('ft worth tx'), 'Fort Worth, TX')
+
+    def test_aliases(self):
+        """Test built-in and custom aliases."""
+        self.assertEqual(self.canonicalizer.canonicalize('NYC'), 'New York, NY')
+        custom = LocationCanonicalizer(aliases={'HQ': 'Bentonville, AR'})
+        self.assertEqual(custom.canonicalize('hq'), 'Bentonville, AR')
+
+    def test_street_address_kept(self):
+        """Test that the street part of an address is preserved."""
+        self.assertEqual(
+            self.canonicalizer.canonicalize('123  Main St, austin, texas 78701'),
+            '123 Main St, Austin, TX 78701'
+        )
+
+    def test_unrecognized_left_readable(self):
+        """Test that non-US strings are only whitespace-normalized."""
+        self.assertEqual(self.canonicalizer.canonicalize('Toronto ,  Ontario'), 'Toronto, Ontario')
+        self.assertEqual(self.canonicalizer.canonicalize('New York'), 'New York')
+
+    def test_collapse_stats(self):
+        """Test that collapse ratios count distinct raw vs canonical values."""
+        stats = self.canonicalizer.collapse_stats([
+            ('Austin, TX', 'Dallas, TX'),
+            ('austin tx', 'dallas, texas'),
+            ('AUSTIN,TX', 'Houston, TX'),
+        ])
+
+        self.assertEqual(stats['raw_locations'], 6)
+        self.assertEqual(stats['canonical_locations'], 3)
+        self.assertEqual(stats['location_collapse_ratio'], 2.0)
+        self.assertEqual(stats['raw_lanes'], 3)
+        self.assertEqual(stats['canonical_lanes'], 2)
+
+    def test_cache_keys_shared(self):
+        """Test that cache entries are shared across spellings."""
+        self.assertEqual(normalize_cache_key('Austin, Texas'), normalize_cache_key('AUSTIN,TX'))
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = DistanceCache(os.path.join(tmp, 'cache.sqlite3'))
+            cache.set_distance('Austin, Texas', 'dallas tx', 'google_driving', 195.4)
+            self.assertEqual(cache.get_distance('AUSTIN,TX', 'Dallas, TX', 'google_driving'), 195.4)
+
+
+class TestBulkCanonicalization(unittest.TestCase):
+    """Test cases for canonicalization of bulk uploads."""
+
+    def test_summary_reports_collapse(self):
+        """Test that bulk results use canonical locations and report collapse ratios."""
+        frame = pd.DataFrame({
+            'origin': ['Austin, TX', 'austin tx', 'AUSTIN, Texas'],
+            'destination': ['Dallas, TX', 'dallas, texas', 'Dallas TX'],
+            'weight': [5000, 5000, 5000],
+            'distance_miles': [195, 195, 195],
+        })
+        stream = io.BytesIO()
+        frame.to_excel(stream, index=False)
+        stream.seek(0)
+
+        processor = BulkProcessor(distance_service=DistanceService(google_api_key=None))
+        result = processor.process_bulk_calculations(stream)
+
+        self.assertEqual({row['origin'] for row in result['results']}, {'Austin, TX'})
+        canonicalization = result['summary']['canonicalization']
+        self.assertEqual(canonicalization['raw_lanes'], 3)
+        self.assertEqual(canonicalization['canonical_lanes'], 1)
+        self.assertEqual(canonicalization['lane_collapse_ratio'], 3.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+"""Unit tests for columnar move batches."""
+
+import io
+import unittest
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from calculator.cost_engine import HouseholdGoodsCostCalculator
+from calculator.move_batch import MISSING_DISTANCE_ERROR, MoveBatch
+
+
+class TestMoveBatch(unittest.TestCase):
+    """Test cases for normalizing and validating a batch column by column."""
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'origin': [' Austin, TX ', 'Dallas, TX', '', 'Miami, FL', 'Denver, CO', 'Boise'],
+            'destination': ['Dallas, TX', 'Austin, TX', 'Austin, TX', 'Austin, TX', 'Austin, TX', 'Austin, TX'],
+            'distance_miles': [195, None, 200, 'far', 100, ''],
+            'weight': [5000, 3000, 'heavy', 4000, 0, 2000],
+            'packing_service': ['Full_Pack', 'self_pack', 'self_pack', 'self_pack', 'self_pack', None],
+            'include_insurance': ['yes', 'no', True, False, 1, 0],
+        })
+
+    def test_from_frame_normalizes_and_validates(self):
+        """Test values are normalized and errors keep the per-row precedence."""
+        batch = MoveBatch.from_frame(self.df)
+
+        self.assertEqual(batch.row_number.tolist(), [2, 3, 4, 5, 6, 7])
+        self.assertEqual(
+            batch.errors.tolist(),
+            [
+                None,
+                None,
+                "could not convert string to float: 'heavy'",
+                "could not convert string to float: 'far'",
+                "Weight must be greater than 0, got 0.0",
+                None,
+            ]
+        )
+        self.assertEqual(batch.valid.tolist(), [True, True, False, False, False, True])
+
+        inputs = list(batch.inputs())
+        self.assertEqual(inputs[0], ('Austin, TX', 'Dallas, TX', 195.0, 5000.0, 'full_pack', 'no_storage', True))
+        self.assertEqual(inputs[1], ('Dallas, TX', 'Austin, TX', None, 3000.0, 'self_pack', 'no_storage', False))
+        self.assertIsNone(inputs[2])
+        self.assertEqual(inputs[5][2], None)
+        self.assertEqual(inputs[5][4], str(self.df['packing_service'][5]).lower())  # str() of the cell, as before
+
+    def test_columns_are_typed(self):
+        """Test locations are categorical and numbers are float64 arrays."""
+        batch = MoveBatch.from_frame(self.df)
+
+        self.assertIsInstance(batch.destination, pd.Categorical)
+        self.assertEqual(list(batch.destination.categories), ['Austin, TX', 'Dallas, TX'])
+        self.assertEqual(batch.weight_pounds.dtype, np.float64)
+        self.assertEqual(batch.include_insurance.dtype, bool)
+
+    def test_from_json_rows_and_columns_agree(self):
+        """Test JSON row objects and column arrays build the same batch."""
+        rows = [
+            {'origin': 'Austin, TX', 'destination': 'Dallas, TX', 'weight': 5000, 'distance_miles': 195},
+            {'origin': 'Dallas, TX', 'destination': '', 'weight': 3000},
+        ]
+        columns = {
+            'origin': ['Austin, TX', 'Dallas, TX'],
+            'destination': ['Dallas, TX', ''],
+            'weight': [5000, 3000],
+            'distance_miles': [195, None],
+        }
+
+        for payload in (rows, columns):
+            batch = MoveBatch.from_json(payload)
+            self.assertEqual(batch.row_number.tolist(), [1, 2])
+            self.assertEqual(list(batch.inputs())[0], ('Austin, TX', 'Dallas, TX', 195.0, 5000.0, 'self_pack', 'no_storage', True))
+            self.assertEqual(batch.errors[1], "Origin and destination are required")
+
+    def test_from_csv_matches_from_frame(self):
+        """Test CSV uploads normalize like spreadsheet rows."""
+        data = self.df.to_csv(index=False).encode('utf-8')
+
+        batch = MoveBatch.from_csv(data)
+
+        self.assertEqual(list(batch.inputs())[:2], list(MoveBatch.from_frame(self.df).inputs())[:2])
+
+    def test_with_distances_and_take(self):
+        """Test resolved lanes fill distances and unresolved lanes become errors."""
+        batch = MoveBatch.from_frame(self.df)
+
+        self.assertEqual(batch.lanes_to_resolve(), [('Dallas, TX', 'Austin, TX'), ('Boise', 'Austin, TX')])
+        resolved = batch.with_distances({('Dallas, TX', 'Austin, TX'): 195.0})
+
+        self.assertEqual(resolved.distance_miles[1], 195.0)
+        self.assertEqual(resolved.errors[5], MISSING_DISTANCE_ERROR)
+        self.assertTrue(np.isnan(batch.distance_miles[1]))
+
+        valid = resolved.take(resolved.valid)
+        self.assertEqual(valid.row_number.tolist(), [2, 3])
+
+    def test_from_moves_prices_like_calculator(self):
+        """Test argument tuples round-trip and regions are derived per location."""
+        calculator = HouseholdGoodsCostCalculator()
+        moves = [
+            ('Austin, TX', 'Dallas, TX', 195.0, 5000.0, 'self_pack', 'no_storage', True),
+            ('Austin, TX', 'Seattle, WA', 2100.0, 8000.0, 'full_pack', 'no_storage', False),
+        ]
+
+        batch = MoveBatch.from_moves(moves, row_numbers=[10, 11])
+        frame = batch.to_frame(calculator)
+
+        self.assertEqual(list(batch.inputs()), moves)
+        self.assertEqual(frame['row_number'].tolist(), [10, 11])
+        self.assertEqual(frame['origin_state'].tolist(), ['TX', 'TX'])
+        self.assertEqual(frame['destination_region'].tolist()[1], calculator._determine_region('Seattle, WA'))
+
+    def test_result_rows_round_trip(self):
+        """Test row-format results rebuild the batch they were built from."""
+        calculator = HouseholdGoodsCostCalculator()
+        quote = calculator.calculate_should_cost('Austin, TX', 'Dallas, TX', 195, 5000)
+        results = [
+            {**quote, 'row_number': 2, 'status': 'success'},
+            {
+                'row_number': 3,
+                'status': 'failed',
+                'error': MISSING_DISTANCE_ERROR,
+                'origin': 'Reno, NV',
+                'destination': 'N/A',
+                'total_should_cost': 0
+            },
+            {**quote, 'row_number': 4, 'status': 'success'},
+        ]
+
+        batch = MoveBatch.from_results(results)
+
+        self.assertEqual(batch.priced.tolist(), [True, False, True])
+        self.assertEqual(batch.result_rows(), results)
+        self.assertEqual(batch.result_rows(1, 1), results[1:2])
+        self.assertEqual(batch.take(np.array([2])).result_rows(), results[2:])
+
+
+if __name__ == '__main__':
+    unittest.main()
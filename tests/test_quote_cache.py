@@ -0,0 +1,105 @@
+"""Unit tests for quote memoization."""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from calculator.cost_engine import HouseholdGoodsCostCalculator
+from calculator.quote_cache import QuoteCache
+from calculator.shared_cache import SQLiteSharedStore
+
+MATRIX = Path(__file__).parent.parent / 'data' / 'household_goods_matrix.json'
+
+
+class TestQuoteCache(unittest.TestCase):
+    """Test cases for QuoteCache."""
+
+    def setUp(self):
+        """Copy the rate matrix so tests can change it."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.matrix_file = os.path.join(self.tmpdir.name, 'matrix.json')
+        shutil.copy(MATRIX, self.matrix_file)
+        self.calculator = HouseholdGoodsCostCalculator(self.matrix_file)
+        self.inputs = {
+            'origin': 'Austin, TX', 'destination': 'Dallas, TX', 'weight': 8000.0,
+            'packing_service': 'self_pack', 'storage_option': 'no_storage',
+            'include_insurance': True, 'distance_miles': None, 'custom_rates': {},
+        }
+
+    def test_hit_returns_same_etag(self):
+        """Test that a memoized quote comes back with the ETag it was stored under."""
+        cache = QuoteCache(self.calculator)
+        self.assertIsNone(cache.get(self.inputs))
+
+        etag = cache.put(self.inputs, {'success': True, 'total': 1})
+
+        self.assertEqual(cache.get(dict(self.inputs)), (etag, {'success': True, 'total': 1}))
+        self.assertEqual(cache.stats()['in_process']['hits'], 1)
+
+    def test_rate_profile_is_part_of_key(self):
+        """Test that custom rate overrides get their own entries."""
+        cache = QuoteCache(self.calculator)
+        cache.put(self.inputs, {'total': 1})
+
+        self.assertIsNone(cache.get({**self.inputs, 'custom_rates': {'discount': 0.1}}))
+        self.assertIsNone(cache.get({**self.inputs, 'weight': 8001.0}))
+
+    def test_matrix_reload_invalidates(self):
+        """Test that changing the rate matrix file invalidates cached quotes."""
+        cache = QuoteCache(self.calculator)
+        old_etag = cache.put(self.inputs, {'total': 1})
+
+        with open(self.matrix_file) as f:
+            matrix = json.load(f)
+        matrix['fuel_surcharge'] += 0.01
+        with open(self.matrix_file, 'w') as f:
+            json.dump(matrix, f)
+        os.utime(self.matrix_file, (time.time() + 10, time.time() + 10))
+        self.calculator._last_reload_check = 0.0
+
+        self.assertTrue(self.calculator.reload_if_changed())
+        self.assertIsNone(cache.get(self.inputs))
+        self.assertNotEqual(cache.put(self.inputs, {'total': 2}), old_etag)
+        self.assertEqual(cache.stats()['invalidations'], 1)
+        self.assertEqual(cache.stats()['in_process']['entries'], 1)
+
+    def test_reload_check_is_rate_limited(self):
+        """Test that the matrix file is not re-checked on every call."""
+        self.calculator.reload_if_changed()
+        os.utime(self.matrix_file, (time.time() + 10, time.time() + 10))
+
+        self.assertFalse(self.calculator.reload_if_changed())
+
+    def test_memory_bound_evicts_lru(self):
+        """Test that the in-process tier stays within its byte budget."""
+        cache = QuoteCache(self.calculator, max_bytes=1000)
+        for i in range(20):
+            cache.put({**self.inputs, 'weight': float(i)}, {'padding': 'x' * 100})
+
+        stats = cache.stats()['in_process']
+        self.assertLessEqual(stats['bytes'], 1000)
+        self.assertLess(stats['entries'], 20)
+        self.assertIsNotNone(cache.get({**self.inputs, 'weight': 19.0}))
+        self.assertIsNone(cache.get({**self.inputs, 'weight': 0.0}))
+
+    def test_shared_between_workers(self):
+        """Test that a quote cached by one worker is served to another."""
+        store = SQLiteSharedStore(os.path.join(self.tmpdir.name, 'shared.sqlite3'))
+        etag = QuoteCache(self.calculator, store=store).put(self.inputs, {'total': 1})
+        sibling = QuoteCache(HouseholdGoodsCostCalculator(self.matrix_file), store=store)
+
+        self.assertEqual(sibling.get(self.inputs), (etag, {'total': 1}))
+        self.assertEqual(sibling.stats()['shared']['hits'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+"""Unit tests for the provider rate limiter."""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from calculator.distance_service import DistanceService
+from calculator.rate_limiter import (
+    PRIORITY_BULK, PRIORITY_INTERACTIVE, ProviderRateLimiter, RateLimitExceeded,
+    current_priority, lookup_priority
+)
+from tests.fake_distance_matrix import FakeDistanceMatrixServer
+
+
+class TestProviderRateLimiter(unittest.TestCase):
+    """Test cases for token-bucket scheduling."""
+
+    def test_burst_then_throttled(self):
+        """Test that requests beyond the burst wait for refill."""
+        limiter = ProviderRateLimiter(rates={'google': 10.0}, bursts={'google': 2})
+
+        self.assertLess(limiter.acquire('google'), 0.01)
+        self.assertLess(limiter.acquire('google'), 0.01)
+        waited = limiter.acquire('google')
+
+        self.assertGreater(waited, 0.05)
+        self.assertLess(waited, 0.2)
+
+    def test_unlisted_provider_not_throttled(self):
+        """Test that providers without a rate pass straight through."""
+        limiter = ProviderRateLimiter(rates={'google': 1.0})
+        for _ in range(5):
+            self.assertEqual(limiter.acquire('nominatim'), 0.0)
+
+    def test_wait_budget(self):
+        """Test that callers give up when a token is further off than their budget."""
+        limiter = ProviderRateLimiter(rates={'nominatim': 1.0}, wait_budgets={PRIORITY_INTERACTIVE: 0.1})
+        limiter.acquire('nominatim')
+
+        start = time.monotonic()
+        with self.assertRaises(RateLimitExceeded):
+            limiter.acquire('nominatim')
+        self.assertLess(time.monotonic() - start, 0.05)
+        self.assertEqual(limiter.stats()['nominatim']['rejected'], 1)
+
+    def test_interactive_served_before_bulk(self):
+        """Test that a later interactive request overtakes queued bulk requests."""
+        limiter = ProviderRateLimiter(rates={'nominatim': 5.0}, bursts={'nominatim': 1})
+        limiter.acquire('nominatim')
+        order = []
+
+        def worker(priority):
+            limiter.acquire('nominatim', priority)
+            order.append(priority)
+
+        bulk = [threading.Thread(target=worker, args=(PRIORITY_BULK,)) for _ in range(3)]
+        for thread in bulk:
+            thread.start()
+        time.sleep(0.02)
+        interactive = threading.Thread(target=worker, args=(PRIORITY_INTERACTIVE,))
+        interactive.start()
+        time.sleep(0.01)
+        self.assertEqual(limiter.stats()['nominatim']['queued'], {PRIORITY_INTERACTIVE: 1, PRIORITY_BULK: 3})
+
+        for thread in bulk + [interactive]:
+            thread.join()
+
+        self.assertEqual(order[0], PRIORITY_INTERACTIVE)
+        self.assertEqual(limiter.stats()['nominatim']['max_queue_depth'], 4)
+
+    def test_priority_context(self):
+        """Test that lookup_priority sets the default priority."""
+        self.assertEqual(current_priority(), PRIORITY_INTERACTIVE)
+        with lookup_priority(PRIORITY_BULK):
+            self.assertEqual(current_priority(), PRIORITY_BULK)
+        self.assertEqual(current_priority(), PRIORITY_INTERACTIVE)
+
+    def test_shared_bucket_across_limiters(self):
+        """Test that limiters using one SQLite file share a single budget."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'limits.sqlite3')
+            first = ProviderRateLimiter(rates={'google': 1.0}, path=path)
+            second = ProviderRateLimiter(rates={'google': 1.0}, path=path)
+
+            first.acquire('google')
+            with self.assertRaises(RateLimitExceeded):
+                second.acquire('google', budget=0.1)
+
+
+class TestDistanceServiceRateLimiting(unittest.TestCase):
+    """Test cases for rate-limited Google lookups."""
+
+    def setUp(self):
+        """Start a local Distance Matrix stand-in."""
+        self.server = FakeDistanceMatrixServer({
+            ('Austin, TX', 'Dallas, TX'): 195.4,
+            ('Austin, TX', 'Houston, TX'): 165.2,
+        }).start()
+        self.service = DistanceService(
+            google_api_key='test-key',
+            google_api_url=self.server.url,
+            rate_limiter=ProviderRateLimiter(rates={'google': 1.0}, wait_budgets={PRIORITY_INTERACTIVE: 0.1})
+        )
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_over_budget_requests_skipped(self):
+        """Test that requests past the wait budget are not sent."""
+        first = self.service.calculate_distances_batch([('Austin, TX', 'Dallas, TX')])
+        second = self.service.calculate_distances_batch([('Austin, TX', 'Houston, TX')])
+
+        self.assertEqual(first[0]['status'], 'OK')
+        self.assertEqual(second[0]['status'], 'RATE_LIMITED')
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.service.metrics()['rate_limits']['google']['granted'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
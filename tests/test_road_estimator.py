@@ -0,0 +1,161 @@
+"""Unit tests for the calibrated road-distance estimator."""
+
+import unittest
+import tempfile
+import os
+from pathlib import Path
+import sys
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from calculator.road_estimator import RoadDistanceEstimator, DEFAULT_CIRCUITY, distance_band
+from calculator.geo_vector import haversine_miles
+from calculator.distance_cache import DistanceCache
+from calculator.distance_service import DistanceService, PROVIDER_GOOGLE_DRIVING
+from calculator.cost_engine import HouseholdGoodsCostCalculator
+from tests.fake_distance_matrix import FakeDistanceMatrixServer
+
+
+def synthetic_samples(factor, count=40, seed=0):
+    """Random Texas lanes whose driving distance is factor x straight line."""
+    rng = np.random.default_rng(seed)
+    samples = []
+    for _ in range(count):
+        origin = (rng.uniform(29, 33), rng.uniform(-100, -95))
+        destination = (rng.uniform(29, 33), rng.uniform(-100, -95))
+        straight = float(haversine_miles(origin[0], origin[1], destination[0], destination[1]))
+        samples.append((origin, destination, straight * factor))
+    return samples
+
+
+class TestRoadDistanceEstimator(unittest.TestCase):
+    """Test cases for RoadDistanceEstimator."""
+
+    def test_uncalibrated_uses_default_factor(self):
+        """Test the fallback factor and low confidence without data."""
+        estimate = RoadDistanceEstimator().estimate((30.27, -97.74), (32.78, -96.80))
+
+        self.assertEqual(estimate['circuity_factor'], DEFAULT_CIRCUITY)
+        self.assertEqual(estimate['basis'], 'default')
+        self.assertLess(estimate['confidence'], 0.5)
+
+    def test_learns_circuity_factor(self):
+        """Test that a consistent factor is learned with high confidence."""
+        estimator = RoadDistanceEstimator()
+        estimator.fit(synthetic_samples(1.3))
+
+        estimate = estimator.estimate((30.27, -97.74), (32.78, -96.80))
+        self.assertAlmostEqual(estimate['circuity_factor'], 1.3, places=2)
+        self.assertAlmostEqual(estimate['distance_miles'], estimate['geodesic_miles'] * 1.3, delta=1)
+        self.assertGreater(estimate['confidence'], 0.8)
+
+    def test_noisy_data_lowers_confidence(self):
+        """Test that dispersed factors reduce confidence."""
+        samples = synthetic_samples(1.1, seed=1) + synthetic_samples(1.6, seed=2)
+        estimator = RoadDistanceEstimator()
+        estimator.fit(samples)
+
+        consistent = RoadDistanceEstimator()
+        consistent.fit(synthetic_samples(1.3))
+
+        origin, destination = (30.27, -97.74), (32.78, -96.80)
+        self.assertLess(
+            estimator.estimate(origin, destination)['confidence'],
+            consistent.estimate(origin, destination)['confidence']
+        )
+
+    def test_outliers_are_ignored(self):
+        """Test that implausible ratios are filtered out."""
+        samples = synthetic_samples(1.25) + [((30.0, -97.0), (30.5, -97.5), 5000.0)]
+        estimator = RoadDistanceEstimator()
+
+        self.assertEqual(estimator.fit(samples), 40)
+
+    def test_band_fallback(self):
+        """Test that unseen region pairs fall back to the distance band."""
+        estimator = RoadDistanceEstimator()
+        estimator.fit(synthetic_samples(1.3))
+
+        # Seattle -> Portland is a different region pair at a similar band
+        estimate = estimator.estimate((47.61, -122.33), (45.52, -122.68))
+        self.assertIn(estimate['basis'], ('band', 'global'))
+
+    def test_corrects_bracket_selection(self):
+        """Test that estimates move lanes into the driving-distance bracket."""
+        calculator = HouseholdGoodsCostCalculator()
+        estimator = RoadDistanceEstimator()
+        estimator.fit(synthetic_samples(1.3))
+
+        # Straight line just under 100 miles, driving roughly 127 miles
+        origin, destination = (30.27, -97.74), (31.55, -97.15)
+        estimate = estimator.estimate(origin, destination)
+        self.assertLess(estimate['geodesic_miles'], 100)
+
+        _, _, straight_bracket = calculator._get_transportation_cost_from_matrix(5000, estimate['geodesic_miles'])
+        _, _, road_bracket = calculator._get_transportation_cost_from_matrix(5000, round(estimate['distance_miles']))
+        self.assertEqual(straight_bracket, '0-100 miles')
+        self.assertEqual(road_bracket, '101-250 miles')
+
+    def test_distance_band(self):
+        """Test band boundaries."""
+        self.assertEqual(distance_band(50), 0)
+        self.assertEqual(distance_band(100), 1)
+        self.assertEqual(distance_band(3000), 6)
+
+
+class TestDistanceServiceEstimator(unittest.TestCase):
+    """Test cases for estimator integration in DistanceService."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = DistanceCache(os.path.join(self.tmpdir.name, 'cache.sqlite3'))
+        lanes = {
+            ('Austin, TX', 'Dallas, TX'): 195.4,
+            ('Austin, TX', 'Houston, TX'): 165.2,
+            ('Dallas, TX', 'Houston, TX'): 239.0,
+            ('San Antonio, TX', 'Houston, TX'): 197.0,
+            ('San Antonio, TX', 'Dallas, TX'): 274.0,
+            ('Waco, TX', 'Houston, TX'): 184.0,
+        }
+        for (origin, destination), miles in lanes.items():
+            self.cache.set_distance(origin, destination, PROVIDER_GOOGLE_DRIVING, miles)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_calibrate_from_cache(self):
+        """Test calibration from cached Google driving distances."""
+        service = DistanceService(google_api_key=None, cache=self.cache, road_estimator=RoadDistanceEstimator())
+        service.google_api_key = None
+        service.use_google_maps = False
+
+        self.assertEqual(service.calibrate_road_estimator(), 6)
+
+        geodesic = service._calculate_geodesic_distance('Waco, TX', 'Austin, TX')
+        estimated = service.calculate_distance('Waco, TX', 'Austin, TX')
+        self.assertGreater(estimated, geodesic)
+
+    def test_confident_estimate_skips_google(self):
+        """Test that confident estimates avoid the paid API call."""
+        server = FakeDistanceMatrixServer({('Waco, TX', 'Austin, TX'): 101.0}).start()
+        try:
+            service = DistanceService(
+                google_api_key='test-key',
+                google_api_url=server.url,
+                cache=self.cache,
+                road_estimator=RoadDistanceEstimator(min_samples=3),
+                estimator_confidence_threshold=0.3
+            )
+            service.calibrate_road_estimator()
+
+            self.assertIsNotNone(service.calculate_distance('Waco, TX', 'Austin, TX'))
+            self.assertEqual(server.requests, [])
+        finally:
+            server.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+"""Unit tests for the two-tier shared cache."""
+
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from calculator.shared_cache import MISS, LocalLRU, SQLiteSharedStore, TieredCache, open_shared_store
+
+
+def _write_quote(path, key, value):
+    """Write through a separate process's cache (module level for pickling)."""
+    TieredCache(SQLiteSharedStore(path), 'quote').set(key, value)
+
+
+class _BrokenStore:
+    """Shared store whose server is unreachable."""
+
+    def get(self, key):
+        raise ConnectionError('store down')
+
+    def set(self, key, value, ex=None, nx=False):
+        raise ConnectionError('store down')
+
+    def delete(self, *keys):
+        raise ConnectionError('store down')
+
+
+class TestSQLiteSharedStore(unittest.TestCase):
+    """Test cases for the Redis-compatible SQLite store."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, 'shared.sqlite3')
+        self.store = SQLiteSharedStore(self.path)
+
+    def test_redis_semantics(self):
+        """Test get/set/mget/delete/exists behave like redis-py."""
+        self.assertIsNone(self.store.get('missing'))
+        self.assertTrue(self.store.set('a', 'one'))
+        self.assertTrue(self.store.set('b', 2))
+
+        self.assertEqual(self.store.get('a'), b'one')
+        self.assertEqual(self.store.mget(['a', 'missing', 'b']), [b'one', None, b'2'])
+        self.assertEqual(self.store.exists('a', 'b', 'missing'), 2)
+        self.assertEqual(self.store.delete('a', 'missing'), 1)
+        self.assertIsNone(self.store.get('a'))
+        self.assertTrue(self.store.ping())
+
+    def test_expiry_and_nx(self):
+        """Test that ex expires keys and nx only sets missing keys."""
+        self.store.set('short', 'x', ex=0.05)
+        self.assertIsNone(self.store.set('short', 'y', nx=True))
+        time.sleep(0.1)
+
+        self.assertIsNone(self.store.get('short'))
+        self.assertTrue(self.store.set('short', 'y', nx=True))
+        self.assertEqual(self.store.get('short'), b'y')
+
+    def test_lru_eviction(self):
+        """Test that sweeps keep the most recently used keys within max_entries."""
+        store = SQLiteSharedStore(os.path.join(self.tmpdir.name, 'bounded.sqlite3'), max_entries=3)
+        for key in ('a', 'b', 'c', 'd'):
+            store.set(key, key)
+            time.sleep(0.01)
+        store.get('a')
+        store.set('expired', 'x', ex=0.01)
+        time.sleep(0.02)
+
+        self.assertEqual(store.evict(), 2)
+        self.assertEqual(store.mget(['a', 'b', 'c', 'd']), [b'a', None, b'c', b'd'])
+
+    def test_eviction_runs_on_writes(self):
+        """Test that the store stays bounded without explicit sweeps."""
+        store = SQLiteSharedStore(os.path.join(self.tmpdir.name, 'bounded.sqlite3'), max_entries=10)
+        store.SWEEP_INTERVAL = 16
+        for i in range(100):
+            store.set(f'key {i}', i)
+
+        count = store._connection().execute('SELECT COUNT(*) FROM shared_cache').fetchone()[0]
+        self.assertLessEqual(count, 10 + store.SWEEP_INTERVAL)
+        self.assertEqual(store.get('key 99'), b'99')
+
+    def test_upgrades_store_without_access_times(self):
+        """Test that a store created before LRU eviction is migrated."""
+        path = os.path.join(self.tmpdir.name, 'old.sqlite3')
+        with sqlite3.connect(path) as conn:
+            conn.execute('CREATE TABLE shared_cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)')
+            conn.execute("INSERT INTO shared_cache VALUES ('old', x'6f6c64', NULL)")
+        conn.close()
+
+        store = SQLiteSharedStore(path, max_entries=1)
+        store.set('new', 'new')
+
+        self.assertEqual(store.evict(), 1)
+        self.assertEqual(store.mget(['old', 'new']), [None, b'new'])
+
+    def test_shared_between_processes(self):
+        """Test that a value written by one worker process is read by another."""
+        process = multiprocessing.Process(target=_write_quote, args=(self.path, 'lane', {'total': 1234.5}))
+        process.start()
+        process.join()
+
+        self.assertEqual(process.exitcode, 0)
+        self.assertEqual(TieredCache(self.store, 'quote').get('lane'), {'total': 1234.5})
+
+    def test_open_shared_store_defaults_to_sqlite(self):
+        """Test that a non-Redis URL opens the local stand-in."""
+        store = open_shared_store(self.path)
+        self.assertIsInstance(store, SQLiteSharedStore)
+        self.assertEqual(store.path, self.path)
+
+
+class TestTieredCache(unittest.TestCase):
+    """Test cases for the in-process + shared tiers."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.store = SQLiteSharedStore(os.path.join(self.tmpdir.name, 'shared.sqlite3'))
+
+    def test_sibling_worker_hits_shared_tier(self):
+        """Test that a value cached by one worker is a shared hit, then a local hit, for another."""
+        TieredCache(self.store, 'quote').set('k', [1, 2, 3])
+        sibling = TieredCache(self.store, 'quote')
+
+        self.assertEqual(sibling.get('k'), [1, 2, 3])
+        self.assertEqual(sibling.get('k'), [1, 2, 3])
+        self.assertIs(sibling.get('other'), MISS)
+
+        stats = sibling.stats()
+        self.assertEqual(stats['shared']['hits'], 1)
+        self.assertEqual(stats['in_process']['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertAlmostEqual(stats['hit_ratio'], 0.667)
+
+    def test_namespaces_and_none_values(self):
+        """Test that namespaces do not collide and None is a cacheable value."""
+        quotes = TieredCache(self.store, 'quote')
+        other = TieredCache(self.store, 'other')
+        quotes.set('k', None)
+
+        self.assertIsNone(quotes.get('k'))
+        self.assertIs(other.get('k'), MISS)
+
+    def test_delete_and_ttl(self):
+        """Test that deleted and expired entries are misses in both tiers."""
+        cache = TieredCache(self.store, 'quote', ttl_seconds=0.05)
+        cache.set('expiring', 1)
+        cache.set('deleted', 2, ttl_seconds=60)
+        cache.delete('deleted')
+        time.sleep(0.1)
+
+        self.assertIs(cache.get('expiring'), MISS)
+        self.assertIs(cache.get('deleted'), MISS)
+
+    def test_unavailable_store_degrades_to_local(self):
+        """Test that store errors are counted and only cost shared hits."""
+        cache = TieredCache(_BrokenStore(), 'quote')
+        cache.set('k', 1)
+
+        self.assertEqual(cache.get('k'), 1)
+        self.assertIs(cache.get('missing'), MISS)
+        self.assertEqual(cache.stats()['shared']['errors'], 2)
+
+    def test_local_lru_bound(self):
+        """Test that the in-process tier evicts least recently used entries."""
+        lru = LocalLRU(max_entries=2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+
+        self.assertEqual(lru.get('a'), 1)
+        self.assertIs(lru.get('b'), MISS)
+        self.assertEqual(len(lru), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
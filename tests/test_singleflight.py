@@ -0,0 +1,157 @@
+"""Unit tests for single-flight request coalescing."""
+
+import threading
+import time
+import unittest
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from calculator.distance_service import DistanceService
+from calculator.singleflight import SingleFlight
+from tests.fake_distance_matrix import FakeDistanceMatrixServer
+
+
+def run_concurrently(count, fn):
+    """Start ``count`` threads calling ``fn`` together and collect their results."""
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def worker(i):
+        barrier.wait()
+        results[i] = fn()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Test cases for the SingleFlight registry."""
+
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.calls = 0
+
+    def slow_lookup(self, value):
+        self.calls += 1
+        time.sleep(0.1)
+        return value
+
+    def test_concurrent_calls_share_one_execution(self):
+        """Test that identical concurrent calls run once."""
+        results = run_concurrently(8, lambda: self.flight.do('lane', self.slow_lookup, 42))
+
+        self.assertEqual(results, [42] * 8)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.flight.stats(), {'executed': 1, 'coalesced': 7, 'in_flight': 0})
+
+    def test_distinct_keys_not_coalesced(self):
+        """Test that different keys run independently."""
+        self.flight.do('a', self.slow_lookup, 1)
+        self.flight.do('a', self.slow_lookup, 2)
+
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(self.flight.coalesced, 0)
+
+    def test_errors_reach_every_waiter(self):
+        """Test that the leader's exception is raised in all followers."""
+        def failing():
+            time.sleep(0.1)
+            raise ValueError('upstream down')
+
+        def call():
+            try:
+                self.flight.do('lane', failing)
+            except ValueError as e:
+                return str(e)
+
+        self.assertEqual(run_concurrently(4, call), ['upstream down'] * 4)
+        self.assertEqual(self.flight.stats()['in_flight'], 0)
+
+    def test_acquire_splits_led_and_joined(self):
+        """Test that acquire only leads keys not already in flight."""
+        led, _ = self.flight.acquire(['a', 'b'])
+        led_again, joined = self.flight.acquire(['b', 'c', 'c'])
+
+        self.assertEqual(set(led), {'a', 'b'})
+        self.assertEqual(set(led_again), {'c'})
+        self.assertEqual(set(joined), {'b'})
+
+        self.flight.release('b', 7)
+        self.assertEqual(joined['b'].wait(timeout=1), 7)
+
+
+class TestDistanceServiceCoalescing(unittest.TestCase):
+    """Test cases for coalesced lookups in DistanceService."""
+
+    def setUp(self):
+        """Start a slow local Distance Matrix and Nominatim stand-in."""
+        self.server = FakeDistanceMatrixServer(
+            {('Austin, TX', 'Dallas, TX'): 195.4, ('Austin, TX', 'Houston, TX'): 165.2},
+            latency=0.2,
+            geocodes={'Somewhere, TX': (31.0, -97.0)}
+        ).start()
+        self.service = DistanceService(
+            google_api_key='test-key',
+            google_api_url=self.server.url,
+            use_gazetteer=False,
+            nominatim_domain=self.server.nominatim_domain,
+            nominatim_scheme='http'
+        )
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_identical_lanes_share_one_request(self):
+        """Test that simultaneous requests for one lane make one API call."""
+        results = run_concurrently(
+            6, lambda: self.service._calculate_google_maps_distance('Austin, TX', 'Dallas, TX')
+        )
+
+        self.assertEqual(len(set(results)), 1)
+        self.assertAlmostEqual(results[0], 195.4, places=1)
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.service.metrics()['coalescing']['coalesced'], 5)
+
+    def test_normalized_spellings_coalesced(self):
+        """Test that case and whitespace variants of a lane are one lookup."""
+        results = self.service.calculate_distances_batch([
+            ('Austin, TX', 'Dallas, TX'),
+            ('austin,  tx', 'DALLAS, TX'),
+        ])
+
+        self.assertEqual(results[0]['distance_miles'], results[1]['distance_miles'])
+        self.assertEqual(self.server.element_count, 1)
+
+    def test_batch_joins_interactive_lookup(self):
+        """Test that a batch waits for a lane an interactive request is fetching."""
+        interactive = threading.Thread(
+            target=self.service._calculate_google_maps_distance, args=('Austin, TX', 'Dallas, TX')
+        )
+        interactive.start()
+        time.sleep(0.05)
+        results = self.service.calculate_distances_batch([
+            ('Austin, TX', 'Dallas, TX'),
+            ('Austin, TX', 'Houston, TX'),
+        ])
+        interactive.join()
+
+        self.assertEqual([r['status'] for r in results], ['OK', 'OK'])
+        self.assertEqual(self.server.element_count, 2)
+
+    def test_identical_geocodes_share_one_request(self):
+        """Test that simultaneous geocodes for one location make one call."""
+        results = run_concurrently(5, lambda: self.service._geocode_location('Somewhere, TX'))
+
+        self.assertEqual(results, [(31.0, -97.0)] * 5)
+        self.assertEqual(self.server.geocode_requests, ['Somewhere, TX'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+"""Unit tests for Monte Carlo cost uncertainty bands."""
+
+import unittest
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from calculator.cost_engine import HouseholdGoodsCostCalculator
+from calculator.uncertainty import simulate_moves, simulate_quote, validate_spec
+
+
+MOVE = ('Austin, TX', 'Dallas, TX', 195, 4000, 'self_pack', 'no_storage', True)
+
+
+class TestUncertainty(unittest.TestCase):
+    """Test cases for sampled weight and distance."""
+
+    def setUp(self):
+        self.calculator = HouseholdGoodsCostCalculator()
+
+    def test_exact_inputs_have_no_spread(self):
+        """Test that zero errors reproduce the deterministic quote."""
+        band = simulate_quote(self.calculator, MOVE, {'weight': 0, 'distance': 0, 'samples': 100})
+        total = self.calculator.calculate_should_cost(*MOVE)['total_should_cost']
+
+        self.assertEqual((band['p10'], band['p50'], band['p90'], band['nominal']), (total,) * 4)
+        self.assertEqual(band['bracket_crossing'], {'weight': 0.0, 'distance': 0.0, 'any': 0.0})
+
+    def test_bands_and_bracket_crossing(self):
+        """Test that a weight estimate near a bracket boundary may cross it."""
+        near_boundary = MOVE[:3] + (4900,) + MOVE[4:]
+        band = simulate_quote(self.calculator, near_boundary, {'weight': 0.15, 'distance_source': 'manual', 'seed': 3})
+
+        self.assertEqual(band['samples'], 10000)
+        self.assertLess(band['p10'], band['p50'])
+        self.assertLess(band['p50'], band['p90'])
+        self.assertEqual(band['bracket_crossing']['distance'], 0.0)
+        self.assertGreater(band['bracket_crossing']['weight'], 0.3)
+        self.assertLess(band['bracket_crossing']['weight'], 0.6)
+        self.assertAlmostEqual(sum(band['weight_brackets'].values()), 1.0, places=3)
+        self.assertEqual(band['distance'], {'distribution': 'uniform', 'relative_error': 0.0})
+
+    def test_seed_is_reproducible(self):
+        """Test that the same seed gives the same bands."""
+        spec = {'weight': {'distribution': 'normal', 'relative_error': 0.1}, 'seed': 11, 'samples': 500}
+
+        self.assertEqual(simulate_quote(self.calculator, MOVE, spec), simulate_quote(self.calculator, MOVE, spec))
+
+    def test_distance_error_follows_source(self):
+        """Test that estimated distances are sampled wider than driving distances."""
+        bands = simulate_moves(self.calculator, [MOVE, MOVE], {'samples': 10}, distance_sources=['google', 'geodesic'])
+
+        self.assertLess(bands[0]['distance']['relative_error'], bands[1]['distance']['relative_error'])
+
+    def test_invalid_spec(self):
+        """Test that unknown distributions and sample counts are rejected."""
+        with self.assertRaises(ValueError):
+            simulate_quote(self.calculator, MOVE, {'weight': {'distribution': 'cauchy'}})
+        with self.assertRaises(ValueError):
+            simulate_quote(self.calculator, MOVE, {'samples': 0})
+        for spec in (
+            {'weight': 'abc'},
+            {'distance': ['normal']},
+            {'weight': {'relative_error': 'wide'}},
+            {'samples': 'many'},
+            {'seed': 'lucky'},
+            {'distance_source': ['google']},
+            ['weight'],
+            'weight',
+        ):
+            with self.assertRaises(ValueError):
+                simulate_quote(self.calculator, MOVE, spec)
+            with self.assertRaises(ValueError):
+                validate_spec(spec)
+
+    def test_calculate_should_cost_option(self):
+        """Test that calculate_should_cost adds bands only when asked."""
+        plain = self.calculator.calculate_should_cost(*MOVE)
+        banded = self.calculator.calculate_should_cost(*MOVE, uncertainty={'samples': 1000, 'seed': 1})
+
+        self.assertNotIn('uncertainty', plain)
+        self.assertEqual(banded['total_should_cost'], plain['total_should_cost'])
+        self.assertEqual(banded['uncertainty']['samples'], 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""Unit tests for vectorized pricing."""
+
+import copy
+import random
+import unittest
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from calculator.cost_engine import HouseholdGoodsCostCalculator
+from calculator.vector_pricing import move_frame, price_moves
+
+
+LOCATIONS = [
+    'Austin, TX', 'Dallas, TX', 'Los Angeles, CA', 'New York, NY', 'Miami, FL',
+    'Denver, CO', 'Seattle, WA', 'Chicago, IL', 'Portland', 'Boise',
+]
+
+
+class TestVectorPricing(unittest.TestCase):
+    """Test cases for pricing batches with NumPy."""
+
+    def setUp(self):
+        self.calculator = HouseholdGoodsCostCalculator()
+        rng = random.Random(7)
+        self.moves = [
+            (
+                rng.choice(LOCATIONS),
+                rng.choice(LOCATIONS),
+                rng.choice([0, 100, 100.5, 250, 3000.2, rng.uniform(0, 3500)]),
+                rng.choice([100, 1000, 1000.5, rng.uniform(1, 20000)]),
+                rng.choice(['self_pack', 'partial_pack', 'full_pack', 'unknown']),
+                rng.choice(['no_storage', 'storage_30days', 'storage_60days']),
+                rng.random() < 0.5,
+            )
+            for _ in range(2000)
+        ]
+
+    def assert_matches_scalar(self, matrix, custom_rates=None):
+        priced = price_moves(move_frame(self.calculator, self.moves), matrix, custom_rates)
+        for move, (_, row) in zip(self.moves, priced.iterrows()):
+            expected = self.calculator.calculate_should_cost(*move, custom_rates=custom_rates)
+            self.assertEqual(row['total_should_cost'], expected['total_should_cost'], move)
+            self.assertEqual(row['weight_bracket'], expected['breakdown']['transportation_weight_bracket'])
+            self.assertEqual(row['distance_bracket'], expected['breakdown']['transportation_distance_bracket'])
+            self.assertEqual(row['applied_minimum_charge'], expected['breakdown']['applied_minimum_charge'])
+
+    def test_matches_calculate_should_cost(self):
+        """Test that vectorized totals equal the scalar calculation to the cent."""
+        self.assert_matches_scalar(self.calculator.matrix)
+
+    def test_matches_with_custom_rates(self):
+        """Test that custom rate overrides are applied like the scalar calculation."""
+        self.assert_matches_scalar(self.calculator.matrix, {
+            'discount': 0.1,
+            'full_pack': 1.5,
+            'fuel_surcharge': 0.2,
+            'state_tax_CA': 0.1,
+            'minimum_charge': 900,
+        })
+
+    def test_other_matrix(self):
+        """Test that the matrix argument is used instead of the calculator's."""
+        matrix = copy.deepcopy(self.calculator.matrix)
+        matrix['transportation_matrix']['rates'][0][0] += 100
+        frame = move_frame(self.calculator, [('Austin, TX', 'Dallas, TX', 50, 500, 'self_pack', 'no_storage', False)])
+
+        before = price_moves(frame, self.calculator.matrix)['transportation_cost'][0]
+        after = price_moves(frame, matrix)['transportation_cost'][0]
+
+        self.assertEqual(after - before, 100)
+
+    def test_empty_batch(self):
+        """Test that an empty batch prices to an empty frame."""
+        self.assertTrue(price_moves(move_frame(self.calculator, []), self.calculator.matrix).empty)
+
+
+if __name__ == '__main__':
+    unittest.main()
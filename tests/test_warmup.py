@@ -0,0 +1,137 @@
+"""Unit tests for cache snapshots and boot-time warm-up."""
+
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from calculator.distance_cache import DistanceCache
+from calculator.distance_service import DistanceService, PROVIDER_GOOGLE_DRIVING
+from calculator.road_estimator import RoadDistanceEstimator
+from calculator.warmup import WarmupManager
+from tests.fake_distance_matrix import FakeDistanceMatrixServer
+
+
+class TestWarmup(unittest.TestCase):
+    """Test cases for snapshotting and restoring warm state."""
+
+    def setUp(self):
+        """Start a Distance Matrix stand-in and point everything at a temp dir."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.snapshot = os.path.join(self.tmp.name, 'snapshot.json.gz')
+        self.server = FakeDistanceMatrixServer({
+            ('Austin, TX', 'Dallas, TX'): 195.4,
+            ('Austin, TX', 'Houston, TX'): 165.2,
+        }).start()
+        self.addCleanup(self.server.stop)
+
+    def make_service(self, name):
+        cache = DistanceCache(os.path.join(self.tmp.name, f'{name}.sqlite3'))
+        return DistanceService(
+            google_api_key='test-key',
+            google_api_url=self.server.url,
+            cache=cache,
+            road_estimator=RoadDistanceEstimator(min_samples=1)
+        )
+
+    def test_snapshot_restores_cache_into_fresh_worker(self):
+        """Test that a new worker with an empty cache answers from the snapshot."""
+        first = self.make_service('first')
+        self.assertAlmostEqual(first.calculate_distance('Austin, TX', 'Dallas, TX'), 195.4, places=1)
+        first.cache.set_geocode('Austin, TX', (30.2672, -97.7431))
+        written = WarmupManager(first, path=self.snapshot).save()
+        self.assertEqual(written, {'geocodes': 1, 'distances': 1})
+
+        second = self.make_service('second')
+        manager = WarmupManager(second, path=self.snapshot, top_lanes=0)
+        status = manager.warm_up()
+
+        self.assertTrue(manager.ready)
+        self.assertEqual(status['restored'], {'geocodes': 1, 'distances': 1})
+        requests_before = len(self.server.requests)
+        self.assertAlmostEqual(second.calculate_distance('austin tx', 'Dallas, Texas'), 195.4, places=1)
+        self.assertEqual(len(self.server.requests), requests_before)
+        self.assertEqual(second.cache.get_geocode('Austin, TX'), (30.2672, -97.7431))
+
+    def test_restore_keeps_existing_rows_and_skips_expired(self):
+        """Test that snapshot rows never overwrite the cache or revive expired rows."""
+        cache = DistanceCache(os.path.join(self.tmp.name, 'cache.sqlite3'))
+        now = time.time()
+        cache.set_distance('Austin, TX', 'Dallas, TX', PROVIDER_GOOGLE_DRIVING, 196.0)
+        inserted = cache.import_entries({'distances': [
+            ['austin, tx', 'dallas, tx', PROVIDER_GOOGLE_DRIVING, 1.0, 1, now, now + 3600, now, 5],
+            ['austin, tx', 'houston, tx', PROVIDER_GOOGLE_DRIVING, 165.2, 1, now, now - 1, now, 5],
+            ['austin, tx', 'el paso, tx', PROVIDER_GOOGLE_DRIVING, 577.0, 1, now, now + 3600, now, 5],
+        ]})
+
+        self.assertEqual(inserted, {'geocodes': 0, 'distances': 1})
+        self.assertEqual(cache.get_distance('Austin, TX', 'Dallas, TX', PROVIDER_GOOGLE_DRIVING), 196.0)
+        self.assertEqual(cache.get_distance('Austin, TX', 'El Paso, TX', PROVIDER_GOOGLE_DRIVING), 577.0)
+        self.assertIsNot(cache.get_distance('Austin, TX', 'Houston, TX', PROVIDER_GOOGLE_DRIVING), 165.2)
+
+    def test_road_estimator_calibration_restored(self):
+        """Test that the calibration is restored instead of recomputed."""
+        first = self.make_service('first')
+        first.road_estimator.fit([((30.2672, -97.7431), (32.7767, -96.7970), 195.4)])
+        WarmupManager(first, path=self.snapshot).save()
+
+        second = self.make_service('second')
+        status = WarmupManager(second, path=self.snapshot, top_lanes=0).warm_up()
+
+        self.assertEqual(status['estimator_samples'], 1)
+        self.assertEqual(second.road_estimator.summary(), first.road_estimator.summary())
+        estimate = second.road_estimator.estimate((30.2672, -97.7431), (32.7767, -96.7970))
+        self.assertEqual(estimate['basis'], 'region_band')
+
+    def test_pre_resolves_most_used_lanes(self):
+        """Test that warm-up refreshes the hottest recent lanes first."""
+        service = self.make_service('cache')
+        service.calculate_distances([('Austin, TX', 'Dallas, TX'), ('Austin, TX', 'Houston, TX')])
+        for _ in range(3):
+            service.calculate_distance('Austin, TX', 'Houston, TX')
+        manager = WarmupManager(service, path=self.snapshot, top_lanes=1)
+
+        self.assertEqual(manager.recent_lanes(), [('Austin, TX', 'Houston, TX')])
+        # History outlives the entries: expired lanes are the ones worth refreshing
+        with service.cache._connection() as conn:
+            conn.execute('UPDATE distances SET expires_at = 0')
+        service.cache.local.clear()
+        requests_before = len(self.server.requests)
+        status = manager.warm_up()
+
+        self.assertEqual(status['pre_resolved_lanes'], 1)
+        self.assertEqual(len(self.server.requests), requests_before + 1)
+
+    def test_unreadable_snapshot_still_becomes_ready(self):
+        """Test that a corrupt snapshot is ignored and warm-up still completes."""
+        with open(self.snapshot, 'wb') as f:
+            f.write(b'not a snapshot')
+        manager = WarmupManager(self.make_service('cache'), path=self.snapshot, top_lanes=0)
+
+        status = manager.warm_up()
+
+        self.assertTrue(manager.ready)
+        self.assertEqual(status['restored'], {})
+        self.assertNotIn('error', status)
+
+    def test_start_runs_in_background(self):
+        """Test that start warms up without blocking and stop writes a snapshot."""
+        manager = WarmupManager(self.make_service('cache'), path=self.snapshot, top_lanes=0, snapshot_interval=0)
+        self.assertFalse(manager.ready)
+
+        manager.start()
+        self.assertTrue(manager.wait_ready(10))
+        manager.stop()
+
+        self.assertTrue(os.path.exists(self.snapshot))
+        self.assertEqual(manager.status()['state'], 'ready')
+
+
+if __name__ == '__main__':
+    unittest.main()